@@ -0,0 +1,116 @@
+"""
+Benchmark next-fire computation for cron schedules.
+
+Generates a few thousand random expressions, times parsing and repeated
+``next_after`` calls, and cross-checks a sample against a naive
+minute-by-minute scan.
+
+    python benchmarks/cron_next_fire.py [--count 5000] [--steps 20]
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nodebox.services.cron import CronExpression  # noqa: E402
+
+FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+TIMEZONES = ("UTC", "Europe/Berlin", "America/New_York", "Asia/Kolkata", None)
+
+
+def random_field(rng, low, high):
+    kind = rng.random()
+    if kind < 0.35:
+        return "*"
+    if kind < 0.55:
+        return f"*/{rng.randint(2, max(2, (high - low) // 2))}"
+    if kind < 0.75:
+        start = rng.randint(low, high)
+        return f"{start}-{rng.randint(start, high)}"
+    if kind < 0.9:
+        values = sorted(rng.sample(range(low, high + 1), rng.randint(1, 4)))
+        return ",".join(map(str, values))
+    return str(rng.randint(low, high))
+
+
+def random_expressions(count, seed):
+    rng = random.Random(seed)
+    return [
+        (
+            " ".join(random_field(rng, low, high) for low, high in FIELD_RANGES),
+            rng.choice(TIMEZONES),
+        )
+        for _ in range(count)
+    ]
+
+
+def naive_next(cron, moment, limit_minutes=366 * 24 * 60):
+    candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    for _ in range(limit_minutes):
+        if cron.matches(candidate):
+            return candidate
+        candidate += timedelta(minutes=1)
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--verify", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    specs = random_expressions(args.count, args.seed)
+    start = datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+    t0 = time.perf_counter()
+    crons = [CronExpression(expr, tz) for expr, tz in specs]
+    parse_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    calls = 0
+    unmatched = 0
+    for cron in crons:
+        moment = start
+        for _ in range(args.steps):
+            moment = cron.next_after(moment)
+            calls += 1
+            if moment is None:
+                unmatched += 1
+                break
+    next_s = time.perf_counter() - t0
+
+    print(f"expressions: {len(crons)}  (never firing: {unmatched})")
+    print(
+        f"parse:       {parse_s * 1e3:8.1f} ms  ({parse_s / len(crons) * 1e6:.1f} us each)"
+    )
+    print(
+        f"next_after:  {next_s * 1e3:8.1f} ms  ({next_s / calls * 1e6:.1f} us/call, {calls} calls)"
+    )
+
+    # Minute scanning is slow, so only a sample is cross-checked within a
+    # one year horizon.
+    mismatches = 0
+    t0 = time.perf_counter()
+    for cron in crons[: args.verify]:
+        expected = naive_next(cron, start)
+        actual = cron.next_after(start)
+        if expected is not None and actual != expected:
+            mismatches += 1
+            print(f"  mismatch {cron.expression!r} {cron.tz}: {actual} != {expected}")
+    scan_s = time.perf_counter() - t0
+    print(
+        f"verified:    {min(args.verify, len(crons))} against minute scan "
+        f"({scan_s:.1f} s), {mismatches} mismatches"
+    )
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
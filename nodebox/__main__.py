@@ -0,0 +1,153 @@
+"""
+Command line maintenance tools.
+
+    python -m nodebox migrate-sqlite [--overwrite] [--enable]
+    python -m nodebox export-json NAME [-o PATH]
+    python -m nodebox scheduler [--max-workers N] [--metrics-port PORT]
+"""
+
+import argparse
+import signal
+import sys
+
+
+def _cmd_migrate_sqlite(args):
+    from nodebox.core.settings import load_settings, save_settings
+    from nodebox.services.sqlite_store import SQLiteAutomationStore
+
+    store = SQLiteAutomationStore()
+    results = store.migrate_from_json(overwrite=args.overwrite)
+    failed = 0
+    for name, status in results:
+        print(f"{name}: {status}")
+        failed += status.startswith("error")
+    print(f"{len(results) - failed} of {len(results)} automations in {store.db_path}")
+
+    if args.enable and not failed:
+        settings = load_settings()
+        settings["storage_backend"] = "sqlite"
+        save_settings(settings)
+        print("SQLite storage backend enabled.")
+    return 1 if failed else 0
+
+
+def _cmd_export_json(args):
+    from nodebox.services.sqlite_store import SQLiteAutomationStore
+
+    store = SQLiteAutomationStore()
+    names = store.list_automations() if args.all else args.names
+    if not names:
+        print("Nothing to export.", file=sys.stderr)
+        return 1
+    if args.output and len(names) > 1:
+        print("--output can only be used with a single automation.", file=sys.stderr)
+        return 1
+    for name in names:
+        try:
+            path = store.export_json(name, args.output)
+        except KeyError:
+            print(f"{name}: not found", file=sys.stderr)
+            return 1
+        print(f"{name}: {path}")
+    return 0
+
+
+def _cmd_scheduler(args):
+    from nodebox.core.events import NodeRegression, get_event_bus
+    from nodebox.core.settings import get_setting
+    from nodebox.services.daemon import DEFAULT_MAX_WORKERS, SchedulerDaemon
+    from nodebox.services.node_stats import get_node_stats
+
+    max_workers = args.max_workers or get_setting(
+        "scheduler_max_workers", DEFAULT_MAX_WORKERS
+    )
+    daemon = SchedulerDaemon(max_workers=max_workers)
+    if args.schedules:
+        daemon.schedules_path = args.schedules
+
+    server = None
+    if args.metrics_port:
+        from nodebox.services.metrics_server import (
+            MetricsServer,
+            connect_events,
+            create_registry,
+        )
+
+        registry = create_registry(worker_budget=daemon.max_workers)
+        connect_events(registry)
+        server = MetricsServer(registry, args.metrics_port)
+        if not server.start():
+            return 1
+
+    def _log_regressions(events):
+        for event in events:
+            daemon.log(f"Slower than usual: {event.message}")
+
+    node_stats = get_node_stats()
+    node_stats.subscribe()
+    get_event_bus().subscribe(_log_regressions, types=(NodeRegression,))
+
+    def _stop(_signum, _frame):
+        daemon.stop()
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+    try:
+        daemon.run()
+    finally:
+        node_stats.save()
+        if server is not None:
+            server.stop()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="nodebox")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate = commands.add_parser(
+        "migrate-sqlite", help="import JSON automations into the SQLite store"
+    )
+    migrate.add_argument(
+        "--overwrite", action="store_true", help="replace automations already imported"
+    )
+    migrate.add_argument(
+        "--enable", action="store_true", help="switch the app to the SQLite backend"
+    )
+    migrate.set_defaults(func=_cmd_migrate_sqlite)
+
+    export = commands.add_parser(
+        "export-json", help="write automations from the SQLite store as JSON"
+    )
+    export.add_argument("names", nargs="*", help="automation names")
+    export.add_argument("--all", action="store_true", help="export every automation")
+    export.add_argument("-o", "--output", help="output file (single automation only)")
+    export.set_defaults(func=_cmd_export_json)
+
+    scheduler = commands.add_parser(
+        "scheduler", help="run scheduled automations in the background"
+    )
+    scheduler.add_argument(
+        "--max-workers",
+        type=int,
+        help="automations allowed to run at the same time "
+        "(default: the scheduler_max_workers setting)",
+    )
+    scheduler.add_argument("--schedules", help="schedules file to use")
+    scheduler.add_argument(
+        "--metrics-port",
+        type=int,
+        help="serve Prometheus metrics on 127.0.0.1:PORT/metrics",
+    )
+    scheduler.set_defaults(func=_cmd_scheduler)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,6 +5,7 @@ from nodebox.core.engine import (
     execute_all_nodes,
     run_node_code,
 )
+from nodebox.core.events import EventBus, get_event_bus
 from nodebox.core.font import load_custom_fonts, set_default_font
 from nodebox.core.paths import (
     APP_DATA_DIR,
@@ -29,6 +30,8 @@ __all__ = [
     "CONFIG_FILE",
     "PerformanceEventBus",
     "get_performance_bus",
+    "EventBus",
+    "get_event_bus",
     "ScreenManager",
     "load_custom_fonts",
     "set_default_font",
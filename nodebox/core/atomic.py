@@ -0,0 +1,134 @@
+"""
+Crash-safe file writes.
+
+Data is written to a temporary file in the destination directory, flushed
+to disk and renamed over the target, so readers only ever observe the old
+or the new content and never a truncated file.
+
+``file_lock`` serializes appends to files shared between the GUI and the
+scheduler daemon.
+"""
+
+import json
+import os
+import stat
+import tempfile
+from contextlib import contextmanager, suppress
+from pathlib import Path
+
+if os.name == "nt":
+    import msvcrt
+
+    def _lock_fd(fd):
+        while True:
+            try:
+                # LK_LOCK gives up after about ten seconds; keep waiting.
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+    def _unlock_fd(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _lock_fd(fd):
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+    def _unlock_fd(fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+# The umask can only be read by setting it, so it is read once at import.
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+
+def copy_target_mode(fd, path):
+    """Give the file open as ``fd`` the permissions ``path`` has.
+
+    ``mkstemp`` creates files as 0600; a temp file that replaces ``path``
+    gets the existing file's mode, or the default one for new files.
+    """
+    if not hasattr(os, "fchmod"):
+        return
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        mode = 0o666 & ~_UMASK
+    with suppress(OSError):
+        os.fchmod(fd, mode)
+
+
+def _fsync_directory(directory):
+    if os.name == "nt":
+        return
+    with suppress(OSError):
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def atomic_write_bytes(path, data, fsync=True):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        copy_target_mode(fd, path)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        with suppress(OSError):
+            os.remove(tmp_name)
+        raise
+    if fsync:
+        _fsync_directory(path.parent)
+
+
+def atomic_write_text(path, text, encoding="utf-8", fsync=True):
+    atomic_write_bytes(path, text.encode(encoding), fsync=fsync)
+
+
+def atomic_write_json(path, data, fsync=True, **dump_kwargs):
+    atomic_write_text(path, json.dumps(data, **dump_kwargs), fsync=fsync)
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive lock on ``path`` shared with other processes.
+
+    Blocks until the lock is free. Not reentrant: taking the same lock
+    again in one process deadlocks.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        _lock_fd(fd)
+        try:
+            yield
+        finally:
+            with suppress(OSError):
+                _unlock_fd(fd)
+    finally:
+        os.close(fd)
+
+
+__all__ = [
+    "atomic_write_bytes",
+    "atomic_write_text",
+    "atomic_write_json",
+    "copy_target_mode",
+    "file_lock",
+]
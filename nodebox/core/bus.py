@@ -1,10 +1,20 @@
 from PyQt6.QtCore import QObject, pyqtSignal
 
+from nodebox.core.events import EventBus, get_event_bus
+
 
 class PerformanceEventBus(QObject):
-    """Singleton event bus to broadcast app performance metrics."""
+    """Singleton event bus to broadcast app performance metrics.
+
+    Run, node, worker, cache and log events go through the typed, batched
+    ``EventBus`` (``get_event_bus``); these signals carry the per-run
+    summaries the UI already listens to.
+    """
 
     metrics_signal = pyqtSignal(dict)
+    # Per-schedule lateness/queue wait/duration percentiles, see
+    # nodebox.services.run_history.schedule_stats.
+    scheduler_metrics_signal = pyqtSignal(dict)
 
 
 _instance = None
@@ -17,4 +27,4 @@ def get_performance_bus() -> PerformanceEventBus:
     return _instance
 
 
-__all__ = ["PerformanceEventBus", "get_performance_bus"]
+__all__ = ["EventBus", "PerformanceEventBus", "get_event_bus", "get_performance_bus"]
@@ -9,6 +9,20 @@ from collections import defaultdict, deque
 from contextlib import suppress
 from time import perf_counter
 
+from nodebox.core.events import (
+    LogLine,
+    NodeFinished,
+    NodeStarted,
+    WorkerSpawned,
+    get_event_bus,
+)
+from nodebox.core.process_sampler import (
+    ProcessSampler,
+    register_worker,
+    unregister_worker,
+)
+from nodebox.core.profiling import collect_profile, profile_stem, profiled_source
+
 try:
     from PyQt6.QtCore import QObject, Qt, QThread, QTimer, pyqtSignal
     from PyQt6.QtWidgets import QApplication
@@ -52,6 +66,18 @@ except Exception:
             return None
 
 
+def _has_gui():
+    """True on the GUI thread of a QApplication.
+
+    Headless runs have no QApplication, and scheduled runs in the GUI
+    process execute on a worker thread, where cursor calls are not allowed.
+    """
+    if not _PYQT_AVAILABLE:
+        return False
+    app = QApplication.instance()
+    return app is not None and QThread.currentThread() is app.thread()
+
+
 class ExecutionSignals(QObject):
     """Signals for asynchronous node execution completion."""
 
@@ -68,25 +94,44 @@ class NodeExecutionWorker(QObject):
     execution_finished = pyqtSignal(object, dict)
     execution_error = pyqtSignal(object, str)
 
-    def __init__(self, node, code, inputs):
+    def __init__(
+        self, node, code, inputs, python_executable=None, automation_name=None
+    ):
         super().__init__()
         self.node = node
         self.code = code
         self.inputs = inputs
+        self.python_executable = python_executable
+        self.automation_name = automation_name
 
     def run(self):
         try:
-            result = _run_node_code_subprocess(self.code, self.inputs)
+            result = _run_node_code_subprocess(
+                self.code,
+                self.inputs,
+                python_executable=self.python_executable,
+                automation_name=self.automation_name,
+                node_name=getattr(self.node, "title", None),
+            )
             self.execution_finished.emit(self.node, result)
         except Exception as e:
             self.execution_error.emit(self.node, str(e))
 
 
 def _run_node_code_subprocess(
-    node_code: str, inputs: dict, timeout: int = NODE_TIMEOUT_SECONDS
+    node_code: str,
+    inputs: dict,
+    timeout: int = NODE_TIMEOUT_SECONDS,
+    python_executable: str | None = None,
+    automation_name: str | None = None,
+    node_name: str | None = None,
+    profile: bool = False,
+    trace_memory: bool = False,
 ):
     temp_file = None
+    proc = None
     marker = "___NODEBOX_OUTPUT_MARKER___"
+    stem = profile_stem(node_name) if profile else None
 
     try:
         temp_file = tempfile.NamedTemporaryFile(
@@ -118,7 +163,10 @@ globals().update(_node_inputs)
         )
         temp_file.write(wrapper)
         temp_file.write("\n")
-        temp_file.write(node_code)
+        if profile:
+            temp_file.write(profiled_source(node_code, stem, trace_memory, node_name))
+        else:
+            temp_file.write(node_code)
         temp_file.write("\n\n")
         finalizer = f"""
 # --- End user code ---
@@ -144,25 +192,36 @@ except Exception:
         temp_file.flush()
         temp_file.close()
 
+        start = perf_counter()
+        proc = subprocess.Popen(
+            [python_executable or sys.executable, temp_name],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        register_worker(proc.pid, automation_name, node_name)
+        get_event_bus().publish(WorkerSpawned(proc.pid, automation_name, node_name))
+        sampler = ProcessSampler(proc.pid).start()
         try:
-            proc = subprocess.run(
-                [sys.executable, temp_name],
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-            )
-        except subprocess.TimeoutExpired as te:
+            stdout, stderr = proc.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            stdout, stderr = proc.communicate()
             return {
-                "stdout": te.stdout or "",
-                "stderr": (te.stderr or "")
+                "stdout": stdout or "",
+                "stderr": (stderr or "")
                 + f"\nNode execution timed out after {timeout} seconds.",
                 "outputs": {},
                 "returncode": -1,
                 "error": "timeout",
+                "duration_s": perf_counter() - start,
+                "resources": sampler.stop(),
             }
+        duration_s = perf_counter() - start
+        resources = sampler.stop()
 
-        stdout = proc.stdout or ""
-        stderr = proc.stderr or ""
+        stdout = stdout or ""
+        stderr = stderr or ""
         returncode = proc.returncode
 
         outputs = {}
@@ -184,20 +243,27 @@ except Exception:
                 outputs = parsed.get("outputs", {})
             else:
                 outputs = {}
-            return {
+            result = {
                 "stdout": user_stdout,
                 "stderr": stderr,
                 "outputs": outputs,
                 "returncode": returncode,
+                "duration_s": duration_s,
+                "resources": resources,
             }
         else:
-            return {
+            result = {
                 "stdout": stdout,
                 "stderr": stderr,
                 "outputs": {},
                 "returncode": returncode,
                 "error": "no_outputs_marker",
+                "duration_s": duration_s,
+                "resources": resources,
             }
+        if profile:
+            result["profile"] = collect_profile(stem, node_name)
+        return result
 
     except Exception as e:
         tb = traceback.format_exc()
@@ -211,6 +277,8 @@ except Exception:
         }
 
     finally:
+        if proc is not None:
+            unregister_worker(proc.pid)
         if temp_file is not None:
             try:
                 os.remove(temp_name)
@@ -218,8 +286,50 @@ except Exception:
                 pass
 
 
-def run_node_code(node_code: str, inputs: dict, timeout: int = NODE_TIMEOUT_SECONDS):
-    return _run_node_code_subprocess(node_code, inputs, timeout=timeout)
+def _publish_node_finished(automation_name, node, result, duration_s, ok):
+    """Publish the node's output lines and a ``NodeFinished`` event."""
+    bus = get_event_bus()
+    title = getattr(node, "title", None)
+    for stream in ("stdout", "stderr"):
+        for line in ((result or {}).get(stream) or "").splitlines():
+            if line.strip():
+                bus.publish(LogLine(automation_name, title, stream, line))
+    bus.publish(
+        NodeFinished(
+            automation_name,
+            title,
+            getattr(node, "id", None),
+            duration_s,
+            ok=ok,
+            resources=(result or {}).get("resources"),
+        )
+    )
+
+
+def run_node_code(
+    node_code: str,
+    inputs: dict,
+    timeout: int = NODE_TIMEOUT_SECONDS,
+    python_executable: str | None = None,
+    profile: bool = False,
+    trace_memory: bool = False,
+    node_name: str | None = None,
+):
+    """Run one node's code in a worker process.
+
+    With ``profile`` the code runs under cProfile (plus tracemalloc with
+    ``trace_memory``) and the result has a ``"profile"`` entry, see
+    ``nodebox.core.profiling.collect_profile``.
+    """
+    return _run_node_code_subprocess(
+        node_code,
+        inputs,
+        timeout=timeout,
+        python_executable=python_executable,
+        node_name=node_name,
+        profile=profile,
+        trace_memory=trace_memory,
+    )
 
 
 def execute_all_nodes(
@@ -229,8 +339,19 @@ def execute_all_nodes(
     on_node_executed=None,
     signals: ExecutionSignals | None = None,
     on_log=None,
+    python_executable: str | None = None,
+    root_inputs: dict | None = None,
+    automation_name: str | None = None,
 ):
-    QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+    """Run the graph in dependency order.
+
+    ``root_inputs`` are passed as inputs to nodes without incoming
+    connections, e.g. the files that triggered a run. ``automation_name``
+    labels the node worker processes in the performance monitor.
+    """
+    has_gui = _has_gui()
+    if has_gui:
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
 
     dependents = defaultdict(list)
     incoming_count = defaultdict(int)
@@ -244,6 +365,7 @@ def execute_all_nodes(
             continue
 
     ready_queue = deque([node for node in nodes if incoming_count[node] == 0])
+    root_nodes = set(ready_queue)
     node_outputs = {}
     total_start = perf_counter()
     error_count = 0
@@ -253,7 +375,9 @@ def execute_all_nodes(
         try:
             while ready_queue:
                 node = ready_queue.popleft()
-                exec_env = {}
+                exec_env = (
+                    dict(root_inputs) if root_inputs and node in root_nodes else {}
+                )
                 for conn in connections:
                     try:
                         if conn.end_port.node == node:
@@ -264,9 +388,22 @@ def execute_all_nodes(
                         continue
 
                 node_start = perf_counter()
+                get_event_bus().publish(
+                    NodeStarted(
+                        automation_name,
+                        getattr(node, "title", None),
+                        getattr(node, "id", None),
+                    )
+                )
                 result = None
                 try:
-                    result = _run_node_code_subprocess(node.code, exec_env)
+                    result = _run_node_code_subprocess(
+                        node.code,
+                        exec_env,
+                        python_executable=python_executable,
+                        automation_name=automation_name,
+                        node_name=getattr(node, "title", None),
+                    )
                 except Exception as run_e:
                     tb = traceback.format_exc()
                     result = {
@@ -278,9 +415,11 @@ def execute_all_nodes(
                         "traceback": tb,
                     }
 
+                node_ok = True
                 if result is None:
                     err_text = "No execution result produced"
                     error_count += 1
+                    node_ok = False
                     if on_error:
                         with suppress(Exception):
                             on_error(node=node, error=err_text)
@@ -290,6 +429,7 @@ def execute_all_nodes(
                     if rc != 0 or stderr_text:
                         err_text = stderr_text or result.get("error") or "Unknown error"
                         error_count += 1
+                        node_ok = False
                         if on_error:
                             with suppress(Exception):
                                 on_error(node=node, error=err_text)
@@ -315,11 +455,20 @@ def execute_all_nodes(
                 node_outputs[node] = outputs_collected
                 node.outputs = node_outputs[node]
 
+                resources = result.get("resources") if result else None
+                with suppress(Exception):
+                    node.execution_resources = resources
+
                 executed_count += 1
                 node_duration = perf_counter() - node_start
+                _publish_node_finished(
+                    automation_name, node, result, node_duration, ok=node_ok
+                )
                 if on_node_executed:
                     with suppress(Exception):
-                        on_node_executed(node=node, duration_s=node_duration)
+                        on_node_executed(
+                            node=node, duration_s=node_duration, resources=resources
+                        )
 
                 for dependent in dependents[node]:
                     incoming_count[dependent] -= 1
@@ -336,7 +485,8 @@ def execute_all_nodes(
             }
             return result_summary
         finally:
-            QApplication.restoreOverrideCursor()
+            if has_gui:
+                QApplication.restoreOverrideCursor()
 
     else:
         executing_threads = []
@@ -378,9 +528,19 @@ def execute_all_nodes(
                     pass
 
             node_outputs[node] = result.get("outputs", {})
+            resources = result.get("resources")
+            with suppress(Exception):
+                node.execution_resources = resources
             executed_count += 1
             if rc != 0 or stderr_text.strip():
                 error_count += 1
+            _publish_node_finished(
+                automation_name,
+                node,
+                result,
+                result.get("duration_s", 0.0),
+                ok=rc == 0 and not stderr_text.strip(),
+            )
 
             if on_log:
                 try:
@@ -395,7 +555,11 @@ def execute_all_nodes(
 
             if on_node_executed:
                 with suppress(Exception):
-                    on_node_executed(node=node, duration_s=0.0)
+                    on_node_executed(
+                        node=node,
+                        duration_s=result.get("duration_s", 0.0),
+                        resources=resources,
+                    )
 
             completed_nodes.add(node)
             for dependent in dependents[node]:
@@ -410,6 +574,9 @@ def execute_all_nodes(
             nonlocal error_count, executed_count
             error_count += 1
             executed_count += 1
+            _publish_node_finished(
+                automation_name, node, {"stderr": error_message}, None, ok=False
+            )
             if on_error:
                 with suppress(Exception):
                     on_error(node=node, error=error_message)
@@ -422,6 +589,13 @@ def execute_all_nodes(
                 all_done_event.set()
 
         def start_node_execution(node):
+            get_event_bus().publish(
+                NodeStarted(
+                    automation_name,
+                    getattr(node, "title", None),
+                    getattr(node, "id", None),
+                )
+            )
             ExecutionStatus = _get_execution_status_class()
             try:
                 if hasattr(node, "set_execution_status") and ExecutionStatus:
@@ -429,7 +603,7 @@ def execute_all_nodes(
             except Exception:
                 pass
 
-            local_vars = {}
+            local_vars = dict(root_inputs) if root_inputs and node in root_nodes else {}
             for conn in connections:
                 try:
                     if conn.end_port.node == node:
@@ -439,7 +613,13 @@ def execute_all_nodes(
                 except Exception:
                     continue
 
-            worker = NodeExecutionWorker(node, node.code, local_vars)
+            worker = NodeExecutionWorker(
+                node,
+                node.code,
+                local_vars,
+                python_executable=python_executable,
+                automation_name=automation_name,
+            )
             worker.execution_finished.connect(on_node_execution_finished)
             worker.execution_error.connect(on_node_execution_error)
 
@@ -463,7 +643,8 @@ def execute_all_nodes(
                 "total_duration_s": total_duration,
                 "total_nodes": len(list(nodes)),
             }
-            QApplication.restoreOverrideCursor()
+            if has_gui:
+                QApplication.restoreOverrideCursor()
             try:
                 signals.execution_completed.emit(result)
             except Exception:
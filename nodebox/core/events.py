@@ -0,0 +1,328 @@
+"""
+Typed performance events and a batched, thread-safe bus.
+
+Producers on any thread call ``publish(event)``; that only appends to a
+bounded queue and never touches Qt, so node workers, the engine and the
+scheduler daemon can publish freely. A dispatcher thread drains the queue
+every ``interval`` seconds and hands each subscriber one list with the
+events it asked for, so a burst of node events costs one delivery per
+subscriber rather than one per event.
+
+Subscribers choose where they run: ``on_gui_thread=True`` delivers
+through a queued Qt signal to the thread that subscribed (the GUI), the
+default delivers on the dispatcher thread and suits thread-safe sinks
+such as the metrics registry.
+"""
+
+import threading
+import time
+from collections import deque
+
+DEFAULT_BATCH_INTERVAL_S = 0.1
+# Oldest events are dropped beyond this many undelivered ones.
+MAX_PENDING_EVENTS = 50_000
+
+
+class Event:
+    __slots__ = ("timestamp",)
+
+    def __init__(self):
+        self.timestamp = time.time()
+
+    def __repr__(self):
+        fields = ", ".join(
+            f"{name}={getattr(self, name)!r}"
+            for name in self.__slots__
+            if name != "timestamp"
+        )
+        return f"{type(self).__name__}({fields})"
+
+
+class RunStarted(Event):
+    __slots__ = ("automation", "source", "schedule")
+
+    def __init__(self, automation, source, schedule=None):
+        super().__init__()
+        self.automation = automation
+        self.source = source
+        self.schedule = schedule
+
+
+class RunFinished(Event):
+    """``status`` is "ok", "failed" or "error" as in the run history."""
+
+    __slots__ = (
+        "automation",
+        "source",
+        "status",
+        "duration_s",
+        "schedule",
+        "error_count",
+        "lateness_s",
+        "queue_wait_s",
+    )
+
+    def __init__(
+        self,
+        automation,
+        source,
+        status,
+        duration_s,
+        schedule=None,
+        error_count=0,
+        lateness_s=None,
+        queue_wait_s=None,
+    ):
+        super().__init__()
+        self.automation = automation
+        self.source = source
+        self.status = status
+        self.duration_s = duration_s
+        self.schedule = schedule
+        self.error_count = error_count
+        self.lateness_s = lateness_s
+        self.queue_wait_s = queue_wait_s
+
+    @classmethod
+    def from_record(cls, record):
+        """Build from a ``run_and_record`` record."""
+        return cls(
+            record.get("automation"),
+            record.get("source"),
+            record.get("status"),
+            record.get("duration_s"),
+            schedule=record.get("schedule"),
+            error_count=record.get("error_count") or 0,
+            lateness_s=record.get("lateness_s"),
+            queue_wait_s=record.get("queue_wait_s"),
+        )
+
+
+class NodeStarted(Event):
+    __slots__ = ("automation", "node", "node_id")
+
+    def __init__(self, automation, node, node_id=None):
+        super().__init__()
+        self.automation = automation
+        self.node = node
+        self.node_id = node_id
+
+
+class NodeFinished(Event):
+    """``resources`` is the ``ProcessSampler`` summary of the worker, if any."""
+
+    __slots__ = ("automation", "node", "node_id", "duration_s", "ok", "resources")
+
+    def __init__(self, automation, node, node_id, duration_s, ok=True, resources=None):
+        super().__init__()
+        self.automation = automation
+        self.node = node
+        self.node_id = node_id
+        self.duration_s = duration_s
+        self.ok = ok
+        self.resources = resources
+
+
+class WorkerSpawned(Event):
+    __slots__ = ("pid", "automation", "node")
+
+    def __init__(self, pid, automation=None, node=None):
+        super().__init__()
+        self.pid = pid
+        self.automation = automation
+        self.node = node
+
+
+class CacheHit(Event):
+    """A cache lookup; ``hit`` is False for a miss."""
+
+    __slots__ = ("cache", "hit")
+
+    def __init__(self, cache, hit=True):
+        super().__init__()
+        self.cache = cache
+        self.hit = hit
+
+
+class LogLine(Event):
+    __slots__ = ("automation", "node", "stream", "text")
+
+    def __init__(self, automation, node, stream, text):
+        super().__init__()
+        self.automation = automation
+        self.node = node
+        self.stream = stream
+        self.text = text
+
+
+class NodeRegression(Event):
+    """A node ran much slower than its baseline (see ``node_stats``)."""
+
+    __slots__ = (
+        "automation",
+        "node",
+        "node_id",
+        "duration_s",
+        "baseline_s",
+        "p95_s",
+        "samples",
+    )
+
+    def __init__(
+        self, automation, node, node_id, duration_s, baseline_s, p95_s, samples
+    ):
+        super().__init__()
+        self.automation = automation
+        self.node = node
+        self.node_id = node_id
+        self.duration_s = duration_s
+        self.baseline_s = baseline_s
+        self.p95_s = p95_s
+        self.samples = samples
+
+    @property
+    def ratio(self):
+        return self.duration_s / self.baseline_s if self.baseline_s else None
+
+    @property
+    def message(self):
+        return (
+            f"Node '{self.node}' took {self.duration_s:.2f}s, "
+            f"{self.ratio:.1f}x its median of {self.baseline_s:.2f}s "
+            f"(p95 {self.p95_s:.2f}s over {self.samples} runs)"
+        )
+
+
+class _Subscription:
+    __slots__ = ("callback", "types", "relay")
+
+    def __init__(self, callback, types, relay):
+        self.callback = callback
+        self.types = types
+        self.relay = relay
+
+
+def _gui_relay():
+    """QObject living on the calling thread that runs batches it is sent."""
+    from PyQt6.QtCore import QObject, pyqtSignal
+
+    class _Relay(QObject):
+        deliver = pyqtSignal(object, object)
+
+        def __init__(self):
+            super().__init__()
+            self.deliver.connect(self._run)
+
+        def _run(self, callback, batch):
+            try:
+                callback(batch)
+            except Exception as e:
+                print(f"[EventBus] Subscriber failed: {e}")
+
+    return _Relay()
+
+
+class EventBus:
+    def __init__(
+        self, interval=DEFAULT_BATCH_INTERVAL_S, max_pending=MAX_PENDING_EVENTS
+    ):
+        self.interval = interval
+        self._pending = deque(maxlen=max_pending)
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._relay = None
+
+    def publish(self, event):
+        """Queue ``event`` for delivery; safe from any thread."""
+        if self._subscribers:
+            self._pending.append(event)
+
+    def subscribe(self, callback, types=None, on_gui_thread=False):
+        """Call ``callback(events)`` with batches of the given event types.
+
+        Returns a token for ``unsubscribe``.
+        """
+        relay = None
+        if on_gui_thread:
+            with self._lock:
+                if self._relay is None:
+                    self._relay = _gui_relay()
+                relay = self._relay
+        subscription = _Subscription(callback, tuple(types) if types else None, relay)
+        with self._lock:
+            self._subscribers = [*self._subscribers, subscription]
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="nodebox-events", daemon=True
+                )
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, token):
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not token]
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self):
+        """Deliver everything queued so far; also called on shutdown."""
+        pending = self._pending
+        batch = []
+        while pending:
+            try:
+                batch.append(pending.popleft())
+            except IndexError:
+                break
+        if not batch:
+            return
+        for subscription in self._subscribers:
+            if subscription.types is None:
+                events = batch
+            else:
+                events = [e for e in batch if isinstance(e, subscription.types)]
+            if not events:
+                continue
+            if subscription.relay is not None:
+                subscription.relay.deliver.emit(subscription.callback, events)
+                continue
+            try:
+                subscription.callback(events)
+            except Exception as e:
+                print(f"[EventBus] Subscriber failed: {e}")
+
+
+_event_bus = None
+_event_bus_lock = threading.Lock()
+
+
+def get_event_bus() -> EventBus:
+    global _event_bus
+    if _event_bus is None:
+        with _event_bus_lock:
+            if _event_bus is None:
+                _event_bus = EventBus()
+    return _event_bus
+
+
+def publish(event):
+    get_event_bus().publish(event)
+
+
+__all__ = [
+    "CacheHit",
+    "Event",
+    "EventBus",
+    "LogLine",
+    "NodeFinished",
+    "NodeRegression",
+    "NodeStarted",
+    "RunFinished",
+    "RunStarted",
+    "WorkerSpawned",
+    "get_event_bus",
+    "publish",
+]
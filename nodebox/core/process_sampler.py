@@ -0,0 +1,331 @@
+"""
+Resource accounting for node worker processes.
+
+``ProcessSampler`` follows one node worker for the resource summary of its
+run. ``ProcessTreeSampler`` periodically samples the NodeBox process, its
+children (node workers, environment builds) and any Ollama server for the
+performance monitor; node workers are labelled with the automation and
+node they run through the registry kept by ``register_worker``.
+"""
+
+import os
+import threading
+import time
+from contextlib import suppress
+
+try:
+    import psutil
+
+    _PSUTIL_AVAILABLE = True
+except Exception:
+    psutil = None
+    _PSUTIL_AVAILABLE = False
+
+SAMPLE_INTERVAL_SECONDS = 0.05
+TREE_SAMPLE_INTERVAL_SECONDS = 2.0
+# Ollama servers are looked up among all processes only every this many
+# tree samples; known ones are sampled every time.
+OLLAMA_SCAN_EVERY = 5
+# Disk usage changes slowly and statvfs can be slow on network mounts.
+DISK_SCAN_EVERY = 5
+
+# pid -> {"automation": ..., "node": ...} for live node workers
+_workers = {}
+_workers_lock = threading.Lock()
+
+
+def register_worker(pid, automation=None, node=None):
+    """Label a node worker process until ``unregister_worker`` is called."""
+    with _workers_lock:
+        _workers[pid] = {"automation": automation, "node": node}
+
+
+def unregister_worker(pid):
+    with _workers_lock:
+        _workers.pop(pid, None)
+
+
+def live_workers():
+    with _workers_lock:
+        return dict(_workers)
+
+
+class ProcessSampler:
+    """Samples a child process on a background thread while it runs.
+
+    Peak RSS and thread count are maxima over all samples; CPU seconds and
+    I/O bytes are cumulative counters, so the last successful sample wins.
+    """
+
+    def __init__(self, pid, interval=SAMPLE_INTERVAL_SECONDS):
+        self.pid = pid
+        self.interval = interval
+        self.samples = 0
+        self.peak_rss_bytes = 0
+        self.cpu_seconds = 0.0
+        self.read_bytes = 0
+        self.write_bytes = 0
+        self.peak_threads = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._process = None
+
+    def start(self):
+        if not _PSUTIL_AVAILABLE:
+            return self
+        try:
+            self._process = psutil.Process(self.pid)
+        except Exception:
+            return self
+        self._sample()
+        self._thread = threading.Thread(
+            target=self._run, name=f"nodebox-sampler-{self.pid}", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            if not self._sample():
+                break
+
+    def _sample(self):
+        proc = self._process
+        try:
+            with proc.oneshot():
+                rss = proc.memory_info().rss
+                cpu = proc.cpu_times()
+                threads = proc.num_threads()
+                try:
+                    io = proc.io_counters()
+                except (AttributeError, psutil.AccessDenied):
+                    io = None
+        except Exception:
+            return False
+
+        self.samples += 1
+        self.peak_rss_bytes = max(self.peak_rss_bytes, rss)
+        self.cpu_seconds = max(self.cpu_seconds, cpu.user + cpu.system)
+        self.peak_threads = max(self.peak_threads, threads)
+        if io is not None:
+            self.read_bytes = max(self.read_bytes, io.read_bytes)
+            self.write_bytes = max(self.write_bytes, io.write_bytes)
+        return True
+
+    def stop(self):
+        """Stop sampling and return the collected statistics."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        return self.stats()
+
+    def stats(self):
+        return {
+            "pid": self.pid,
+            "samples": self.samples,
+            "peak_rss_bytes": self.peak_rss_bytes,
+            "cpu_seconds": round(self.cpu_seconds, 4),
+            "read_bytes": self.read_bytes,
+            "write_bytes": self.write_bytes,
+            "threads": self.peak_threads,
+        }
+
+
+class ProcessTreeSampler:
+    """Samples NodeBox-related processes and the system on a background thread.
+
+    Every ``interval`` seconds ``callback`` is called on the sampler thread
+    with ``{"timestamp", "system": {...}, "processes": [...]}``. Each
+    process entry has ``pid``, ``ppid``, ``kind`` ("gui", "worker",
+    "ollama" or "child"), ``name``, ``automation``, ``node``,
+    ``cpu_percent`` (of one core), ``rss_bytes`` and ``read_bps`` /
+    ``write_bps`` since the previous sample.
+    """
+
+    def __init__(self, callback, interval=TREE_SAMPLE_INTERVAL_SECONDS):
+        self.callback = callback
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+        # pid -> psutil.Process, kept so cpu_percent has a previous sample
+        self._processes = {}
+        # pid -> (monotonic time, read bytes, write bytes)
+        self._io = {}
+        self._ollama_pids = set()
+        self._net = None
+        self._disk_percent = 0.0
+        self._samples = 0
+
+    @staticmethod
+    def is_available():
+        return _PSUTIL_AVAILABLE
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if not _PSUTIL_AVAILABLE or self.running:
+            return self
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="nodebox-process-tree", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1.0)
+            self._thread = None
+
+    def _run(self):
+        # The first cpu_percent call of a process only sets its baseline.
+        self.sample()
+        while not self._stop_event.wait(self.interval):
+            try:
+                snapshot = self.sample()
+            except Exception as e:
+                print(f"[ProcessTreeSampler] Sampling failed: {e}")
+                continue
+            try:
+                self.callback(snapshot)
+            except Exception:
+                pass
+
+    # -- sampling ----------------------------------------------------------
+
+    def _process(self, pid):
+        proc = self._processes.get(pid)
+        if proc is None:
+            proc = psutil.Process(pid)
+            self._processes[pid] = proc
+        return proc
+
+    def _find_ollama(self):
+        pids = set()
+        for proc in psutil.process_iter(["name"]):
+            name = (proc.info.get("name") or "").lower()
+            if name.startswith("ollama"):
+                pids.add(proc.pid)
+        self._ollama_pids = pids
+
+    def _candidates(self):
+        """``pid -> kind`` of the processes to sample this round."""
+        me = self._process(os.getpid())
+        candidates = {me.pid: "gui"}
+        workers = live_workers()
+        try:
+            children = me.children(recursive=True)
+        except psutil.Error:
+            children = []
+        for child in children:
+            candidates[child.pid] = "worker" if child.pid in workers else "child"
+        for pid in workers:
+            candidates.setdefault(pid, "worker")
+        if self._samples % OLLAMA_SCAN_EVERY == 0:
+            self._find_ollama()
+        for pid in self._ollama_pids:
+            candidates[pid] = "ollama"
+        return candidates, workers
+
+    def _sample_process(self, pid, kind, labels, now):
+        proc = self._process(pid)
+        with proc.oneshot():
+            name = proc.name()
+            ppid = proc.ppid()
+            cpu = proc.cpu_percent(None)
+            rss = proc.memory_info().rss
+            try:
+                io = proc.io_counters()
+            except (AttributeError, psutil.AccessDenied):
+                io = None
+
+        read_bps = write_bps = None
+        if io is not None:
+            previous = self._io.get(pid)
+            self._io[pid] = (now, io.read_bytes, io.write_bytes)
+            if previous is not None and now > previous[0]:
+                elapsed = now - previous[0]
+                read_bps = max(0, io.read_bytes - previous[1]) / elapsed
+                write_bps = max(0, io.write_bytes - previous[2]) / elapsed
+
+        label = labels.get(pid) or {}
+        return {
+            "pid": pid,
+            "ppid": ppid,
+            "kind": kind,
+            "name": name,
+            "automation": label.get("automation"),
+            "node": label.get("node"),
+            "cpu_percent": cpu,
+            "rss_bytes": rss,
+            "read_bps": read_bps,
+            "write_bps": write_bps,
+        }
+
+    def _sample_system(self, now):
+        system = {
+            "cpu_percent": psutil.cpu_percent(interval=None),
+            "memory_percent": psutil.virtual_memory().percent,
+        }
+        if self._samples % DISK_SCAN_EVERY == 0:
+            with suppress(OSError, psutil.Error):
+                disk = psutil.disk_usage("/")
+                self._disk_percent = disk.used / disk.total * 100
+        system["disk_percent"] = self._disk_percent
+
+        net = psutil.net_io_counters()
+        if self._net is not None and net is not None:
+            system["network_sent"] = net.bytes_sent - self._net.bytes_sent
+            system["network_recv"] = net.bytes_recv - self._net.bytes_recv
+        else:
+            system["network_sent"] = system["network_recv"] = 0
+        self._net = net
+        return system
+
+    def sample(self):
+        """Take one snapshot now; also usable without the thread."""
+        now = time.monotonic()
+        candidates, labels = self._candidates()
+        processes = []
+        for pid, kind in candidates.items():
+            try:
+                processes.append(self._sample_process(pid, kind, labels, now))
+            except psutil.Error:
+                self._processes.pop(pid, None)
+                self._io.pop(pid, None)
+                self._ollama_pids.discard(pid)
+
+        for pid in set(self._processes) - set(candidates):
+            del self._processes[pid]
+            self._io.pop(pid, None)
+
+        snapshot = {
+            "timestamp": time.time(),
+            "system": self._sample_system(now),
+            "processes": processes,
+        }
+        self._samples += 1
+        return snapshot
+
+
+def format_bytes(num_bytes):
+    value = float(num_bytes or 0)
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024 or unit == "GB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB"
+
+
+__all__ = [
+    "ProcessSampler",
+    "ProcessTreeSampler",
+    "SAMPLE_INTERVAL_SECONDS",
+    "format_bytes",
+    "live_workers",
+    "register_worker",
+    "unregister_worker",
+]
@@ -0,0 +1,298 @@
+"""
+Profile run mode for node code.
+
+With ``run_node_code(..., profile=True)`` the worker runs the user code
+under ``cProfile`` (and, with ``trace_memory=True``, ``tracemalloc``)
+and writes a JSON report next to the full ``.pstats`` file under
+``PROFILES_DIR``. The report is plain JSON rather than a pickled or
+marshalled ``pstats`` dump because the node may run in a virtual
+environment with a different Python version than the GUI.
+
+``collect_profile`` turns the report into the top functions by
+cumulative time and the top allocation sites, and writes a speedscope
+file (https://www.speedscope.app) for a flame graph. cProfile only
+records caller/callee totals, so the flame graph spreads each function's
+time over its callers in proportion to their share; it is exact for
+call trees without shared callees and an approximation otherwise.
+"""
+
+import json
+import os
+import re
+from contextlib import suppress
+from datetime import datetime
+
+from nodebox.core.paths import LOGS_DIR
+from nodebox.core.process_sampler import format_bytes
+
+PROFILES_DIR = LOGS_DIR / "profiles"
+PROFILE_TOP_FUNCTIONS = 25
+PROFILE_TOP_ALLOCATIONS = 15
+# Frames kept per allocation; one groups allocations by source line.
+TRACEMALLOC_FRAMES = 1
+# Flame graph spans shorter than this fraction of the run are dropped.
+_MIN_SPAN_FRACTION = 1e-4
+_MAX_DEPTH = 128
+
+# Runs in the node's interpreter, so stdlib only.
+_CHILD_HELPERS = """
+import cProfile as _nb_cprofile
+import pstats as _nb_pstats
+import tracemalloc as _nb_tracemalloc
+
+
+def _nb_write_profile(profiler, report_path, pstats_path, trace_memory, top_allocations):
+    report = {}
+    if trace_memory:
+        snapshot = _nb_tracemalloc.take_snapshot().filter_traces(
+            (
+                _nb_tracemalloc.Filter(False, _nb_tracemalloc.__file__),
+                _nb_tracemalloc.Filter(False, __file__),
+                _nb_tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                _nb_tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            )
+        )
+        report["traced_peak_bytes"] = _nb_tracemalloc.get_traced_memory()[1]
+        _nb_tracemalloc.stop()
+        report["allocations"] = [
+            [stat.traceback[0].filename, stat.traceback[0].lineno, stat.size, stat.count]
+            for stat in snapshot.statistics("lineno")[:top_allocations]
+        ]
+    profiler.dump_stats(pstats_path)
+    report["functions"] = [
+        [
+            list(func),
+            cc,
+            nc,
+            tt,
+            ct,
+            [[list(caller), edge[3]] for caller, edge in callers.items()],
+        ]
+        for func, (cc, nc, tt, ct, callers) in _nb_pstats.Stats(profiler).stats.items()
+    ]
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f)
+"""
+
+_CHILD_RUN = """
+_nb_code = compile({code!r}, {filename!r}, "exec")
+if {trace_memory!r}:
+    _nb_tracemalloc.start({frames!r})
+_nb_profiler = _nb_cprofile.Profile()
+_nb_profiler.enable()
+try:
+    exec(_nb_code, globals())
+finally:
+    _nb_profiler.disable()
+    _nb_write_profile(
+        _nb_profiler, {report_path!r}, {pstats_path!r}, {trace_memory!r}, {top!r}
+    )
+"""
+
+
+def profile_stem(node_name=None):
+    """Base path (without suffix) for one profiling run's files."""
+    PROFILES_DIR.mkdir(parents=True, exist_ok=True)
+    safe = re.sub(r"[^\w.-]+", "_", node_name or "node").strip("_") or "node"
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    return PROFILES_DIR / f"{safe}_{stamp}"
+
+
+def profiled_source(node_code, stem, trace_memory=False, node_name=None):
+    """Script text that runs ``node_code`` under the profiler."""
+    return _CHILD_HELPERS + _CHILD_RUN.format(
+        code=node_code,
+        filename=f"<node {node_name}>" if node_name else "<node>",
+        trace_memory=bool(trace_memory),
+        frames=TRACEMALLOC_FRAMES,
+        report_path=f"{stem}.report.json",
+        pstats_path=f"{stem}.pstats",
+        top=PROFILE_TOP_ALLOCATIONS,
+    )
+
+
+def _label(func):
+    filename, line, name = func
+    if filename == "~" and line == 0:
+        return name
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+def _is_profiler(func):
+    return func[2] == "<method 'disable' of '_lsprof.Profiler' objects>"
+
+
+def collect_profile(stem, node_name=None):
+    """Read the worker's report; returns the profile dict or None.
+
+    ``{"pstats_path", "speedscope_path", "total_s", "functions": [...],
+    "allocations": [...], "traced_peak_bytes"}``; there is no report when
+    the worker was killed before the user code finished.
+    """
+    report_path = f"{stem}.report.json"
+    try:
+        with open(report_path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return None
+    finally:
+        with suppress(OSError):
+            os.remove(report_path)
+
+    functions = {}
+    for func, cc, nc, tt, ct, callers in report.get("functions", []):
+        func = tuple(func)
+        if _is_profiler(func):
+            continue
+        functions[func] = (cc, nc, tt, ct, {tuple(c): edge for c, edge in callers})
+
+    top = sorted(functions.items(), key=lambda item: item[1][3], reverse=True)
+    profile = {
+        "pstats_path": f"{stem}.pstats",
+        "speedscope_path": None,
+        "total_s": sum(stats[2] for stats in functions.values()),
+        "functions": [
+            {
+                "function": _label(func),
+                "calls": nc,
+                "primitive_calls": cc,
+                "total_s": tt,
+                "cumulative_s": ct,
+            }
+            for func, (cc, nc, tt, ct, _callers) in top[:PROFILE_TOP_FUNCTIONS]
+        ],
+        "allocations": [
+            {
+                "site": f"{os.path.basename(file)}:{line}",
+                "size_bytes": size,
+                "count": count,
+            }
+            for file, line, size, count in report.get("allocations", [])
+        ],
+        "traced_peak_bytes": report.get("traced_peak_bytes"),
+    }
+    speedscope_path = f"{stem}.speedscope.json"
+    try:
+        write_speedscope(functions, speedscope_path, node_name or "node")
+    except OSError as e:
+        print(f"[Profiler] Could not write {speedscope_path}: {e}")
+    else:
+        profile["speedscope_path"] = speedscope_path
+    return profile
+
+
+def write_speedscope(functions, path, name):
+    """Write an evented speedscope profile built from cProfile call edges."""
+    callees = {}
+    for func, (_cc, _nc, _tt, _ct, callers) in functions.items():
+        for caller, edge_ct in callers.items():
+            if caller != func and caller in functions:
+                callees.setdefault(caller, []).append((func, edge_ct))
+    roots = [
+        func
+        for func, (_cc, _nc, _tt, _ct, callers) in functions.items()
+        if not any(c in functions and c != func for c in callers)
+    ]
+    roots.sort(key=lambda func: functions[func][3], reverse=True)
+    total = sum(functions[func][3] for func in roots)
+
+    frames, frame_index, events = [], {}, []
+    min_span = total * _MIN_SPAN_FRACTION
+
+    def frame(func):
+        if func not in frame_index:
+            frame_index[func] = len(frames)
+            filename, line, fname = func
+            entry = {"name": fname}
+            if not (filename == "~" and line == 0):
+                entry.update(file=filename, line=line)
+            frames.append(entry)
+        return frame_index[func]
+
+    def emit(func, start, duration, stack):
+        index = frame(func)
+        events.append({"type": "O", "frame": index, "at": start})
+        children = sorted(callees.get(func, ()), key=lambda c: c[1], reverse=True)
+        own_ct = functions[func][3]
+        child_ct = sum(ct for _, ct in children)
+        scale = duration / max(own_ct, child_ct) if own_ct or child_ct else 0.0
+        at = start
+        if len(stack) < _MAX_DEPTH:
+            for child, edge_ct in children:
+                span = min(edge_ct * scale, start + duration - at)
+                if child in stack or span < min_span:
+                    continue
+                emit(child, at, span, stack | {child})
+                at += span
+        events.append({"type": "C", "frame": index, "at": start + duration})
+
+    at = 0.0
+    for root in roots:
+        duration = functions[root][3]
+        if duration >= min_span:
+            emit(root, at, duration, frozenset((root,)))
+            at += duration
+
+    data = {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "nodebox",
+        "activeProfileIndex": 0,
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "evented",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0.0,
+                "endValue": at,
+                "events": events,
+            }
+        ],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def format_profile(profile, functions=15, allocations=10):
+    """Plain-text summary for a console."""
+    lines = [
+        "",
+        "── Profile ──",
+        f"{'cumulative':>10} {'own':>9} {'calls':>8}  function",
+    ]
+    for entry in profile["functions"][:functions]:
+        calls = str(entry["calls"])
+        if entry["primitive_calls"] != entry["calls"]:
+            calls = f"{entry['calls']}/{entry['primitive_calls']}"
+        lines.append(
+            f"{entry['cumulative_s']:>9.4f}s {entry['total_s']:>8.4f}s {calls:>8}  "
+            f"{entry['function']}"
+        )
+    if profile.get("allocations"):
+        lines.append("")
+        peak = profile.get("traced_peak_bytes")
+        lines.append(
+            "── Allocations ──"
+            + (f" (peak traced {format_bytes(peak)})" if peak else "")
+        )
+        for entry in profile["allocations"][:allocations]:
+            lines.append(
+                f"{format_bytes(entry['size_bytes']):>10} {entry['count']:>8} blocks  "
+                f"{entry['site']}"
+            )
+    lines.append("")
+    lines.append(f"Full profile: {profile['pstats_path']}")
+    if profile.get("speedscope_path"):
+        lines.append(f"Flame graph (speedscope): {profile['speedscope_path']}")
+    return "\n".join(lines)
+
+
+__all__ = [
+    "PROFILES_DIR",
+    "collect_profile",
+    "format_profile",
+    "profile_stem",
+    "profiled_source",
+    "write_speedscope",
+]
@@ -0,0 +1,41 @@
+"""
+User settings stored in ``CONFIG_FILE``.
+"""
+
+import json
+
+from nodebox.core.atomic import atomic_write_json
+from nodebox.core.paths import CONFIG_FILE
+
+DEFAULT_SETTINGS = {
+    # "json" keeps one file per automation, "sqlite" uses the row-level store.
+    "storage_backend": "json",
+    # Automations the background scheduler runs at the same time.
+    "scheduler_max_workers": 2,
+    # Serve metrics for Prometheus on 127.0.0.1:<port>/metrics.
+    "metrics_server_enabled": False,
+    "metrics_server_port": 9464,
+}
+
+
+def load_settings():
+    settings = dict(DEFAULT_SETTINGS)
+    try:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            settings.update(data)
+    except (OSError, json.JSONDecodeError):
+        pass
+    return settings
+
+
+def get_setting(key, default=None):
+    return load_settings().get(key, default)
+
+
+def save_settings(settings):
+    atomic_write_json(CONFIG_FILE, settings, indent=4)
+
+
+__all__ = ["DEFAULT_SETTINGS", "load_settings", "get_setting", "save_settings"]
@@ -0,0 +1,270 @@
+"""
+Fixed-size, multi-resolution metric history in a memory-mapped file.
+
+A ``TimeSeriesStore`` keeps a set of named metrics in round-robin tiers,
+e.g. 2 s resolution for an hour, 1 min for a day and 10 min for 30 days.
+Every sample is folded into each tier: a slot covers ``step`` seconds and
+holds the mean of the samples that fell into it, so coarser tiers are
+downsampled as they are written and no consolidation pass is needed.
+
+Each tier is three typed arrays laid out back to back in the file::
+
+    epochs  int64[slots]              timestamp // step of the slot, 0 = empty
+    counts  uint32[slots]             samples averaged into the slot
+    values  float32[slots * metrics]  row-major, one row per slot
+
+The arrays are ``memoryview`` casts over the mapping, so writes go
+straight to the page cache; the file size, and with it memory use, is
+fixed by the tier layout. A file written with a different layout (other
+metrics or tiers) is replaced.
+"""
+
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+# (step seconds, slots): 2 s for 1 h, 1 min for 1 day, 10 min for 30 days
+DEFAULT_TIERS = ((2, 1800), (60, 1440), (600, 4320))
+
+_MAGIC = b"NBTSDB\x00\x01"
+_VERSION = 1
+_HEADER = struct.Struct("<8sHHI")
+_TIER = struct.Struct("<II")
+_NAME_BYTES = 32
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+class _Tier:
+    __slots__ = ("step", "slots", "epochs", "counts", "values")
+
+    def __init__(self, step, slots):
+        self.step = step
+        self.slots = slots
+        self.epochs = None
+        self.counts = None
+        self.values = None
+
+    @property
+    def span(self):
+        return self.step * self.slots
+
+
+class TimeSeriesStore:
+    """Round-robin tiers of float32 metrics, optionally backed by a file.
+
+    With ``path=None`` (or when the file cannot be mapped) the same
+    layout lives in anonymous memory and is lost on exit.
+    """
+
+    def __init__(self, path, metrics, tiers=DEFAULT_TIERS):
+        if not metrics:
+            raise ValueError("TimeSeriesStore needs at least one metric")
+        self.path = path
+        self.metrics = tuple(metrics)
+        self._index = {name: i for i, name in enumerate(self.metrics)}
+        self.tiers = [_Tier(step, slots) for step, slots in tiers]
+        self._lock = threading.Lock()
+        self._file = None
+        self._mmap = None
+        self._views = []
+        self._layout = self._compute_layout()
+        self.persistent = self._open()
+
+    # -- file layout -----------------------------------------------------------
+
+    def _header_bytes(self):
+        data = bytearray(
+            _HEADER.pack(_MAGIC, _VERSION, len(self.metrics), len(self.tiers))
+        )
+        for name in self.metrics:
+            data += name.encode("utf-8")[:_NAME_BYTES].ljust(_NAME_BYTES, b"\0")
+        for tier in self.tiers:
+            data += _TIER.pack(tier.step, tier.slots)
+        return bytes(data)
+
+    def _compute_layout(self):
+        """Offsets of every tier's arrays and the total file size."""
+        offset = _align(len(self._header_bytes()))
+        layout = []
+        for tier in self.tiers:
+            epochs = offset
+            counts = _align(epochs + 8 * tier.slots)
+            values = _align(counts + 4 * tier.slots)
+            offset = _align(values + 4 * tier.slots * len(self.metrics))
+            layout.append((epochs, counts, values))
+        return layout, offset
+
+    def _open(self):
+        header = self._header_bytes()
+        _, size = self._layout
+        if self.path is not None:
+            try:
+                self._file = self._open_file(header, size)
+                self._mmap = mmap.mmap(self._file.fileno(), size)
+            except (OSError, ValueError) as e:
+                print(f"[TimeSeries] Keeping history in memory only: {e}")
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+        if self._mmap is None:
+            self._mmap = mmap.mmap(-1, size)
+            self._mmap[: len(header)] = header
+        self._map_views()
+        return self._file is not None
+
+    def _open_file(self, header, size):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        try:
+            f = open(self.path, "r+b")
+        except FileNotFoundError:
+            f = open(self.path, "w+b")
+        try:
+            existing = f.read(len(header))
+            f.seek(0, os.SEEK_END)
+            if existing != header or f.tell() != size:
+                # New file, or one written for other metrics/tiers.
+                f.seek(0)
+                f.truncate(0)
+                f.write(header)
+                f.truncate(size)
+                f.flush()
+        except OSError:
+            f.close()
+            raise
+        return f
+
+    def _map_views(self):
+        view = memoryview(self._mmap)
+        self._views.append(view)
+        n_metrics = len(self.metrics)
+        for tier, (epochs, counts, values) in zip(self.tiers, self._layout[0]):
+            tier.epochs = view[epochs : epochs + 8 * tier.slots].cast("q")
+            tier.counts = view[counts : counts + 4 * tier.slots].cast("I")
+            tier.values = view[values : values + 4 * tier.slots * n_metrics].cast("f")
+            self._views.extend((tier.epochs, tier.counts, tier.values))
+
+    def close(self):
+        with self._lock:
+            if self._mmap is None:
+                return
+            if self._file is not None:
+                self._mmap.flush()
+            for view in reversed(self._views):
+                view.release()
+            self._views.clear()
+            self._mmap.close()
+            self._mmap = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None and self._mmap is not None:
+                self._mmap.flush()
+
+    # -- writing ---------------------------------------------------------------
+
+    def append(self, values, timestamp=None):
+        """Fold one sample (``{metric: number}``) into every tier.
+
+        Metrics missing from ``values`` are stored as NaN for the slot.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        row = [float(values.get(name, math.nan)) for name in self.metrics]
+        n_metrics = len(row)
+        with self._lock:
+            for tier in self.tiers:
+                epoch = int(timestamp // tier.step)
+                slot = epoch % tier.slots
+                base = slot * n_metrics
+                if tier.epochs[slot] != epoch:
+                    tier.epochs[slot] = epoch
+                    tier.counts[slot] = 0
+                count = tier.counts[slot] + 1
+                tier.counts[slot] = count
+                if count == 1:
+                    for j, value in enumerate(row):
+                        tier.values[base + j] = value
+                else:
+                    for j, value in enumerate(row):
+                        mean = tier.values[base + j]
+                        tier.values[base + j] = mean + (value - mean) / count
+
+    def clear(self):
+        with self._lock:
+            for tier in self.tiers:
+                for slot in range(tier.slots):
+                    tier.epochs[slot] = 0
+                    tier.counts[slot] = 0
+
+    # -- reading ---------------------------------------------------------------
+
+    def tier_for(self, seconds):
+        """The finest tier that still covers the last ``seconds``."""
+        for tier in self.tiers:
+            if tier.span >= seconds:
+                return tier
+        return self.tiers[-1]
+
+    def query(self, start, end=None, max_points=None, tier=None):
+        """Points between ``start`` and ``end`` (epoch seconds), oldest first.
+
+        Returns ``[(timestamp, (value, ...)), ...]`` with values in the
+        order of ``self.metrics``. The tier is picked from the range unless
+        given; with ``max_points`` neighbouring slots are averaged down.
+        """
+        end = time.time() if end is None else end
+        tier = tier or self.tier_for(end - start)
+        n_metrics = len(self.metrics)
+        last = int(end // tier.step)
+        first = max(int(start // tier.step), last - tier.slots + 1)
+        points = []
+        with self._lock:
+            for epoch in range(first, last + 1):
+                slot = epoch % tier.slots
+                if tier.epochs[slot] != epoch or not tier.counts[slot]:
+                    continue
+                base = slot * n_metrics
+                points.append(
+                    (epoch * tier.step, tuple(tier.values[base : base + n_metrics]))
+                )
+        if max_points and len(points) > max_points:
+            points = _downsample(points, max_points)
+        return points
+
+    def latest(self, seconds, max_points=None):
+        now = time.time()
+        return self.query(now - seconds, now, max_points=max_points)
+
+    def series(self, metric, start, end=None, max_points=None):
+        """``[(timestamp, value), ...]`` of one metric."""
+        j = self._index[metric]
+        return [
+            (timestamp, values[j])
+            for timestamp, values in self.query(start, end, max_points)
+        ]
+
+
+def _mean(values):
+    finite = [v for v in values if not math.isnan(v)]
+    return math.fsum(finite) / len(finite) if finite else math.nan
+
+
+def _downsample(points, max_points):
+    size = math.ceil(len(points) / max_points)
+    merged = []
+    for i in range(0, len(points), size):
+        chunk = points[i : i + size]
+        columns = zip(*(values for _, values in chunk))
+        merged.append((chunk[0][0], tuple(_mean(column) for column in columns)))
+    return merged
+
+
+__all__ = ["DEFAULT_TIERS", "TimeSeriesStore"]
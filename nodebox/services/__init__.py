@@ -1,6 +1,12 @@
 from nodebox.services.downloader import DownloadWorker
+from nodebox.services.environments import (
+    EnvironmentBuildWorker,
+    collect_environment_garbage,
+    ensure_environment,
+    find_environment,
+)
 from nodebox.services.ollama import OllamaInstaller, check_ollama, download_ollama
-from nodebox.services.scheduler import ScheduleItem
+from nodebox.services.scheduler import ScheduleItem, ScheduleQueue
 from nodebox.services.storage import ExportWorker, ImportWorker
 
 __all__ = [
@@ -8,7 +14,12 @@ __all__ = [
     "check_ollama",
     "download_ollama",
     "DownloadWorker",
+    "EnvironmentBuildWorker",
+    "collect_environment_garbage",
+    "ensure_environment",
+    "find_environment",
     "ScheduleItem",
+    "ScheduleQueue",
     "ExportWorker",
     "ImportWorker",
 ]
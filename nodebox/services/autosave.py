@@ -0,0 +1,150 @@
+"""
+Debounced background autosave for automation files.
+"""
+
+import json
+import threading
+import time
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from nodebox.core.atomic import atomic_write_text
+
+AUTOSAVE_DELAY_MS = 600
+AUTOSAVE_MAX_DELAY_MS = 5000
+
+
+def _write_json(path, data):
+    atomic_write_text(path, json.dumps(data, indent=4))
+
+
+class AutosaveService(QObject):
+    """Coalesces save requests and writes snapshots off the GUI thread.
+
+    ``request_save`` only (re)arms a timer. When the timer fires the
+    ``snapshot`` callable is invoked on the GUI thread to capture plain
+    Python data, which a single writer thread serializes and writes
+    atomically. If the writer is still busy, newer snapshots replace older
+    pending ones so only the latest state hits the disk. A steady stream of
+    edits is still flushed at least every ``max_delay_ms``.
+
+    ``prepare(data)`` runs on the writer thread before each write and returns
+    the data to write, for conversions too slow for the GUI thread.
+    ``write(path, data)`` replaces the default JSON file write and also
+    runs on the writer thread. ``on_written(path, data)`` is called there
+    after each successful write, e.g. to record the snapshot in the history.
+    """
+
+    saved = pyqtSignal(str)
+    error = pyqtSignal(str)
+
+    def __init__(
+        self,
+        path,
+        snapshot,
+        delay_ms=AUTOSAVE_DELAY_MS,
+        max_delay_ms=AUTOSAVE_MAX_DELAY_MS,
+        on_written=None,
+        write=None,
+        prepare=None,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.path = path
+        self._snapshot = snapshot
+        self._delay_ms = delay_ms
+        self._max_delay_ms = max_delay_ms
+        self._on_written = on_written
+        self._write = write or _write_json
+        self._prepare = prepare
+        self._first_request = None
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._capture)
+
+        self._cond = threading.Condition()
+        self._pending = None
+        self._writing = False
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._writer_loop, name="nodebox-autosave", daemon=True
+        )
+        self._thread.start()
+
+    def request_save(self):
+        now = time.monotonic()
+        if self._first_request is None:
+            self._first_request = now
+        elapsed_ms = (now - self._first_request) * 1000
+        if elapsed_ms >= self._max_delay_ms:
+            self._capture()
+            return
+        self._timer.start(int(min(self._delay_ms, self._max_delay_ms - elapsed_ms)))
+
+    def is_dirty(self):
+        return self._first_request is not None
+
+    def _capture(self):
+        self._timer.stop()
+        self._first_request = None
+        try:
+            data = self._snapshot()
+        except Exception as e:
+            self.error.emit(f"Autosave snapshot failed: {e}")
+            return
+        with self._cond:
+            self._pending = (self.path, data)
+            self._cond.notify_all()
+
+    def _writer_loop(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                path, data = self._pending
+                self._pending = None
+                self._writing = True
+            try:
+                if self._prepare is not None:
+                    data = self._prepare(data)
+                self._write(path, data)
+                self.saved.emit(str(path))
+            except Exception as e:
+                self.error.emit(f"Autosave failed for {path}: {e}")
+            else:
+                if self._on_written is not None:
+                    try:
+                        self._on_written(path, data)
+                    except Exception as e:
+                        self.error.emit(f"Post-save hook failed for {path}: {e}")
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
+
+    def flush(self, timeout=10.0):
+        """Write any pending change now and wait until it is on disk."""
+        if self.is_dirty():
+            self._capture()
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending is not None or self._writing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout=10.0):
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout=1.0)
+        return flushed
+
+
+__all__ = ["AutosaveService", "AUTOSAVE_DELAY_MS", "AUTOSAVE_MAX_DELAY_MS"]
@@ -0,0 +1,222 @@
+"""
+Content-addressed storage for large node outputs.
+
+Output values whose JSON encoding exceeds ``BLOB_INLINE_LIMIT`` bytes are
+written once to ``BLOBS_DIR`` under their sha256 and replaced in the
+automation by a small reference::
+
+    {"__blob__": "<sha256>", "size": 123456, "codec": "zlib", "preview": "..."}
+
+References are resolved lazily, only when a value is actually needed (for
+example as the input of a node run from the editor).
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from contextlib import suppress
+from pathlib import Path
+
+from nodebox.core.atomic import atomic_write_bytes
+from nodebox.core.paths import APP_DATA_DIR, AUTOMATIONS_DIR
+
+BLOBS_DIR = APP_DATA_DIR / "blobs"
+BLOB_INLINE_LIMIT = 2048
+BLOB_PREVIEW_CHARS = 120
+BLOB_COMPRESS_MIN = 512
+BLOB_REF_KEY = "__blob__"
+
+# One header byte records how the payload on disk is encoded.
+_RAW = b"\x00"
+_ZLIB = b"\x01"
+
+_DIGEST_RE = re.compile(r'"__blob__":\s*"([0-9a-f]{64})"')
+
+
+class BlobStore:
+    def __init__(self, root=BLOBS_DIR, compress=True):
+        self.root = Path(root)
+        self.compress = compress
+
+    def path(self, digest):
+        return self.root / digest[:2] / digest[2:]
+
+    def exists(self, digest):
+        return self.path(digest).is_file()
+
+    def put(self, data):
+        """Store ``data`` and return ``(digest, codec)``. Existing blobs are reused."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if path.is_file():
+            # Refresh the mtime so garbage collection treats it as recent.
+            with suppress(OSError):
+                os.utime(path)
+            with open(path, "rb") as f:
+                header = f.read(1)
+            return digest, "zlib" if header == _ZLIB else "raw"
+
+        if self.compress and len(data) >= BLOB_COMPRESS_MIN:
+            compressed = zlib.compress(data, 6)
+            if len(compressed) < len(data):
+                atomic_write_bytes(path, _ZLIB + compressed)
+                return digest, "zlib"
+        atomic_write_bytes(path, _RAW + data)
+        return digest, "raw"
+
+    def get(self, digest):
+        with open(self.path(digest), "rb") as f:
+            payload = f.read()
+        header, body = payload[:1], payload[1:]
+        if header == _ZLIB:
+            return zlib.decompress(body)
+        return body
+
+    def digests(self):
+        if not self.root.is_dir():
+            return
+        for bucket in os.scandir(self.root):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if not entry.name.startswith("."):
+                    yield bucket.name + entry.name, entry
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_blob_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = BlobStore()
+        return _store
+
+
+def is_blob_ref(value):
+    return isinstance(value, dict) and BLOB_REF_KEY in value
+
+
+def externalize_value(value, store=None, inline_limit=BLOB_INLINE_LIMIT):
+    """Return ``value`` itself if it is small, otherwise a blob reference."""
+    if value is None or isinstance(value, (bool, int, float)) or is_blob_ref(value):
+        return value
+    encoded = json.dumps(value, default=str)
+    if len(encoded) <= inline_limit:
+        return value
+    data = encoded.encode("utf-8")
+    digest, codec = (store or get_blob_store()).put(data)
+    return {
+        BLOB_REF_KEY: digest,
+        "size": len(data),
+        "codec": codec,
+        "preview": encoded[:BLOB_PREVIEW_CHARS],
+    }
+
+
+def externalize_outputs(outputs, cache=None, store=None):
+    """Replace large values in an outputs dict with blob references.
+
+    ``cache`` maps output keys to ``(value, result)`` pairs from earlier
+    calls; values that are the same object as last time reuse their result,
+    inline or reference, without being serialized again.
+    """
+    if not isinstance(outputs, dict):
+        return outputs
+    result = {}
+    for key, value in outputs.items():
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None and cached[0] is value:
+            result[key] = cached[1]
+            continue
+        ref = externalize_value(value, store)
+        if cache is not None:
+            cache[key] = (value, ref)
+        result[key] = ref
+    return result
+
+
+def resolve_value(value, store=None):
+    """Load the value behind a blob reference; other values pass through."""
+    if not is_blob_ref(value):
+        return value
+    data = (store or get_blob_store()).get(value[BLOB_REF_KEY])
+    return json.loads(data.decode("utf-8"))
+
+
+def resolve_outputs(outputs, store=None):
+    if not isinstance(outputs, dict):
+        return outputs
+    return {key: resolve_value(value, store) for key, value in outputs.items()}
+
+
+def describe_value(value, limit=24):
+    """Short display string for a value without loading blob contents."""
+    if is_blob_ref(value):
+        return f"{value.get('preview', '')[:limit]}… ({value.get('size', 0)} bytes)"
+    return repr(value)[:limit]
+
+
+def _referenced_digests(automations_dir):
+    digests = set()
+    for path in Path(automations_dir).glob("*.json"):
+        with suppress(OSError, UnicodeDecodeError):
+            digests.update(_DIGEST_RE.findall(path.read_text(encoding="utf-8")))
+
+    from nodebox.services.history import get_history, history_names
+    from nodebox.services.sqlite_store import get_automation_store
+
+    # Versions in the history may still point at outputs since replaced.
+    for name in history_names():
+        with suppress(OSError, ValueError):
+            for text in get_history(name).iter_snapshot_text():
+                digests.update(_DIGEST_RE.findall(text))
+
+    store = get_automation_store()
+    if store is not None:
+        for (value,) in store.query_output_values(f"%{BLOB_REF_KEY}%"):
+            digests.update(_DIGEST_RE.findall(value))
+    return digests
+
+
+def collect_blob_garbage(
+    automations_dir=AUTOMATIONS_DIR, min_age_days=1, store=None, extra_refs=()
+):
+    """Delete blobs no automation or saved version references any more.
+
+    Blobs younger than ``min_age_days`` are kept, since an open editor may
+    hold references that have not been saved yet.
+    """
+    store = store or get_blob_store()
+    referenced = _referenced_digests(automations_dir) | set(extra_refs)
+    cutoff = time.time() - min_age_days * 86400
+    removed = 0
+    for digest, entry in list(store.digests()):
+        if digest in referenced:
+            continue
+        with suppress(OSError):
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+    return removed
+
+
+__all__ = [
+    "BlobStore",
+    "BLOBS_DIR",
+    "BLOB_INLINE_LIMIT",
+    "get_blob_store",
+    "is_blob_ref",
+    "externalize_value",
+    "externalize_outputs",
+    "resolve_value",
+    "resolve_outputs",
+    "describe_value",
+    "collect_blob_garbage",
+]
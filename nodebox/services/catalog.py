@@ -0,0 +1,196 @@
+"""
+Automation catalog index.
+
+Keeps a small summary of every automation file (display name, node count,
+size and last run) in ``CACHE_DIR`` keyed by the file's mtime and size, so
+listing automations only re-parses files that actually changed.
+"""
+
+import json
+import os
+from pathlib import Path
+
+from nodebox.core.atomic import atomic_write_json
+from nodebox.core.paths import AUTOMATIONS_DIR, CACHE_DIR
+
+CATALOG_FILE = CACHE_DIR / "automation_catalog.json"
+CATALOG_VERSION = 1
+
+
+class CatalogEntry:
+    __slots__ = ["key", "name", "node_count", "size", "mtime_ns", "last_run"]
+
+    def __init__(self, key, name, node_count=0, size=0, mtime_ns=0, last_run=None):
+        self.key = key
+        self.name = name
+        self.node_count = node_count
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.last_run = last_run
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "node_count": self.node_count,
+            "size": self.size,
+            "mtime_ns": self.mtime_ns,
+            "last_run": self.last_run,
+        }
+
+    @classmethod
+    def from_dict(cls, key, data):
+        return cls(
+            key,
+            data.get("name", key),
+            data.get("node_count", 0),
+            data.get("size", 0),
+            data.get("mtime_ns", 0),
+            data.get("last_run"),
+        )
+
+
+class CatalogChanges:
+    __slots__ = ["added", "removed", "modified"]
+
+    def __init__(self):
+        self.added = []
+        self.removed = []
+        self.modified = []
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.modified)
+
+
+class AutomationCatalog:
+    """Incrementally maintained index of the automations directory.
+
+    Entries are keyed by file stem, which is also the name used to open an
+    automation in the editor.
+    """
+
+    def __init__(self, automations_dir=AUTOMATIONS_DIR, index_file=CATALOG_FILE):
+        self.automations_dir = Path(automations_dir)
+        self.index_file = Path(index_file)
+        self._entries = {}
+        self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if data.get("version") != CATALOG_VERSION:
+            return
+        if data.get("directory") != str(self.automations_dir):
+            return
+        self._entries = {
+            key: CatalogEntry.from_dict(key, value)
+            for key, value in data.get("entries", {}).items()
+        }
+
+    def _save_index(self):
+        data = {
+            "version": CATALOG_VERSION,
+            "directory": str(self.automations_dir),
+            "entries": {key: e.to_dict() for key, e in self._entries.items()},
+        }
+        try:
+            atomic_write_json(self.index_file, data, fsync=False, separators=(",", ":"))
+        except OSError as e:
+            print(f"[AutomationCatalog] Failed to write index: {e}")
+
+    def _parse(self, key, path, stat):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError, UnicodeDecodeError):
+            data = None
+        if not isinstance(data, dict):
+            data = {}
+        nodes = data.get("nodes")
+        return CatalogEntry(
+            key,
+            data.get("name") or key,
+            len(nodes) if isinstance(nodes, list) else 0,
+            stat.st_size,
+            stat.st_mtime_ns,
+            data.get("last_run"),
+        )
+
+    def _update_one(self, key, path, stat, changes):
+        entry = self._entries.get(key)
+        if entry is not None and (entry.mtime_ns, entry.size) == (
+            stat.st_mtime_ns,
+            stat.st_size,
+        ):
+            return
+        self._entries[key] = self._parse(key, path, stat)
+        (changes.added if entry is None else changes.modified).append(key)
+
+    def refresh(self):
+        """Rescan the directory, re-parsing only new or changed files."""
+        changes = CatalogChanges()
+        seen = set()
+        try:
+            scan = list(os.scandir(self.automations_dir))
+        except OSError:
+            scan = []
+
+        for dir_entry in scan:
+            if not dir_entry.name.endswith(".json") or not dir_entry.is_file():
+                continue
+            key = dir_entry.name[: -len(".json")]
+            try:
+                stat = dir_entry.stat()
+            except OSError:
+                continue
+            seen.add(key)
+            self._update_one(key, dir_entry.path, stat, changes)
+
+        for key in list(self._entries):
+            if key not in seen:
+                del self._entries[key]
+                changes.removed.append(key)
+
+        if changes:
+            self._save_index()
+        return changes
+
+    def refresh_paths(self, paths):
+        """Refresh only the given automation files."""
+        changes = CatalogChanges()
+        for path in paths:
+            path = Path(path)
+            if path.suffix != ".json":
+                continue
+            key = path.stem
+            try:
+                stat = path.stat()
+            except OSError:
+                if self._entries.pop(key, None) is not None:
+                    changes.removed.append(key)
+                continue
+            self._update_one(key, path, stat, changes)
+
+        if changes:
+            self._save_index()
+        return changes
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def entries(self):
+        return sorted(self._entries.values(), key=lambda e: e.name.lower())
+
+    def names(self):
+        return sorted(e.name for e in self._entries.values())
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+
+__all__ = ["AutomationCatalog", "CatalogChanges", "CatalogEntry", "CATALOG_FILE"]
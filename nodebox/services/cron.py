@@ -0,0 +1,284 @@
+"""
+Cron expressions for workflow schedules.
+
+Standard five-field syntax (minute, hour, day of month, month, day of
+week) with ``*``, ranges, steps, lists, month/day names and the usual
+``@hourly``/``@daily``/``@weekly``/``@monthly``/``@yearly`` aliases.
+As in Vixie cron, when both day fields are restricted a day matches if
+either of them does.
+
+Each field is parsed once into an integer bitmap. Finding the next fire
+time jumps straight to the next set bit of the month, day, hour and
+minute masks instead of stepping through the calendar minute by minute.
+"""
+
+import calendar
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError, available_timezones
+except ImportError:  # pragma: no cover - Python < 3.9
+    ZoneInfo = None
+    ZoneInfoNotFoundError = KeyError
+
+    def available_timezones():
+        return set()
+
+
+# A day-of-month that never exists (e.g. "0 0 30 2 *") must not loop forever.
+MAX_SEARCH_YEARS = 8
+
+ALIASES = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+_MONTH_NAMES = {
+    name.lower(): index for index, name in enumerate(calendar.month_abbr) if name
+}
+_DAY_NAMES = {
+    "sun": 0,
+    "mon": 1,
+    "tue": 2,
+    "wed": 3,
+    "thu": 4,
+    "fri": 5,
+    "sat": 6,
+}
+
+# (name, low, high, names)
+_FIELDS = (
+    ("minute", 0, 59, None),
+    ("hour", 0, 23, None),
+    ("day of month", 1, 31, None),
+    ("month", 1, 12, _MONTH_NAMES),
+    ("day of week", 0, 7, _DAY_NAMES),
+)
+
+
+class CronError(ValueError):
+    pass
+
+
+def _next_bit(mask, start):
+    """Index of the lowest set bit of ``mask`` at or above ``start``."""
+    rest = mask >> start
+    if not rest:
+        return None
+    return start + (rest & -rest).bit_length() - 1
+
+
+def _parse_value(token, field, names):
+    name, low, high, _ = field
+    if names and token.lower() in names:
+        return names[token.lower()]
+    try:
+        value = int(token)
+    except ValueError:
+        raise CronError(f"invalid {name} value: {token!r}") from None
+    if not low <= value <= high:
+        raise CronError(f"{name} value {value} is outside {low}-{high}")
+    return value
+
+
+def _parse_field(text, field):
+    """Return ``(mask, restricted)`` for one field of an expression."""
+    name, low, high, names = field
+    mask = 0
+    for part in text.split(","):
+        if not part:
+            raise CronError(f"empty item in {name} field")
+        base, _, step_text = part.partition("/")
+        step = 1
+        if step_text:
+            if not step_text.isdigit() or int(step_text) == 0:
+                raise CronError(f"invalid step in {name} field: {part!r}")
+            step = int(step_text)
+
+        if base == "*":
+            start, stop = low, high
+        elif "-" in base:
+            first, _, last = base.partition("-")
+            start = _parse_value(first, field, names)
+            stop = _parse_value(last, field, names)
+            if stop < start:
+                raise CronError(f"descending range in {name} field: {part!r}")
+        else:
+            start = _parse_value(base, field, names)
+            stop = high if step_text else start
+
+        for value in range(start, stop + 1, step):
+            mask |= 1 << value
+    return mask, not text.startswith("*")
+
+
+def resolve_timezone(name):
+    """``ZoneInfo`` for ``name``; None or "" means the local time zone."""
+    if not name or name.lower() == "local":
+        return None
+    if name.upper() == "UTC":
+        return timezone.utc
+    if ZoneInfo is None:
+        raise CronError("time zones need Python 3.9 or newer")
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise CronError(f"unknown time zone: {name!r}") from None
+
+
+class CronExpression:
+    __slots__ = (
+        "expression",
+        "tz",
+        "minutes",
+        "hours",
+        "days",
+        "months",
+        "weekdays",
+        "_day_or",
+        "_month_days",
+    )
+
+    def __init__(self, expression, tz=None):
+        self.expression = expression.strip()
+        self.tz = resolve_timezone(tz) if isinstance(tz, str) or tz is None else tz
+
+        text = ALIASES.get(self.expression.lower(), self.expression)
+        parts = text.split()
+        if len(parts) != 5:
+            raise CronError(
+                f"expected 5 fields (minute hour day month weekday), got {len(parts)}"
+            )
+        minutes, hours, days, months, weekdays = (
+            _parse_field(part, field) for part, field in zip(parts, _FIELDS)
+        )
+        self.minutes = minutes[0]
+        self.hours = hours[0]
+        self.days = days[0]
+        self.months = months[0]
+        # 7 is an alias for Sunday.
+        self.weekdays = (weekdays[0] | weekdays[0] >> 7) & 0x7F
+        self._day_or = days[1] and weekdays[1]
+        self._month_days = {}
+
+    def __repr__(self):
+        return f"CronExpression({self.expression!r})"
+
+    def _days_in(self, year, month):
+        """Bitmap of matching days (bit 1 = the 1st) for a month.
+
+        A month is fully described by its length and the weekday of its
+        first day, so at most 28 distinct masks exist per expression.
+        """
+        first_weekday, length = calendar.monthrange(year, month)
+        key = (first_weekday, length)
+        mask = self._month_days.get(key)
+        if mask is None:
+            # calendar weekdays start on Monday, cron's on Sunday.
+            first = (first_weekday + 1) % 7
+            weekday_mask = 0
+            for day in range(1, length + 1):
+                if self.weekdays >> ((first + day - 1) % 7) & 1:
+                    weekday_mask |= 1 << day
+            month_mask = ((1 << (length + 1)) - 1) & ~1
+            if self._day_or:
+                mask = (self.days | weekday_mask) & month_mask
+            else:
+                mask = self.days & weekday_mask & month_mask
+            self._month_days[key] = mask
+        return mask
+
+    def _next_wall_time(self, start):
+        """First matching naive wall-clock minute at or after ``start``."""
+        year, month, day = start.year, start.month, start.day
+        hour, minute = start.hour, start.minute
+        last_year = year + MAX_SEARCH_YEARS
+
+        while year <= last_year:
+            next_month = _next_bit(self.months, month)
+            if next_month is None:
+                year, month, day, hour, minute = year + 1, 1, 1, 0, 0
+                continue
+            if next_month != month:
+                month, day, hour, minute = next_month, 1, 0, 0
+
+            next_day = _next_bit(self._days_in(year, month), day)
+            if next_day is None:
+                month, day, hour, minute = month + 1, 1, 0, 0
+                if month > 12:
+                    year, month = year + 1, 1
+                continue
+            if next_day != day:
+                day, hour, minute = next_day, 0, 0
+
+            next_hour = _next_bit(self.hours, hour)
+            if next_hour is None:
+                day, hour, minute = day + 1, 0, 0
+                continue
+            if next_hour != hour:
+                hour, minute = next_hour, 0
+
+            next_minute = _next_bit(self.minutes, minute)
+            if next_minute is None:
+                hour, minute = hour + 1, 0
+                continue
+            return datetime(year, month, day, hour, next_minute)
+        return None
+
+    def next_after(self, moment):
+        """Next fire time strictly after ``moment``.
+
+        ``moment`` may be naive (local time) or aware. The result is an
+        aware datetime in the expression's time zone (local time when no
+        zone was given), or None if the expression can never match.
+        """
+        if moment.tzinfo is None:
+            moment = moment.astimezone()
+        tz = self.tz
+        local = moment.astimezone(tz) if tz is not None else moment.astimezone()
+
+        start = local.replace(tzinfo=None, second=0, microsecond=0) + timedelta(
+            minutes=1
+        )
+        for _ in range(4):
+            wall = self._next_wall_time(start)
+            if wall is None:
+                return None
+            candidate = wall.replace(tzinfo=tz) if tz is not None else wall.astimezone()
+            # Wall times repeated when clocks go back map to their first
+            # occurrence, which may lie before ``moment``.
+            if candidate > moment:
+                return candidate
+            start = wall + timedelta(minutes=1)
+        return None
+
+    def matches(self, moment):
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(self.tz) if self.tz else moment.astimezone()
+        return bool(
+            self.months >> moment.month & 1
+            and self._days_in(moment.year, moment.month) >> moment.day & 1
+            and self.hours >> moment.hour & 1
+            and self.minutes >> moment.minute & 1
+        )
+
+
+@lru_cache(maxsize=1024)
+def parse_cron(expression, tz=None):
+    """Cached ``CronExpression`` for an expression and time-zone name."""
+    return CronExpression(expression, tz)
+
+
+__all__ = [
+    "CronError",
+    "CronExpression",
+    "available_timezones",
+    "parse_cron",
+    "resolve_timezone",
+]
@@ -0,0 +1,318 @@
+"""
+Background scheduler that runs automations while the app is closed.
+
+    python -m nodebox scheduler [--max-workers N]
+
+Only one process may fire schedules at a time: the daemon and the GUI
+scheduler both take ``SchedulerLock`` before firing, and whoever does not
+hold it leaves ``schedules.json`` to the owner. The lock is an OS file
+lock, so it is released automatically if its holder dies. The owner also
+hosts the file-system triggers of "watch" schedules.
+"""
+
+import json
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from datetime import datetime
+
+from nodebox.core.paths import APP_DATA_DIR
+from nodebox.services.headless import record_skipped, run_and_record
+from nodebox.services.scheduler import (
+    SCHEDULES_FILE,
+    ScheduleQueue,
+    collect_due,
+    load_schedules,
+    migrate_legacy_schedules,
+    save_schedules,
+    schedules_lock,
+)
+from nodebox.services.triggers import WatchTriggerService, trigger_inputs
+
+SCHEDULER_LOCK_FILE = APP_DATA_DIR / "scheduler.lock"
+DEFAULT_MAX_WORKERS = 2
+# How often the schedules file is checked for edits and a busy lock retried.
+RELOAD_INTERVAL_S = 5.0
+LOCK_RETRY_S = 30.0
+
+if os.name == "nt":
+    import msvcrt
+
+    def _lock_fd(fd):
+        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+
+    def _unlock_fd(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _lock_fd(fd):
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock_fd(fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class SchedulerLock:
+    """Non-blocking, process-wide ownership of schedule firing."""
+
+    def __init__(self, owner, path=SCHEDULER_LOCK_FILE):
+        self.owner = owner
+        self.path = path
+        self._fd = None
+
+    @property
+    def held(self):
+        return self._fd is not None
+
+    def acquire(self):
+        """Take the lock if it is free; True if this instance holds it."""
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            _lock_fd(fd)
+        except OSError:
+            os.close(fd)
+            return False
+        info = {
+            "owner": self.owner,
+            "pid": os.getpid(),
+            "since": datetime.now().isoformat(timespec="seconds"),
+        }
+        with suppress(OSError):
+            os.ftruncate(fd, 0)
+            os.write(fd, json.dumps(info).encode("utf-8"))
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is None:
+            return
+        fd, self._fd = self._fd, None
+        with suppress(OSError):
+            _unlock_fd(fd)
+        os.close(fd)
+
+    def holder(self):
+        """``{"owner", "pid", "since"}`` of the current holder, if readable."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+
+class SchedulerDaemon:
+    """Fires due schedules and runs them on a bounded worker pool."""
+
+    def __init__(
+        self,
+        schedules_path=SCHEDULES_FILE,
+        max_workers=DEFAULT_MAX_WORKERS,
+        lock=None,
+        log=print,
+    ):
+        self.schedules_path = schedules_path
+        if schedules_path == SCHEDULES_FILE:
+            migrate_legacy_schedules()
+        self.max_workers = max(1, max_workers)
+        self.lock = lock or SchedulerLock("daemon")
+        self.log = log
+        self.schedules = []
+        self.queue = ScheduleQueue()
+        self._known_mtime_ns = None
+        self._stop = threading.Event()
+        self._pool = None
+        # schedule name -> runs in flight, for overlap prevention
+        self._running = Counter()
+        self._running_lock = threading.Lock()
+        # Guards schedule state shared with the trigger thread.
+        self._state_lock = threading.RLock()
+        self.triggers = WatchTriggerService(self.dispatch_trigger)
+
+    def stop(self):
+        self._stop.set()
+
+    def _mtime_ns(self):
+        try:
+            return os.stat(self.schedules_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def reload_if_changed(self):
+        with self._state_lock:
+            self._reload_if_changed()
+
+    def _reload_if_changed(self):
+        mtime_ns = self._mtime_ns()
+        if mtime_ns == self._known_mtime_ns:
+            return
+        try:
+            self.schedules = load_schedules(self.schedules_path)
+        except FileNotFoundError:
+            self.schedules = []
+        except (ValueError, KeyError) as e:
+            # Keep the previous schedules until the file is readable again.
+            self.log(f"Cannot read {self.schedules_path}: {e}")
+            return
+        self._known_mtime_ns = mtime_ns
+        self.queue.rebuild(self.schedules)
+        self.triggers.set_schedules(self.schedules)
+        self.log(f"Loaded {len(self.schedules)} schedules, {len(self.queue)} active")
+
+    def _wait_seconds(self):
+        next_run = self.queue.peek_time()
+        if next_run is None:
+            return RELOAD_INTERVAL_S
+        due_in = (next_run - datetime.now()).total_seconds()
+        return min(max(due_in, 0.0), RELOAD_INTERVAL_S)
+
+    def running(self, schedule_name):
+        with self._running_lock:
+            return self._running[schedule_name]
+
+    def fire_due(self):
+        with self._state_lock:
+            return self._fire_due()
+
+    def _start(self, schedule, runs, root_inputs=None, planned_at=None):
+        queued_at = datetime.now()
+        with self._running_lock:
+            self._running[schedule.name] += 1
+        self._pool.submit(
+            self._run,
+            schedule.name,
+            schedule.automation_name,
+            runs,
+            root_inputs,
+            planned_at or queued_at,
+            queued_at,
+        )
+
+    def dispatch_trigger(self, schedule, paths):
+        """Start a watch schedule for ``paths``; False while it is still busy."""
+        with self._state_lock:
+            if self._pool is None:
+                return False
+            if self.running(schedule.name) >= schedule.max_concurrency:
+                return False
+            self.log(f"Running {schedule.automation_name!r} for {len(paths)} files")
+            self._start(schedule, 1, trigger_inputs(schedule, paths))
+            schedule.last_run = datetime.now()
+            schedule.run_count += 1
+            with schedules_lock(self.schedules_path):
+                save_schedules(self.schedules, self.schedules_path)
+            self._known_mtime_ns = self._mtime_ns()
+        return True
+
+    def _fire_due(self):
+        due_runs = collect_due(self.queue, running=self.running)
+        for due in due_runs:
+            schedule = due.schedule
+            if not due.runs:
+                self.log(f"Skipped {schedule.name} ({due.reason}, {due.missed} missed)")
+                record_skipped(due, "daemon")
+                continue
+            self.log(
+                f"Running {schedule.automation_name!r} ({schedule.name})"
+                + (f" x{due.runs}" if due.runs > 1 else "")
+            )
+            self._start(schedule, due.runs, planned_at=due.planned_at)
+
+        if due_runs:
+            with schedules_lock(self.schedules_path):
+                save_schedules(self.schedules, self.schedules_path)
+            self._known_mtime_ns = self._mtime_ns()
+        return due_runs
+
+    def _run(
+        self,
+        schedule_name,
+        automation_name,
+        runs,
+        root_inputs=None,
+        planned_at=None,
+        queued_at=None,
+    ):
+        try:
+            for index in range(runs):
+                if self._stop.is_set():
+                    break
+                # Catch-up runs after the first have no planned start.
+                record = run_and_record(
+                    automation_name,
+                    schedule_name,
+                    "daemon",
+                    root_inputs=root_inputs,
+                    planned_at=planned_at if index == 0 else None,
+                    queued_at=queued_at if index == 0 else None,
+                )
+                self._log_record(record)
+        finally:
+            with self._running_lock:
+                self._running[schedule_name] -= 1
+                if self._running[schedule_name] <= 0:
+                    del self._running[schedule_name]
+
+    def _log_record(self, record):
+        message = (
+            f"{record['automation']}: {record['status']} "
+            f"in {record['duration_s']:.1f}s"
+        )
+        if record.get("lateness_s") is not None:
+            message += (
+                f", started {record['lateness_s']:.1f}s late"
+                f" after {record['queue_wait_s']:.1f}s in the queue"
+            )
+        if record.get("error"):
+            message += f" ({record['error'].splitlines()[0]})"
+        self.log(message)
+
+    def _wait_for_lock(self):
+        announced = False
+        while not self._stop.is_set():
+            if self.lock.acquire():
+                return True
+            if not announced:
+                holder = self.lock.holder() or {}
+                self.log(
+                    f"Schedules are being run by {holder.get('owner', 'another process')}"
+                    f" (pid {holder.get('pid', '?')}); waiting for it to exit"
+                )
+                announced = True
+            self._stop.wait(LOCK_RETRY_S)
+        return False
+
+    def run(self):
+        """Block until ``stop`` is called."""
+        if not self._wait_for_lock():
+            return
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="nodebox-run"
+        )
+        try:
+            self.log(f"Scheduler started with {self.max_workers} workers")
+            while not self._stop.is_set():
+                self.reload_if_changed()
+                self.fire_due()
+                self._stop.wait(self._wait_seconds())
+        finally:
+            self.log("Scheduler stopping; waiting for running automations")
+            self.triggers.stop()
+            with self._state_lock:
+                pool, self._pool = self._pool, None
+            pool.shutdown(wait=True, cancel_futures=True)
+            self.lock.release()
+
+
+__all__ = [
+    "DEFAULT_MAX_WORKERS",
+    "SCHEDULER_LOCK_FILE",
+    "SchedulerDaemon",
+    "SchedulerLock",
+]
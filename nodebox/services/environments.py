@@ -0,0 +1,291 @@
+"""
+Cached virtual environments for automation requirements.
+
+Each distinct requirement set gets one venv under ``CACHE_DIR/envs`` named
+after the hash of the normalized set, so automations that declare the same
+packages share a single environment across runs.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import venv
+from contextlib import suppress
+from pathlib import Path
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from nodebox.core.events import CacheHit, get_event_bus
+from nodebox.core.paths import AUTOMATIONS_DIR, CACHE_DIR
+
+ENVS_DIR = CACHE_DIR / "envs"
+ENV_MARKER_FILE = "nodebox-env.json"
+ENV_MAX_IDLE_DAYS = 30
+_STALE_BUILD_SECONDS = 24 * 3600
+
+_NAME_RE = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)(.*)$")
+_build_locks = {}
+_build_locks_guard = threading.Lock()
+
+
+def normalize_requirements(requirements):
+    """Return a sorted, de-duplicated list of requirement specifiers.
+
+    Accepts either a newline separated string (requirements.txt style) or an
+    iterable of specifiers. Comments and blank lines are dropped and project
+    names are canonicalized so ``Requests`` and ``requests`` hash the same.
+    """
+    if not requirements:
+        return []
+    if isinstance(requirements, str):
+        requirements = requirements.splitlines()
+
+    normalized = set()
+    for line in requirements:
+        spec = str(line).split("#", 1)[0].strip()
+        if not spec:
+            continue
+        match = _NAME_RE.match(spec)
+        if match:
+            name = re.sub(r"[-_.]+", "-", match.group(1)).lower()
+            spec = name + "".join(match.group(2).split())
+        normalized.add(spec)
+    return sorted(normalized)
+
+
+def requirements_hash(requirements):
+    """Hash of the normalized requirement set and the base interpreter."""
+    specs = normalize_requirements(requirements)
+    key = "\n".join(
+        [f"python-{sys.version_info.major}.{sys.version_info.minor}", sys.platform]
+        + specs
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+def environment_path(requirements):
+    return ENVS_DIR / requirements_hash(requirements)
+
+
+def interpreter_path(env_dir):
+    env_dir = Path(env_dir)
+    if os.name == "nt":
+        return env_dir / "Scripts" / "python.exe"
+    return env_dir / "bin" / "python"
+
+
+def _read_marker(env_dir):
+    try:
+        with open(Path(env_dir) / ENV_MARKER_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _write_marker(env_dir, data):
+    marker = Path(env_dir) / ENV_MARKER_FILE
+    tmp = marker.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, marker)
+
+
+def _touch(env_dir, marker):
+    marker["last_used"] = time.time()
+    try:
+        _write_marker(env_dir, marker)
+    except OSError:
+        pass
+
+
+def find_environment(requirements):
+    """Return the interpreter of an already built environment, or None.
+
+    Without requirements the current interpreter is returned.
+    """
+    if not normalize_requirements(requirements):
+        return sys.executable
+    env_dir = environment_path(requirements)
+    marker = _read_marker(env_dir)
+    python = interpreter_path(env_dir)
+    if marker is None or not python.exists():
+        return None
+    _touch(env_dir, marker)
+    return str(python)
+
+
+def _build_lock(env_hash):
+    with _build_locks_guard:
+        return _build_locks.setdefault(env_hash, threading.Lock())
+
+
+def ensure_environment(requirements, on_output=None):
+    """Return an interpreter for ``requirements``, building the venv if needed.
+
+    The marker file is written only after pip succeeds, so an interrupted
+    build is never mistaken for a usable environment and is rebuilt from
+    scratch on the next attempt.
+    """
+    specs = normalize_requirements(requirements)
+    existing = find_environment(specs)
+    if specs:
+        get_event_bus().publish(CacheHit("environments", bool(existing)))
+    if existing:
+        return existing
+
+    env_hash = requirements_hash(specs)
+    with _build_lock(env_hash):
+        existing = find_environment(specs)
+        if existing:
+            return existing
+
+        env_dir = ENVS_DIR / env_hash
+        env_dir.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            if on_output:
+                on_output(f"Creating environment {env_hash}")
+            venv.EnvBuilder(with_pip=True, clear=True).create(env_dir)
+            python = interpreter_path(env_dir)
+
+            cmd = [
+                str(python),
+                "-m",
+                "pip",
+                "install",
+                "--disable-pip-version-check",
+                "--no-input",
+                *specs,
+            ]
+            process = subprocess.Popen(
+                cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+            )
+            for line in process.stdout:
+                if on_output and line.strip():
+                    on_output(line.rstrip())
+            if process.wait() != 0:
+                raise RuntimeError(
+                    f"pip install failed for: {', '.join(specs)} "
+                    f"(exit code {process.returncode})"
+                )
+
+            now = time.time()
+            _write_marker(
+                env_dir,
+                {
+                    "hash": env_hash,
+                    "requirements": specs,
+                    "python": sys.version.split()[0],
+                    "created": now,
+                    "last_used": now,
+                },
+            )
+        except Exception:
+            shutil.rmtree(env_dir, ignore_errors=True)
+            raise
+
+    return str(python)
+
+
+def _referenced_environments(automations_dir):
+    """Hashes of the environments saved automations declare requirements for."""
+    requirement_sets = []
+    for path in Path(automations_dir).glob("*.json"):
+        with suppress(OSError, ValueError, AttributeError):
+            with open(path, "r", encoding="utf-8") as f:
+                requirement_sets.append(json.load(f).get("requirements"))
+
+    from nodebox.services.sqlite_store import get_automation_store
+
+    store = get_automation_store()
+    if store is not None:
+        for name in store.list_automations():
+            meta = store.load_meta(name)
+            if meta is not None:
+                requirement_sets.append(meta.get("requirements"))
+    return {
+        requirements_hash(requirements)
+        for requirements in requirement_sets
+        if requirements
+    }
+
+
+def collect_environment_garbage(
+    max_idle_days=ENV_MAX_IDLE_DAYS, keep=(), automations_dir=AUTOMATIONS_DIR
+):
+    """Remove environments unused for ``max_idle_days`` and abandoned builds.
+
+    ``keep`` is an iterable of environment hashes that must survive regardless
+    of their age. Environments a saved automation in ``automations_dir`` (or
+    the SQLite store) still needs are not expired either, however long they
+    have been idle. Returns the names of the removed directories.
+    """
+    if not ENVS_DIR.exists():
+        return []
+
+    keep = set(keep)
+    referenced = _referenced_environments(automations_dir)
+    now = time.time()
+    idle_cutoff = now - max_idle_days * 86400
+    removed = []
+
+    for entry in ENVS_DIR.iterdir():
+        if not entry.is_dir() or entry.name in keep:
+            continue
+        marker = _read_marker(entry)
+        try:
+            if marker is None:
+                # Unfinished build: only reclaim it once nobody can still be
+                # installing into it.
+                expired = entry.stat().st_mtime < now - _STALE_BUILD_SECONDS
+            elif entry.name in referenced:
+                expired = False
+            else:
+                expired = marker.get("last_used", 0) < idle_cutoff
+        except OSError:
+            continue
+        if not expired:
+            continue
+        with _build_lock(entry.name):
+            shutil.rmtree(entry, ignore_errors=True)
+        removed.append(entry.name)
+
+    return removed
+
+
+class EnvironmentBuildWorker(QThread):
+    """Worker thread that resolves or builds an automation's environment."""
+
+    status = pyqtSignal(str)
+    # The environment's Python; not named finished, which QThread defines.
+    built = pyqtSignal(str)
+    error = pyqtSignal(str)
+
+    def __init__(self, requirements):
+        super().__init__()
+        self.requirements = normalize_requirements(requirements)
+
+    def run(self):
+        try:
+            python = ensure_environment(self.requirements, on_output=self.status.emit)
+            self.built.emit(python)
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+__all__ = [
+    "ENVS_DIR",
+    "EnvironmentBuildWorker",
+    "collect_environment_garbage",
+    "ensure_environment",
+    "environment_path",
+    "find_environment",
+    "interpreter_path",
+    "normalize_requirements",
+    "requirements_hash",
+]
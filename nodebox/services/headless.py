@@ -0,0 +1,278 @@
+"""
+Run automations without the editor.
+
+The saved graph is loaded into lightweight node objects and executed by
+the synchronous path of ``execute_all_nodes``; outputs are written back
+the same way the canvas saves them. Used by the background scheduler and
+by the main window for scheduled runs.
+"""
+
+import json
+import traceback
+from datetime import datetime
+from time import perf_counter
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from nodebox.core.atomic import atomic_write_text
+from nodebox.core.engine import execute_all_nodes
+from nodebox.core.events import RunFinished, RunStarted, get_event_bus
+from nodebox.core.paths import AUTOMATIONS_DIR
+from nodebox.services.blobs import externalize_outputs
+from nodebox.services.environments import ensure_environment, normalize_requirements
+from nodebox.services.history import get_history
+from nodebox.services.run_history import record_run
+from nodebox.services.sqlite_store import get_automation_store
+
+
+class HeadlessNode:
+    __slots__ = ("id", "title", "code", "outputs", "execution_resources")
+
+    def __init__(self, node_id, title, code):
+        self.id = node_id
+        self.title = title
+        self.code = code
+        self.outputs = {}
+        self.execution_resources = None
+
+
+class _Port:
+    __slots__ = ("node",)
+
+    def __init__(self, node):
+        self.node = node
+
+
+class _Connection:
+    __slots__ = ("start_port", "end_port")
+
+    def __init__(self, start_node, end_node):
+        self.start_port = _Port(start_node)
+        self.end_port = _Port(end_node)
+
+
+def automation_path(name):
+    return AUTOMATIONS_DIR / f"{name}.json"
+
+
+def load_automation(name):
+    """Saved automation data from the active storage backend."""
+    store = get_automation_store()
+    if store is not None and store.has_automation(name):
+        return store.load_automation(name)
+    with open(automation_path(name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_graph(data):
+    """Return ``(nodes, connections)`` ready for ``execute_all_nodes``."""
+    nodes = {
+        node_data["id"]: HeadlessNode(
+            node_data["id"], node_data.get("name", ""), node_data.get("code", "")
+        )
+        for node_data in data.get("nodes", [])
+    }
+    connections = []
+    for conn_data in data.get("connections", []):
+        start = nodes.get(conn_data.get("from_node_id"))
+        end = nodes.get(conn_data.get("to_node_id"))
+        if start is not None and end is not None:
+            connections.append(_Connection(start, end))
+    return list(nodes.values()), connections
+
+
+def save_results(name, nodes, finished_at):
+    """Write node outputs and ``last_run`` back to the saved automation."""
+    last_run = finished_at.isoformat(timespec="seconds")
+    outputs = {node.id: externalize_outputs(node.outputs) for node in nodes}
+
+    store = get_automation_store()
+    if store is not None and store.has_automation(name):
+        meta = store.load_meta(name) or {}
+        meta["last_run"] = last_run
+        store.set_outputs(name, outputs, meta)
+        return
+
+    # Re-read the file so edits saved by the editor during the run survive.
+    path = automation_path(name)
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    for node_data in data.get("nodes", []):
+        if node_data.get("id") in outputs:
+            node_data["outputs"] = outputs[node_data["id"]]
+    data["last_run"] = last_run
+    atomic_write_text(path, json.dumps(data, indent=4))
+    get_history(name).record(data)
+
+
+def run_automation(
+    name,
+    on_log=None,
+    on_error=None,
+    write_results=True,
+    root_inputs=None,
+    on_node_executed=None,
+):
+    """Execute a saved automation and return the engine's summary.
+
+    ``root_inputs`` are passed to the nodes without incoming connections.
+    """
+    data = load_automation(name)
+    requirements = normalize_requirements(data.get("requirements", []))
+    python_executable = None
+    if requirements:
+        on_output = (lambda line: on_log(line, "stdout")) if on_log else None
+        python_executable = ensure_environment(requirements, on_output=on_output)
+
+    nodes, connections = build_graph(data)
+    result = execute_all_nodes(
+        nodes,
+        connections,
+        on_error=on_error,
+        on_log=on_log,
+        on_node_executed=on_node_executed,
+        python_executable=python_executable,
+        root_inputs=root_inputs,
+        automation_name=name,
+    )
+    if write_results:
+        save_results(name, nodes, datetime.now())
+    return result
+
+
+def run_and_record(
+    name,
+    schedule=None,
+    source="headless",
+    on_log=None,
+    root_inputs=None,
+    planned_at=None,
+    queued_at=None,
+):
+    """Run an automation, append the outcome to the run history and return it.
+
+    ``planned_at`` is when the schedule meant the run to start and
+    ``queued_at`` when it was handed to a worker; with them the record
+    gets ``lateness_s`` and ``queue_wait_s``. ``RunStarted`` and
+    ``RunFinished`` events are published around the run.
+    """
+    bus = get_event_bus()
+    bus.publish(RunStarted(name, source, schedule))
+    errors = []
+    started_at = datetime.now()
+    start = perf_counter()
+    record = {
+        "automation": name,
+        "schedule": schedule,
+        "source": source,
+        "started_at": started_at.isoformat(timespec="seconds"),
+    }
+    if planned_at is not None:
+        record["planned_at"] = planned_at.isoformat(timespec="seconds")
+        record["lateness_s"] = round((started_at - planned_at).total_seconds(), 3)
+    if queued_at is not None:
+        record["queue_wait_s"] = round((started_at - queued_at).total_seconds(), 3)
+    if root_inputs and "trigger_paths" in root_inputs:
+        record["trigger_files"] = len(root_inputs["trigger_paths"])
+    try:
+        result = run_automation(
+            name,
+            on_log=on_log,
+            on_error=lambda node, error: errors.append(f"{node.title}: {error}"),
+            root_inputs=root_inputs,
+        )
+    except Exception as e:
+        record.update(status="error", error=str(e), traceback=traceback.format_exc())
+    else:
+        record.update(
+            status="failed" if result["error_count"] else "ok",
+            executed_count=result["executed_count"],
+            error_count=result["error_count"],
+            total_nodes=result["total_nodes"],
+        )
+        if errors:
+            record["error"] = errors[0]
+    record["finished_at"] = datetime.now().isoformat(timespec="seconds")
+    record["duration_s"] = round(perf_counter() - start, 3)
+    bus.publish(RunFinished.from_record(record))
+
+    try:
+        record_run(record)
+    except OSError as e:
+        print(f"[RunHistory] Could not record run of {name}: {e}")
+    return record
+
+
+def record_skipped(due, source="headless"):
+    """Log a firing that was skipped by its misfire or overlap policy."""
+    now = datetime.now().isoformat(timespec="seconds")
+    try:
+        record_run(
+            {
+                "automation": due.schedule.automation_name,
+                "schedule": due.schedule.name,
+                "source": source,
+                "started_at": now,
+                "finished_at": now,
+                "status": "skipped",
+                "reason": due.reason,
+                "missed": due.missed,
+            }
+        )
+    except OSError as e:
+        print(f"[RunHistory] Could not record skipped run: {e}")
+
+
+class AutomationRunWorker(QThread):
+    """Runs one automation headlessly off the GUI thread.
+
+    ``completed`` carries the record of the last run; ``QThread.finished``
+    still fires once the thread has ended.
+    """
+
+    completed = pyqtSignal(dict)
+
+    def __init__(
+        self,
+        automation_name,
+        schedule=None,
+        source="gui",
+        runs=1,
+        root_inputs=None,
+        planned_at=None,
+    ):
+        super().__init__()
+        self.automation_name = automation_name
+        self.schedule = schedule
+        self.source = source
+        # Missed occurrences being caught up run back to back.
+        self.runs = runs
+        self.root_inputs = root_inputs
+        self.planned_at = planned_at
+        self.queued_at = datetime.now()
+
+    def run(self):
+        record = None
+        for index in range(max(1, self.runs)):
+            # Only the first run of a catch-up chain has a planned start.
+            record = run_and_record(
+                self.automation_name,
+                self.schedule,
+                self.source,
+                root_inputs=self.root_inputs,
+                planned_at=self.planned_at if index == 0 else None,
+                queued_at=self.queued_at if index == 0 else None,
+            )
+        self.completed.emit(record)
+
+
+__all__ = [
+    "AutomationRunWorker",
+    "HeadlessNode",
+    "build_graph",
+    "load_automation",
+    "record_skipped",
+    "run_and_record",
+    "run_automation",
+    "save_results",
+]
@@ -0,0 +1,556 @@
+"""
+Versioned automation history.
+
+Every saved snapshot is appended to ``HISTORY_DIR/<automation>/log.bin`` as a
+zlib-compressed record. Most records are structural deltas against the
+previous version (changed and deleted nodes, connection and metadata
+changes); every ``KEYFRAME_INTERVAL`` versions a full keyframe is written so
+a checkout never replays more than that many deltas. ``index.jsonl`` holds
+one line per version with the record's offset in the log.
+
+Records are only ever appended, so the cost of saving a version follows the
+size of the change. Pruning rewrites the history into a fresh directory
+that is swapped in with renames.
+
+The GUI and the scheduler daemon both record versions, so appends, pruning
+and clearing hold an OS file lock (``<automation>.lock`` next to the
+directory) and re-read the index from disk first.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+import zlib
+from contextlib import suppress
+from pathlib import Path
+
+from nodebox.core.atomic import file_lock
+from nodebox.core.paths import APP_DATA_DIR, AUTOMATIONS_DIR
+
+HISTORY_DIR = APP_DATA_DIR / "history"
+KEYFRAME_INTERVAL = 25
+HISTORY_MAX_VERSIONS = 500
+HISTORY_MAX_AGE_DAYS = 90
+
+LOG_FILE = "log.bin"
+INDEX_FILE = "index.jsonl"
+
+KEYFRAME = "key"
+DELTA = "delta"
+
+_STRUCTURE_KEYS = ("nodes", "connections")
+
+
+def _connection_key(connection):
+    return [
+        connection.get("from_node_id"),
+        connection.get("from_port_type"),
+        connection.get("to_node_id"),
+        connection.get("to_port_type"),
+    ]
+
+
+def _normalize(snapshot):
+    nodes = snapshot.get("nodes", [])
+    return {
+        "meta": {k: v for k, v in snapshot.items() if k not in _STRUCTURE_KEYS},
+        "nodes": {node["id"]: node for node in nodes},
+        "order": [node["id"] for node in nodes],
+        "connections": [_connection_key(c) for c in snapshot.get("connections", [])],
+    }
+
+
+def _denormalize(state):
+    snapshot = dict(state["meta"])
+    snapshot["nodes"] = [state["nodes"][node_id] for node_id in state["order"]]
+    snapshot["connections"] = [
+        {
+            "from_node_id": c[0],
+            "from_port_type": c[1],
+            "to_node_id": c[2],
+            "to_port_type": c[3],
+        }
+        for c in state["connections"]
+    ]
+    return snapshot
+
+
+def _diff(old, new):
+    """Return the delta turning ``old`` into ``new``, or None if they match."""
+    delta = {}
+
+    old_nodes, new_nodes = old["nodes"], new["nodes"]
+    changed = {
+        node_id: node
+        for node_id, node in new_nodes.items()
+        if old_nodes.get(node_id) != node
+    }
+    deleted = [node_id for node_id in old["order"] if node_id not in new_nodes]
+    if changed:
+        delta["set"] = changed
+    if deleted:
+        delta["del"] = deleted
+
+    deleted_set = set(deleted)
+    expected_order = [i for i in old["order"] if i not in deleted_set] + [
+        i for i in new["order"] if i not in old_nodes
+    ]
+    if expected_order != new["order"]:
+        delta["order"] = new["order"]
+
+    old_connections = {tuple(c) for c in old["connections"]}
+    new_connections = {tuple(c) for c in new["connections"]}
+    removed = [c for c in old["connections"] if tuple(c) not in new_connections]
+    added = [c for c in new["connections"] if tuple(c) not in old_connections]
+    removed_set = {tuple(c) for c in removed}
+    expected_connections = [
+        c for c in old["connections"] if tuple(c) not in removed_set
+    ] + added
+    if expected_connections != new["connections"]:
+        delta["connections"] = new["connections"]
+    else:
+        if added:
+            delta["conn_add"] = added
+        if removed:
+            delta["conn_del"] = removed
+
+    meta_set = {
+        k: v
+        for k, v in new["meta"].items()
+        if k not in old["meta"] or old["meta"][k] != v
+    }
+    meta_del = [k for k in old["meta"] if k not in new["meta"]]
+    if meta_set:
+        delta["meta_set"] = meta_set
+    if meta_del:
+        delta["meta_del"] = meta_del
+
+    return delta or None
+
+
+def _apply(state, delta):
+    nodes = dict(state["nodes"])
+    order = list(state["order"])
+    deleted = set(delta.get("del", ()))
+    for node_id in deleted:
+        nodes.pop(node_id, None)
+    for node_id, node in delta.get("set", {}).items():
+        if node_id not in nodes:
+            order.append(node_id)
+        nodes[node_id] = node
+    if "order" in delta:
+        order = list(delta["order"])
+    elif deleted:
+        order = [i for i in order if i not in deleted]
+
+    if "connections" in delta:
+        connections = list(delta["connections"])
+    else:
+        removed = {tuple(c) for c in delta.get("conn_del", ())}
+        connections = [c for c in state["connections"] if tuple(c) not in removed]
+        connections.extend(delta.get("conn_add", ()))
+
+    meta = dict(state["meta"])
+    for key in delta.get("meta_del", ()):
+        meta.pop(key, None)
+    meta.update(delta.get("meta_set", {}))
+
+    return {"meta": meta, "nodes": nodes, "order": order, "connections": connections}
+
+
+def _encode(payload):
+    return zlib.compress(
+        json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8"), 6
+    )
+
+
+def _decode(data):
+    return json.loads(zlib.decompress(data).decode("utf-8"))
+
+
+def _summarize(delta):
+    if delta is None:
+        return ""
+    parts = []
+    if delta.get("set"):
+        parts.append(f"{len(delta['set'])} node(s) changed")
+    if delta.get("del"):
+        parts.append(f"{len(delta['del'])} removed")
+    if "connections" in delta or delta.get("conn_add") or delta.get("conn_del"):
+        parts.append("connections")
+    if delta.get("meta_set") or delta.get("meta_del"):
+        parts.append("settings")
+    return ", ".join(parts)
+
+
+class HistoryEntry:
+    __slots__ = ["version", "timestamp", "kind", "offset", "length", "summary"]
+
+    def __init__(self, version, timestamp, kind, offset, length, summary=""):
+        self.version = version
+        self.timestamp = timestamp
+        self.kind = kind
+        self.offset = offset
+        self.length = length
+        self.summary = summary
+
+    def to_dict(self):
+        return {
+            "v": self.version,
+            "t": self.timestamp,
+            "k": self.kind,
+            "o": self.offset,
+            "l": self.length,
+            "s": self.summary,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["v"], data["t"], data["k"], data["o"], data["l"], data.get("s", "")
+        )
+
+
+class AutomationHistory:
+    """History of a single automation. Safe to use from several threads."""
+
+    def __init__(self, name, root=HISTORY_DIR, keyframe_interval=KEYFRAME_INTERVAL):
+        self.name = name
+        self.directory = Path(root) / name
+        self.keyframe_interval = keyframe_interval
+        self._lock = threading.RLock()
+        self._entries = None
+        self._index_stamp = None
+        self._last_state = None
+
+    @property
+    def _log_path(self):
+        return self.directory / LOG_FILE
+
+    @property
+    def _index_path(self):
+        return self.directory / INDEX_FILE
+
+    @property
+    def _lock_path(self):
+        return self.directory.with_name(self.directory.name + ".lock")
+
+    def _stamp(self):
+        try:
+            st = self._index_path.stat()
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def _load(self):
+        """Read the index, again only if another process changed it."""
+        stamp = self._stamp()
+        if self._entries is not None and stamp == self._index_stamp:
+            return
+        latest = self._entries[-1].version if self._entries else None
+        entries = []
+        try:
+            log_size = self._log_path.stat().st_size
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = HistoryEntry.from_dict(json.loads(line))
+                    except (ValueError, KeyError):
+                        break
+                    if entry.offset + entry.length > log_size:
+                        break
+                    entries.append(entry)
+        except OSError:
+            entries = []
+        self._entries = entries
+        self._index_stamp = stamp
+        if (entries[-1].version if entries else None) != latest:
+            self._last_state = None
+
+    def _load_locked(self):
+        """Like ``_load`` but also repairs the files; needs the file lock."""
+        self._recover_swap()
+        self._index_stamp = None
+        self._load()
+        self._truncate_to_index()
+
+    def _recover_swap(self):
+        old = self.directory.with_name(self.directory.name + ".old")
+        new = self.directory.with_name(self.directory.name + ".new")
+        if old.exists():
+            if self.directory.exists():
+                shutil.rmtree(old, ignore_errors=True)
+            else:
+                os.replace(old, self.directory)
+        if new.exists():
+            shutil.rmtree(new, ignore_errors=True)
+
+    def _truncate_to_index(self):
+        """Drop log bytes and index lines written after the last complete entry."""
+        end = (
+            self._entries[-1].offset + self._entries[-1].length if self._entries else 0
+        )
+        with suppress(OSError):
+            if self._log_path.stat().st_size > end:
+                with open(self._log_path, "r+b") as f:
+                    f.truncate(end)
+        with suppress(OSError):
+            lines = self._index_path.read_text(encoding="utf-8").splitlines()
+            if len(lines) != len(self._entries):
+                self._index_path.write_text(
+                    "".join(json.dumps(e.to_dict()) + "\n" for e in self._entries),
+                    encoding="utf-8",
+                )
+                self._index_stamp = self._stamp()
+
+    def _read_records(self, entries):
+        return [_decode(data) for data in self._read_raw(entries)]
+
+    def _state_at(self, position):
+        """Materialize the state of ``self._entries[position]``."""
+        key_position = position
+        while self._entries[key_position].kind != KEYFRAME:
+            key_position -= 1
+        records = self._read_records(self._entries[key_position : position + 1])
+        state = records[0]
+        for delta in records[1:]:
+            state = _apply(state, delta)
+        return state
+
+    def versions(self):
+        with self._lock:
+            self._load()
+            return list(self._entries)
+
+    def latest_version(self):
+        with self._lock:
+            self._load()
+            return self._entries[-1].version if self._entries else None
+
+    def record(self, snapshot):
+        """Append ``snapshot`` as a new version. Returns the version or None."""
+        state = _normalize(snapshot)
+        with self._lock, file_lock(self._lock_path):
+            self._load_locked()
+            if self._last_state is None and self._entries:
+                self._last_state = self._state_at(len(self._entries) - 1)
+
+            delta = None
+            if self._last_state is not None:
+                delta = _diff(self._last_state, state)
+                if delta is None:
+                    return None
+
+            since_keyframe = 0
+            for entry in reversed(self._entries):
+                if entry.kind == KEYFRAME:
+                    break
+                since_keyframe += 1
+            if delta is None or since_keyframe + 1 >= self.keyframe_interval:
+                kind, payload = KEYFRAME, state
+            else:
+                kind, payload = DELTA, delta
+
+            data = _encode(payload)
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self._log_path, "ab") as f:
+                offset = os.fstat(f.fileno()).st_size
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+            version = self._entries[-1].version + 1 if self._entries else 1
+            entry = HistoryEntry(
+                version,
+                time.time(),
+                kind,
+                offset,
+                len(data),
+                _summarize(delta) if delta else "full snapshot",
+            )
+            with open(self._index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry.to_dict()) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+            self._entries.append(entry)
+            self._index_stamp = self._stamp()
+            self._last_state = state
+
+            if len(self._entries) > HISTORY_MAX_VERSIONS + self.keyframe_interval:
+                self._prune_locked(HISTORY_MAX_VERSIONS, None)
+            return version
+
+    def checkout(self, version):
+        """Return the automation as it was saved in ``version``."""
+        with self._lock:
+            self._load()
+            for position, entry in enumerate(self._entries):
+                if entry.version == version:
+                    return _denormalize(self._state_at(position))
+            raise KeyError(version)
+
+    def prune(self, max_versions=None, max_age_days=None):
+        """Drop old versions, always keeping the latest. Returns how many."""
+        with self._lock, file_lock(self._lock_path):
+            self._load_locked()
+            return self._prune_locked(max_versions, max_age_days)
+
+    def _prune_locked(self, max_versions, max_age_days):
+        if not self._entries:
+            return 0
+        keep_from = 0
+        if max_versions is not None:
+            keep_from = max(keep_from, len(self._entries) - max(1, max_versions))
+        if max_age_days is not None:
+            cutoff = time.time() - max_age_days * 86400
+            while (
+                keep_from < len(self._entries) - 1
+                and self._entries[keep_from].timestamp < cutoff
+            ):
+                keep_from += 1
+        if keep_from == 0:
+            return 0
+
+        first_state = self._state_at(keep_from)
+        kept = self._entries[keep_from:]
+        records = self._read_raw(kept[1:])
+
+        new_dir = self.directory.with_name(self.directory.name + ".new")
+        old_dir = self.directory.with_name(self.directory.name + ".old")
+        shutil.rmtree(new_dir, ignore_errors=True)
+        new_dir.mkdir(parents=True)
+
+        new_entries = []
+        offset = 0
+        with open(new_dir / LOG_FILE, "wb") as log:
+            head = kept[0]
+            for entry, data in [(head, _encode(first_state))] + list(
+                zip(kept[1:], records)
+            ):
+                kind = KEYFRAME if entry is head else entry.kind
+                log.write(data)
+                new_entries.append(
+                    HistoryEntry(
+                        entry.version,
+                        entry.timestamp,
+                        kind,
+                        offset,
+                        len(data),
+                        entry.summary,
+                    )
+                )
+                offset += len(data)
+            log.flush()
+            os.fsync(log.fileno())
+        with open(new_dir / INDEX_FILE, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(e.to_dict()) + "\n" for e in new_entries)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(self.directory, old_dir)
+        os.replace(new_dir, self.directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+        removed = len(self._entries) - len(new_entries)
+        self._entries = new_entries
+        self._index_stamp = self._stamp()
+        return removed
+
+    def _read_raw(self, entries):
+        if not entries:
+            return []
+        start = entries[0].offset
+        end = entries[-1].offset + entries[-1].length
+        with open(self._log_path, "rb") as f:
+            f.seek(start)
+            data = f.read(end - start)
+        return [data[e.offset - start : e.offset - start + e.length] for e in entries]
+
+    def iter_snapshot_text(self):
+        """Yield the decoded JSON text of every record (used for blob GC)."""
+        with self._lock:
+            self._load()
+            for data in self._read_raw(self._entries):
+                yield zlib.decompress(data).decode("utf-8")
+
+    def clear(self):
+        with self._lock, file_lock(self._lock_path):
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self._entries = []
+            self._index_stamp = None
+            self._last_state = None
+
+
+_histories = {}
+_histories_lock = threading.Lock()
+
+
+def get_history(name):
+    """Shared history object for an automation."""
+    with _histories_lock:
+        history = _histories.get(name)
+        if history is None:
+            history = _histories[name] = AutomationHistory(name)
+        return history
+
+
+def rename_history(old_name, new_name, root=HISTORY_DIR):
+    """Move the history of a renamed automation to its new name."""
+    with _histories_lock:
+        history = _histories.pop(old_name, None)
+        _histories.pop(new_name, None)
+    if history is None or Path(root) != HISTORY_DIR:
+        history = AutomationHistory(old_name, root)
+    with history._lock, file_lock(history._lock_path):
+        history._recover_swap()
+        if not history.directory.exists():
+            return
+        target = Path(root) / new_name
+        # Left over from a deleted automation of the same name.
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(history.directory, target)
+        history._entries = None
+        history._last_state = None
+
+
+def history_names(root=HISTORY_DIR):
+    root = Path(root)
+    if not root.is_dir():
+        return []
+    return sorted(
+        p.name
+        for p in root.iterdir()
+        if p.is_dir() and not p.name.endswith((".old", ".new"))
+    )
+
+
+def prune_histories(
+    max_versions=HISTORY_MAX_VERSIONS,
+    max_age_days=HISTORY_MAX_AGE_DAYS,
+    automations_dir=AUTOMATIONS_DIR,
+):
+    """Prune every history; histories of deleted automations expire entirely."""
+    removed = 0
+    for name in history_names():
+        history = get_history(name)
+        removed += history.prune(max_versions=max_versions, max_age_days=max_age_days)
+        if not (Path(automations_dir) / f"{name}.json").exists():
+            versions = history.versions()
+            if versions and versions[-1].timestamp < time.time() - max_age_days * 86400:
+                history.clear()
+    return removed
+
+
+__all__ = [
+    "AutomationHistory",
+    "HistoryEntry",
+    "HISTORY_DIR",
+    "KEYFRAME_INTERVAL",
+    "get_history",
+    "history_names",
+    "prune_histories",
+    "rename_history",
+]
@@ -0,0 +1,366 @@
+"""
+Opt-in Prometheus/OpenMetrics endpoint.
+
+When the ``metrics_server_enabled`` setting is on, the GUI serves its
+metrics on ``http://127.0.0.1:<metrics_server_port>/metrics`` in the
+Prometheus text format; ``python -m nodebox scheduler --metrics-port N``
+does the same for the background scheduler.
+
+Metrics live in a ``MetricsRegistry`` fed in batches from the event bus
+(see ``connect_events``). Updates take the
+registry lock for a dictionary update; a scrape copies the values under
+the lock and formats them on the server thread, so a slow scraper never
+holds up the GUI thread.
+"""
+
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from nodebox.core.events import (
+    CacheHit,
+    NodeFinished,
+    RunFinished,
+    RunStarted,
+    get_event_bus,
+)
+from nodebox.core.process_sampler import live_workers
+
+DEFAULT_METRICS_PORT = 9464
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+NODE_DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+LATENESS_BUCKETS = (0.1, 0.5, 1, 2, 5, 10, 30, 60, 300, 900, 3600)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Family:
+    def __init__(self, name, help_text, kind, labelnames=(), buckets=None):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (math.inf,) if buckets else None
+        # label values -> float, or [bucket counts..., sum, count]
+        self.values = {}
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms with Prometheus text exposition."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families = {}
+        # name -> (help, callable returning {label tuple: value}, labelnames)
+        self._callbacks = {}
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._family(name, help_text, "counter", labelnames)
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._family(name, help_text, "gauge", labelnames)
+
+    def histogram(self, name, help_text, labelnames=(), buckets=NODE_DURATION_BUCKETS):
+        return self._family(name, help_text, "histogram", labelnames, buckets)
+
+    def gauge_callback(self, name, help_text, func, labelnames=()):
+        """A gauge evaluated on the scraping thread; ``func`` must be thread-safe."""
+        self._callbacks[name] = (help_text, func, tuple(labelnames))
+
+    def _family(self, name, help_text, kind, labelnames, buckets=None):
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = _Family(
+                name, help_text, kind, labelnames, buckets
+            )
+        return family
+
+    def inc(self, name, labels=(), amount=1.0):
+        family = self._families[name]
+        with self._lock:
+            family.values[labels] = family.values.get(labels, 0.0) + amount
+
+    def set(self, name, labels=(), value=0.0):
+        family = self._families[name]
+        with self._lock:
+            family.values[labels] = float(value)
+
+    def observe(self, name, value, labels=()):
+        family = self._families[name]
+        value = float(value)
+        with self._lock:
+            state = family.values.get(labels)
+            if state is None:
+                state = family.values[labels] = [0] * len(family.buckets) + [0.0, 0]
+            for i, bound in enumerate(family.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def snapshot(self):
+        """Copy of every family's values, taken under the lock."""
+        with self._lock:
+            return [
+                (
+                    family,
+                    {
+                        labels: list(v) if isinstance(v, list) else v
+                        for labels, v in family.values.items()
+                    },
+                )
+                for family in self._families.values()
+            ]
+
+    def render(self):
+        lines = []
+        for family, values in self.snapshot():
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for labels, value in sorted(values.items()):
+                if family.kind != "histogram":
+                    lines.append(
+                        f"{family.name}{_labels(family.labelnames, labels)} "
+                        f"{_number(value)}"
+                    )
+                    continue
+                for bound, count in zip(family.buckets, value):
+                    le = (("le", _number(float(bound))),)
+                    lines.append(
+                        f"{family.name}_bucket"
+                        f"{_labels(family.labelnames, labels, le)} {count}"
+                    )
+                lines.append(
+                    f"{family.name}_sum{_labels(family.labelnames, labels)} "
+                    f"{_number(value[-2])}"
+                )
+                lines.append(
+                    f"{family.name}_count{_labels(family.labelnames, labels)} "
+                    f"{value[-1]}"
+                )
+        for name, (help_text, func, labelnames) in self._callbacks.items():
+            try:
+                values = func()
+            except Exception:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in sorted(values.items()):
+                lines.append(f"{name}{_labels(labelnames, labels)} {_number(value)}")
+        lines.append("")
+        return "\n".join(lines)
+
+    # -- NodeBox metrics -------------------------------------------------------
+
+    def observe_run_started(self, event):
+        self.inc("nodebox_runs_in_progress", (event.source or "unknown",))
+
+    def observe_run_finished(self, event):
+        source = event.source or "unknown"
+        self.inc("nodebox_runs_in_progress", (source,), -1)
+        self.inc(
+            "nodebox_runs_total",
+            (event.automation or "", source, event.status or "ok"),
+        )
+        if event.error_count:
+            self.inc(
+                "nodebox_node_errors_total",
+                (event.automation or "",),
+                event.error_count,
+            )
+        if event.schedule and event.lateness_s is not None:
+            self.observe(
+                "nodebox_scheduler_lateness_seconds",
+                max(0.0, event.lateness_s),
+                (event.schedule,),
+            )
+        if event.schedule and event.queue_wait_s is not None:
+            self.observe(
+                "nodebox_scheduler_queue_wait_seconds",
+                max(0.0, event.queue_wait_s),
+                (event.schedule,),
+            )
+
+    def observe_node(self, event):
+        labels = (event.automation or "", event.node or "")
+        self.inc("nodebox_node_executions_total", labels)
+        if event.duration_s is not None:
+            self.observe("nodebox_node_duration_seconds", event.duration_s, labels)
+
+    def observe_cache(self, event):
+        self.inc(
+            "nodebox_cache_requests_total",
+            (event.cache or "", "hit" if event.hit else "miss"),
+        )
+
+    def observe_events(self, events):
+        """Account a batch from the event bus."""
+        for event in events:
+            handler = _OBSERVERS.get(type(event))
+            if handler is not None:
+                handler(self, event)
+
+
+_OBSERVERS = {
+    RunStarted: MetricsRegistry.observe_run_started,
+    RunFinished: MetricsRegistry.observe_run_finished,
+    NodeFinished: MetricsRegistry.observe_node,
+    CacheHit: MetricsRegistry.observe_cache,
+}
+
+
+def create_registry(worker_budget=None):
+    """Registry with the NodeBox metric families declared."""
+    registry = MetricsRegistry()
+    registry.counter(
+        "nodebox_runs_total",
+        "Automation runs by outcome.",
+        ("automation", "source", "status"),
+    )
+    registry.gauge(
+        "nodebox_runs_in_progress",
+        "Automation runs currently executing.",
+        ("source",),
+    )
+    registry.counter(
+        "nodebox_node_executions_total",
+        "Node executions.",
+        ("automation", "node"),
+    )
+    registry.histogram(
+        "nodebox_node_duration_seconds",
+        "Node execution time.",
+        ("automation", "node"),
+        NODE_DURATION_BUCKETS,
+    )
+    registry.counter(
+        "nodebox_node_errors_total",
+        "Nodes that failed, by automation.",
+        ("automation",),
+    )
+    registry.counter(
+        "nodebox_cache_requests_total",
+        "Cache lookups by result; hit rate is hit / (hit + miss).",
+        ("cache", "result"),
+    )
+    registry.histogram(
+        "nodebox_scheduler_lateness_seconds",
+        "Delay between a scheduled run's planned and actual start.",
+        ("schedule",),
+        LATENESS_BUCKETS,
+    )
+    registry.histogram(
+        "nodebox_scheduler_queue_wait_seconds",
+        "Time a scheduled run waited for a free worker.",
+        ("schedule",),
+        LATENESS_BUCKETS,
+    )
+    registry.gauge_callback(
+        "nodebox_node_workers",
+        "Node worker processes currently running.",
+        lambda: {(): len(live_workers())},
+    )
+    if worker_budget is not None:
+        registry.gauge_callback(
+            "nodebox_worker_budget",
+            "Automations the scheduler may run at the same time.",
+            lambda: {(): worker_budget() if callable(worker_budget) else worker_budget},
+        )
+    return registry
+
+
+def connect_events(registry, bus=None):
+    """Feed ``registry`` from the event bus; returns the subscription.
+
+    The registry is thread-safe, so batches are counted on the bus's
+    dispatcher thread; this needs no Qt event loop and works in the
+    scheduler daemon too.
+    """
+    bus = bus or get_event_bus()
+    return bus.subscribe(registry.observe_events, types=tuple(_OBSERVERS))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = None
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer:
+    """Serves a registry on localhost from a daemon thread."""
+
+    def __init__(self, registry, port=DEFAULT_METRICS_PORT, host="127.0.0.1"):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._httpd is not None
+
+    def start(self):
+        if self._httpd is not None:
+            return True
+        handler = type("Handler", (_MetricsHandler,), {"registry": self.registry})
+        try:
+            self._httpd = ThreadingHTTPServer((self.host, self.port), handler)
+        except OSError as e:
+            print(f"[Metrics] Cannot listen on {self.host}:{self.port}: {e}")
+            return False
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="nodebox-metrics", daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def stop(self):
+        if self._httpd is None:
+            return
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join(timeout=2.0)
+        self._httpd = None
+        self._thread = None
+
+
+__all__ = [
+    "DEFAULT_METRICS_PORT",
+    "MetricsRegistry",
+    "MetricsServer",
+    "connect_events",
+    "create_registry",
+]
@@ -0,0 +1,311 @@
+"""
+Rolling execution-time statistics per automation node.
+
+Every successful ``NodeFinished`` event updates the node's count, mean
+and variance (Welford), streaming p50/p95 estimates (the P² algorithm,
+five markers per quantile, so memory does not grow with the number of
+runs) and its last ``RECENT_SAMPLES`` durations. Nodes are keyed by
+automation and node title.
+
+Once a node has ``MIN_BASELINE_RUNS`` samples, a run that is both above
+its p95 and ``REGRESSION_FACTOR`` times its median is published as a
+``NodeRegression`` event; the debug console and the canvas show those.
+The sample is compared before it is folded into the baseline, so a node
+that stays slow becomes the new normal after a while.
+
+Statistics are saved to ``NODE_STATS_FILE`` after each batch that
+contains a finished run.
+"""
+
+import json
+import math
+import threading
+from bisect import bisect_right, insort
+from collections import deque
+
+from nodebox.core.atomic import atomic_write_json
+from nodebox.core.events import (
+    NodeFinished,
+    NodeRegression,
+    RunFinished,
+    get_event_bus,
+)
+from nodebox.core.paths import CACHE_DIR
+from nodebox.services.run_history import percentile
+
+NODE_STATS_FILE = CACHE_DIR / "node_stats.json"
+RECENT_SAMPLES = 20
+MIN_BASELINE_RUNS = 10
+REGRESSION_FACTOR = 2.0
+# Ignore regressions smaller than this; sub-second nodes are noisy.
+REGRESSION_MIN_DELTA_S = 0.5
+
+
+class P2Quantile:
+    """Streaming estimate of one quantile (Jain & Chlamtac's P²)."""
+
+    __slots__ = ("p", "heights", "positions", "desired")
+
+    def __init__(self, p):
+        self.p = p
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+
+    def add(self, x):
+        q = self.heights
+        if len(q) < 5:
+            insort(q, x)
+            return
+        n = self.positions
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = bisect_right(q, x) - 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        p = self.p
+        for i, step in enumerate((0, p / 2, p, (1 + p) / 2, 1)):
+            self.desired[i] += step
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def _parabolic(self, i, d):
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self):
+        if len(self.heights) < 5:
+            return percentile(self.heights, self.p * 100)
+        return self.heights[2]
+
+    def to_dict(self):
+        return {
+            "heights": list(self.heights),
+            "positions": list(self.positions),
+            "desired": list(self.desired),
+        }
+
+    @classmethod
+    def from_dict(cls, p, data):
+        quantile = cls(p)
+        quantile.heights = list(data["heights"])
+        quantile.positions = list(data["positions"])
+        quantile.desired = list(data["desired"])
+        return quantile
+
+
+class NodeStats:
+    __slots__ = ("count", "mean", "_m2", "p50", "p95", "recent", "last_run")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.p50 = P2Quantile(0.5)
+        self.p95 = P2Quantile(0.95)
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+        self.last_run = None
+
+    @property
+    def stdev(self):
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def add(self, duration_s, timestamp=None):
+        self.count += 1
+        delta = duration_s - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (duration_s - self.mean)
+        self.p50.add(duration_s)
+        self.p95.add(duration_s)
+        self.recent.append(round(duration_s, 4))
+        self.last_run = timestamp
+
+    def is_regression(self, duration_s):
+        """Whether ``duration_s`` is far outside this node's baseline."""
+        if self.count < MIN_BASELINE_RUNS:
+            return False
+        median, p95 = self.p50.value(), self.p95.value()
+        return (
+            duration_s > p95
+            and duration_s >= REGRESSION_FACTOR * median
+            and duration_s - median >= REGRESSION_MIN_DELTA_S
+        )
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_s": self.mean,
+            "stdev_s": self.stdev,
+            "p50_s": self.p50.value(),
+            "p95_s": self.p95.value(),
+            "recent_s": list(self.recent),
+            "last_run": self.last_run,
+        }
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self._m2,
+            "p50": self.p50.to_dict(),
+            "p95": self.p95.to_dict(),
+            "recent": list(self.recent),
+            "last_run": self.last_run,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.count = data["count"]
+        stats.mean = data["mean"]
+        stats._m2 = data["m2"]
+        stats.p50 = P2Quantile.from_dict(0.5, data["p50"])
+        stats.p95 = P2Quantile.from_dict(0.95, data["p95"])
+        stats.recent.extend(data.get("recent", ()))
+        stats.last_run = data.get("last_run")
+        return stats
+
+
+class NodeStatsStore:
+    """Per-node statistics keyed by ``(automation, node title)``."""
+
+    def __init__(self, path=NODE_STATS_FILE):
+        self.path = path
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._subscription = None
+        # Most recent regressions, for views opened after they happened.
+        self.regressions = deque(maxlen=50)
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            for entry in data.get("nodes", []):
+                try:
+                    stats = NodeStats.from_dict(entry["stats"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                self._stats[(entry["automation"], entry["node"])] = stats
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                "nodes": [
+                    {"automation": automation, "node": node, "stats": s.to_dict()}
+                    for (automation, node), s in self._stats.items()
+                ]
+            }
+            self._dirty = False
+        try:
+            atomic_write_json(self.path, data, separators=(",", ":"))
+        except OSError as e:
+            print(f"[NodeStats] Could not save statistics: {e}")
+
+    def get(self, automation, node):
+        """Summary dict for one node, or None if it never ran."""
+        with self._lock:
+            stats = self._stats.get((automation, node))
+            return stats.summary() if stats else None
+
+    def for_automation(self, automation):
+        with self._lock:
+            return {
+                node: stats.summary()
+                for (name, node), stats in self._stats.items()
+                if name == automation
+            }
+
+    def observe(self, automation, node, duration_s, node_id=None, timestamp=None):
+        """Add one duration; returns a ``NodeRegression`` if it was one."""
+        with self._lock:
+            stats = self._stats.get((automation, node))
+            if stats is None:
+                stats = self._stats[(automation, node)] = NodeStats()
+            regression = None
+            if stats.is_regression(duration_s):
+                regression = NodeRegression(
+                    automation,
+                    node,
+                    node_id,
+                    duration_s,
+                    stats.p50.value(),
+                    stats.p95.value(),
+                    stats.count,
+                )
+            stats.add(duration_s, timestamp)
+            self._dirty = True
+        if regression is not None:
+            self.regressions.append(regression)
+        return regression
+
+    def observe_events(self, events):
+        bus = get_event_bus()
+        run_finished = False
+        for event in events:
+            if isinstance(event, RunFinished):
+                run_finished = True
+            elif event.ok and event.duration_s is not None and event.automation:
+                regression = self.observe(
+                    event.automation,
+                    event.node,
+                    event.duration_s,
+                    event.node_id,
+                    event.timestamp,
+                )
+                if regression is not None:
+                    bus.publish(regression)
+        if run_finished:
+            self.save()
+
+    def subscribe(self, bus=None):
+        """Start tracking ``NodeFinished`` events from the event bus."""
+        if self._subscription is None:
+            self._subscription = (bus or get_event_bus()).subscribe(
+                self.observe_events, types=(NodeFinished, RunFinished)
+            )
+        return self._subscription
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_node_stats() -> NodeStatsStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = NodeStatsStore()
+    return _store
+
+
+__all__ = [
+    "NODE_STATS_FILE",
+    "NodeStats",
+    "NodeStatsStore",
+    "P2Quantile",
+    "get_node_stats",
+]
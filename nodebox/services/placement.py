@@ -0,0 +1,224 @@
+"""
+Load-aware placement of interval schedules.
+
+Schedules created at round minutes tend to fire in the same second and
+then leave the workers idle. ``spread_schedules`` moves the phase (the
+``next_run`` within one interval) of interval schedules so that their
+expected runs overlap as little as possible, given how long each
+automation usually takes according to the run history. Cron, daily and
+one-off schedules have fixed times; they are counted as load but never
+moved.
+
+Load is modelled as the number of runs in progress per ``BUCKET_S``
+second bucket over the next ``HORIZON_S`` seconds. For a schedule with a
+period of ``p`` buckets the profile is folded modulo ``p``, so every
+candidate phase is scored in time proportional to the run length rather
+than the number of occurrences in the horizon.
+"""
+
+import math
+import statistics
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from nodebox.services.run_history import read_runs
+from nodebox.services.scheduler import fire_time, following_occurrence
+
+BUCKET_S = 10
+HORIZON_S = 24 * 3600
+DEFAULT_DURATION_S = 30.0
+# Runs per automation considered when estimating its duration.
+DURATION_SAMPLE = 20
+# Phases tried per schedule; long intervals are searched on a coarser grid.
+MAX_CANDIDATES = 360
+
+
+def estimate_durations(runs=None):
+    """Typical run time in seconds per automation, from the run history.
+
+    The 75th percentile of recent completed runs is used so that the
+    estimate errs towards longer runs.
+    """
+    if runs is None:
+        runs = read_runs(limit=5000)
+    samples = defaultdict(list)
+    for run in runs:
+        if run.get("status") not in ("ok", "failed") or run.get("duration_s") is None:
+            continue
+        samples[run.get("automation")].append(float(run["duration_s"]))
+    durations = {}
+    for automation, values in samples.items():
+        values = values[-DURATION_SAMPLE:]
+        if len(values) == 1:
+            durations[automation] = values[0]
+        else:
+            durations[automation] = statistics.quantiles(values, n=4)[2]
+    return durations
+
+
+def _buckets(seconds):
+    return max(1, math.ceil(seconds / BUCKET_S))
+
+
+def _period_buckets(schedule):
+    return max(1, round(int(schedule.schedule_value) * 60 / BUCKET_S))
+
+
+def _is_movable(schedule):
+    if schedule.schedule_type != "interval" or not schedule.enabled:
+        return False
+    try:
+        return int(schedule.schedule_value) > 0
+    except ValueError:
+        return False
+
+
+def _occurrence_buckets(schedule, now, horizon):
+    """Start buckets of the schedule's runs within the horizon."""
+    start = fire_time(schedule)
+    if start is None or not schedule.enabled:
+        return []
+    end = now + timedelta(seconds=horizon * BUCKET_S)
+    starts = []
+    moment = schedule.next_run
+    while moment is not None and moment < end and len(starts) < horizon:
+        jittered = moment + (start - schedule.next_run)
+        offset = (jittered - now).total_seconds()
+        starts.append(max(0, int(offset // BUCKET_S)))
+        moment = following_occurrence(schedule, moment)
+    return starts
+
+
+def _add_runs(profile, starts, length):
+    horizon = len(profile)
+    for start in starts:
+        for b in range(start, start + length):
+            profile[b % horizon] += 1
+
+
+class LoadPlan:
+    """Result of ``spread_schedules``.
+
+    ``peak_before`` and ``peak_after`` are the expected maximum number of
+    runs in progress at once; ``moved`` maps schedule names to their new
+    ``next_run``.
+    """
+
+    __slots__ = ("peak_before", "peak_after", "budget", "moved")
+
+    def __init__(self, peak_before, peak_after, budget, moved):
+        self.peak_before = peak_before
+        self.peak_after = peak_after
+        self.budget = budget
+        self.moved = moved
+
+    def __repr__(self):
+        return (
+            f"LoadPlan(peak {self.peak_before} -> {self.peak_after}, "
+            f"budget={self.budget}, moved={len(self.moved)})"
+        )
+
+
+def load_profile(schedules, durations=None, now=None, horizon_s=HORIZON_S):
+    """Expected runs in progress per bucket with the current ``next_run`` values."""
+    durations = estimate_durations() if durations is None else durations
+    now = now or datetime.now()
+    horizon = horizon_s // BUCKET_S
+    profile = [0] * horizon
+    for schedule in schedules:
+        length = _buckets(durations.get(schedule.automation_name, DEFAULT_DURATION_S))
+        _add_runs(profile, _occurrence_buckets(schedule, now, horizon), length)
+    return profile
+
+
+def expected_peak(schedules, durations=None, now=None):
+    profile = load_profile(schedules, durations, now)
+    return max(profile, default=0)
+
+
+def _fold(profile, period):
+    """Per phase in one period: (max load, total load) over all periods."""
+    peaks = [0] * period
+    totals = [0] * period
+    for b, load in enumerate(profile):
+        j = b % period
+        if load > peaks[j]:
+            peaks[j] = load
+        totals[j] += load
+    return peaks, totals
+
+
+def _best_phase(profile, period, length, current):
+    """Phase (in buckets) whose runs meet the least existing load."""
+    peaks, totals = _fold(profile, period)
+    step = max(1, period // MAX_CANDIDATES)
+    candidates = list(range(0, period, step))
+    if current is not None:
+        # Listed first so an equally good current phase is kept.
+        candidates.insert(0, current % period)
+
+    best = None
+    best_cost = None
+    for phase in candidates:
+        peak = 0
+        overlap = 0
+        for k in range(length):
+            j = (phase + k) % period
+            peak = max(peak, peaks[j])
+            overlap += totals[j]
+        cost = (peak, overlap)
+        if best_cost is None or cost < best_cost:
+            best, best_cost = phase, cost
+    return best
+
+
+def spread_schedules(schedules, budget, durations=None, now=None):
+    """Re-phase interval schedules to flatten the expected load.
+
+    Schedules with fixed times are placed first, then interval schedules
+    from the busiest (longest run relative to its interval) to the least
+    busy, each at the phase where it overlaps least with what is already
+    placed. ``next_run`` is updated in place for schedules that move.
+    """
+    durations = estimate_durations() if durations is None else durations
+    now = (now or datetime.now()).replace(microsecond=0)
+    horizon = HORIZON_S // BUCKET_S
+    peak_before = max(load_profile(schedules, durations, now), default=0)
+
+    def length_of(schedule):
+        return _buckets(durations.get(schedule.automation_name, DEFAULT_DURATION_S))
+
+    movable = [s for s in schedules if _is_movable(s)]
+    profile = [0] * horizon
+    for schedule in schedules:
+        if not _is_movable(schedule):
+            starts = _occurrence_buckets(schedule, now, horizon)
+            _add_runs(profile, starts, length_of(schedule))
+
+    movable.sort(key=lambda s: length_of(s) / _period_buckets(s), reverse=True)
+    moved = {}
+    for schedule in movable:
+        period = _period_buckets(schedule)
+        length = length_of(schedule)
+        current = None
+        if schedule.next_run is not None and schedule.next_run > now:
+            current = int((schedule.next_run - now).total_seconds() // BUCKET_S)
+        phase = _best_phase(profile, period, length, current)
+        if current is None or phase != current % period:
+            # Phase 0 would be "now"; use a full period instead.
+            offset = phase or period
+            schedule.next_run = now + timedelta(seconds=offset * BUCKET_S)
+            moved[schedule.name] = schedule.next_run
+        _add_runs(profile, _occurrence_buckets(schedule, now, horizon), length)
+
+    return LoadPlan(peak_before, max(profile, default=0), budget, moved)
+
+
+__all__ = [
+    "BUCKET_S",
+    "LoadPlan",
+    "estimate_durations",
+    "expected_peak",
+    "load_profile",
+    "spread_schedules",
+]
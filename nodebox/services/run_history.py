@@ -0,0 +1,120 @@
+"""
+Append-only log of automation runs.
+
+Every run, whether started by the GUI or the background scheduler, is
+appended as one JSON line to ``RUN_HISTORY_FILE``. The file is rotated
+once it grows past ``RUN_HISTORY_MAX_BYTES``, keeping one previous file.
+"""
+
+import json
+import math
+import os
+import threading
+from collections import defaultdict, deque
+from contextlib import suppress
+
+from nodebox.core.paths import LOGS_DIR
+
+RUN_HISTORY_FILE = LOGS_DIR / "run_history.jsonl"
+RUN_HISTORY_MAX_BYTES = 5 * 1024 * 1024
+# Most recent runs per schedule included in timing statistics.
+STATS_WINDOW = 200
+STATS_PERCENTILES = (50, 95, 99)
+STATS_FIELDS = ("lateness_s", "queue_wait_s", "duration_s")
+
+_lock = threading.Lock()
+
+
+def _rotate(path):
+    try:
+        if os.path.getsize(path) < RUN_HISTORY_MAX_BYTES:
+            return
+    except OSError:
+        return
+    with suppress(OSError):
+        os.replace(path, str(path) + ".1")
+
+
+def record_run(entry, path=RUN_HISTORY_FILE):
+    """Append one run record.
+
+    Lines are written with a single ``write`` call in append mode, so
+    records from the GUI and the scheduler daemon never interleave.
+    """
+    line = json.dumps(entry, default=str, separators=(",", ":")) + "\n"
+    with _lock:
+        _rotate(path)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def read_runs(limit=None, automation=None, path=RUN_HISTORY_FILE):
+    """Return run records, oldest first, optionally only the last ``limit``."""
+    runs = deque(maxlen=limit)
+    for candidate in (str(path) + ".1", path):
+        try:
+            with open(candidate, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if automation is None or entry.get("automation") == automation:
+                        runs.append(entry)
+        except OSError:
+            continue
+    return list(runs)
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _summarize(values):
+    values = sorted(values)
+    summary = {f"p{q}": percentile(values, q) for q in STATS_PERCENTILES}
+    summary["max"] = values[-1] if values else None
+    return summary
+
+
+def schedule_stats(runs=None, window=STATS_WINDOW):
+    """Lateness, queue wait and duration percentiles per schedule.
+
+    Returns ``{schedule: {"runs": n, "lateness_s": {"p50": ..}, ...}}``
+    plus an ``"*"`` entry over all schedules. Runs without a schedule
+    (started by hand) are ignored.
+    """
+    if runs is None:
+        runs = read_runs()
+    per_schedule = defaultdict(lambda: deque(maxlen=window))
+    for run in runs:
+        if run.get("schedule") and run.get("status") != "skipped":
+            per_schedule[run["schedule"]].append(run)
+
+    stats = {}
+    combined = defaultdict(list)
+    for name, recent in per_schedule.items():
+        entry = {"runs": len(recent)}
+        for field in STATS_FIELDS:
+            values = [r[field] for r in recent if r.get(field) is not None]
+            combined[field].extend(values)
+            entry[field] = _summarize(values)
+        stats[name] = entry
+    if stats:
+        stats["*"] = {"runs": sum(s["runs"] for s in stats.values())}
+        for field in STATS_FIELDS:
+            stats["*"][field] = _summarize(combined[field])
+    return stats
+
+
+__all__ = [
+    "RUN_HISTORY_FILE",
+    "percentile",
+    "read_runs",
+    "record_run",
+    "schedule_stats",
+]
@@ -2,6 +2,43 @@
 Workflow Scheduling Service Data Structures.
 """
 
+import hashlib
+import heapq
+import itertools
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from nodebox.core.atomic import atomic_write_bytes, atomic_write_json, file_lock
+from nodebox.core.paths import APP_DATA_DIR
+from nodebox.services.cron import CronError, parse_cron
+
+# Next to the scheduler lock, so the GUI and the daemon share it no matter
+# which directory they were started from.
+SCHEDULES_FILE = APP_DATA_DIR / "schedules.json"
+# Where earlier versions kept it, relative to the working directory.
+LEGACY_SCHEDULES_FILE = Path("data") / "schedules.json"
+
+# What to do with occurrences that were missed while nothing was running
+# (machine asleep, app and daemon closed) by more than the grace window.
+MISFIRE_SKIP = "skip"
+MISFIRE_RUN_ONCE = "run_once"
+MISFIRE_RUN_ALL = "run_all"
+MISFIRE_POLICIES = (MISFIRE_RUN_ONCE, MISFIRE_SKIP, MISFIRE_RUN_ALL)
+
+DEFAULT_GRACE_SECONDS = 60
+# "watch" schedules run when files land in the directory in schedule_value;
+# a burst of events is batched into one run once it has been quiet this long.
+DEFAULT_DEBOUNCE_SECONDS = 2.0
+DEFAULT_MISFIRE_LIMIT = 10
+# Upper bound on occurrences examined when catching up a long outage.
+MAX_MISSED_SCAN = 10000
+
+# Editing any of these makes a freshly computed next_run authoritative over
+# the one kept by the process that fires schedules.
+_TIMING_FIELDS = ("schedule_type", "schedule_value", "timezone", "enabled")
+
 
 class ScheduleItem:
     __slots__ = [
@@ -13,10 +50,31 @@ class ScheduleItem:
         "last_run",
         "next_run",
         "run_count",
+        "timezone",
+        "misfire_policy",
+        "misfire_limit",
+        "max_concurrency",
+        "grace_seconds",
+        "watch_pattern",
+        "debounce_seconds",
+        "jitter_seconds",
     ]
 
     def __init__(
-        self, name, automation_name, schedule_type, schedule_value, enabled=True
+        self,
+        name,
+        automation_name,
+        schedule_type,
+        schedule_value,
+        enabled=True,
+        timezone=None,
+        misfire_policy=MISFIRE_RUN_ONCE,
+        misfire_limit=DEFAULT_MISFIRE_LIMIT,
+        max_concurrency=1,
+        grace_seconds=DEFAULT_GRACE_SECONDS,
+        watch_pattern="*",
+        debounce_seconds=DEFAULT_DEBOUNCE_SECONDS,
+        jitter_seconds=0,
     ):
         self.name = name
         self.automation_name = automation_name
@@ -26,6 +84,422 @@ class ScheduleItem:
         self.last_run = None
         self.next_run = None
         self.run_count = 0
+        # IANA zone name for cron and daily schedules; None is local time.
+        self.timezone = timezone
+        self.misfire_policy = misfire_policy
+        # With run_all, at most this many missed occurrences are replayed.
+        self.misfire_limit = misfire_limit
+        # Runs of this schedule allowed at once; 1 prevents overlapping runs.
+        self.max_concurrency = max_concurrency
+        # A run starting this late still counts as on time.
+        self.grace_seconds = grace_seconds
+        # Glob for file names that fire a watch schedule.
+        self.watch_pattern = watch_pattern
+        self.debounce_seconds = debounce_seconds
+        # Each run starts up to this much after next_run, see fire_time.
+        self.jitter_seconds = jitter_seconds
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "automation_name": self.automation_name,
+            "schedule_type": self.schedule_type,
+            "schedule_value": self.schedule_value,
+            "enabled": self.enabled,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "next_run": self.next_run.isoformat() if self.next_run else None,
+            "run_count": self.run_count,
+            "timezone": self.timezone,
+            "misfire_policy": self.misfire_policy,
+            "misfire_limit": self.misfire_limit,
+            "max_concurrency": self.max_concurrency,
+            "grace_seconds": self.grace_seconds,
+            "watch_pattern": self.watch_pattern,
+            "debounce_seconds": self.debounce_seconds,
+            "jitter_seconds": self.jitter_seconds,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        schedule = cls(
+            data["name"],
+            data["automation_name"],
+            data["schedule_type"],
+            data["schedule_value"],
+            data["enabled"],
+            data.get("timezone"),
+            data.get("misfire_policy", MISFIRE_RUN_ONCE),
+            data.get("misfire_limit", DEFAULT_MISFIRE_LIMIT),
+            data.get("max_concurrency", 1),
+            data.get("grace_seconds", DEFAULT_GRACE_SECONDS),
+            data.get("watch_pattern", "*"),
+            data.get("debounce_seconds", DEFAULT_DEBOUNCE_SECONDS),
+            data.get("jitter_seconds", 0),
+        )
+        schedule.last_run = (
+            datetime.fromisoformat(data["last_run"]) if data.get("last_run") else None
+        )
+        schedule.next_run = (
+            datetime.fromisoformat(data["next_run"]) if data.get("next_run") else None
+        )
+        schedule.run_count = data.get("run_count", 0)
+        return schedule
+
+
+def cron_expression(schedule):
+    """``CronExpression`` behind a cron or ``HH:MM`` daily schedule, or None."""
+    if schedule.schedule_type == "cron":
+        return parse_cron(schedule.schedule_value, schedule.timezone)
+    if schedule.schedule_type == "daily":
+        hour, sep, minute = str(schedule.schedule_value).strip().partition(":")
+        if sep and hour.isdigit() and minute.isdigit():
+            return parse_cron(f"{int(minute)} {int(hour)} * * *", schedule.timezone)
+    return None
+
+
+def validate_schedule(schedule):
+    """Raise ValueError if the schedule value cannot be interpreted."""
+    if schedule.schedule_type == "interval":
+        if int(schedule.schedule_value) <= 0:
+            raise ValueError("interval must be a positive number of minutes")
+    elif schedule.schedule_type == "cron":
+        cron_expression(schedule)
+    elif schedule.schedule_type == "daily":
+        if schedule.schedule_value and cron_expression(schedule) is None:
+            raise ValueError("daily time must be HH:MM")
+    elif schedule.schedule_type == "once":
+        if schedule.schedule_value:
+            datetime.fromisoformat(schedule.schedule_value.strip())
+    elif schedule.schedule_type == "watch":
+        if not os.path.isdir(os.path.expanduser(schedule.schedule_value)):
+            raise ValueError(f"not a directory: {schedule.schedule_value}")
+        if schedule.debounce_seconds < 0:
+            raise ValueError("debounce cannot be negative")
+    if schedule.misfire_policy not in MISFIRE_POLICIES:
+        raise ValueError(f"unknown misfire policy: {schedule.misfire_policy!r}")
+    if schedule.max_concurrency < 1:
+        raise ValueError("max concurrency must be at least 1")
+    if schedule.grace_seconds < 0 or schedule.misfire_limit < 0:
+        raise ValueError("grace window and misfire limit cannot be negative")
+    if schedule.jitter_seconds < 0:
+        raise ValueError("jitter cannot be negative")
+
+
+def jitter_offset(schedule, moment=None):
+    """Deterministic delay in ``[0, jitter_seconds)`` for one occurrence.
+
+    Derived from the schedule name and the occurrence, so it is stable
+    across restarts and between the GUI and the daemon, and next_run
+    itself stays on the schedule's grid.
+    """
+    moment = moment or schedule.next_run
+    if not schedule.jitter_seconds or moment is None:
+        return 0.0
+    digest = hashlib.blake2b(
+        f"{schedule.name}|{moment.isoformat()}".encode("utf-8"), digest_size=8
+    ).digest()
+    return int.from_bytes(digest, "big") / 2**64 * schedule.jitter_seconds
+
+
+def fire_time(schedule):
+    """When the current occurrence actually starts: next_run plus jitter."""
+    if schedule.next_run is None:
+        return None
+    return schedule.next_run + timedelta(seconds=jitter_offset(schedule))
+
+
+def update_next_run(schedule, now=None):
+    """Set ``schedule.next_run`` (naive local time) for the run after ``now``."""
+    now = now or datetime.now()
+
+    if schedule.schedule_type == "interval":
+        interval = timedelta(minutes=int(schedule.schedule_value))
+        if schedule.next_run is None:
+            schedule.next_run = now + interval
+        elif schedule.next_run <= now:
+            # Stay on the original grid so spread-out phases are kept.
+            skipped = (now - schedule.next_run) // interval + 1
+            schedule.next_run += skipped * interval
+    elif schedule.schedule_type in ("cron", "daily"):
+        try:
+            cron = cron_expression(schedule)
+        except CronError:
+            cron = None
+        if cron is None:
+            # Daily schedules without a time of day repeat every 24 hours.
+            schedule.next_run = (
+                now + timedelta(days=1) if schedule.schedule_type == "daily" else None
+            )
+        else:
+            next_fire = cron.next_after(now)
+            schedule.next_run = (
+                next_fire.astimezone().replace(tzinfo=None) if next_fire else None
+            )
+        if schedule.next_run is None:
+            schedule.enabled = False
+    elif schedule.schedule_type == "watch":
+        # Fired by file events, see services/triggers.py.
+        schedule.next_run = None
+    elif schedule.schedule_type == "once":
+        run_at = None
+        if schedule.run_count == 0 and schedule.schedule_value:
+            try:
+                run_at = datetime.fromisoformat(schedule.schedule_value.strip())
+            except ValueError:
+                pass
+            if run_at is not None and run_at.tzinfo is not None:
+                run_at = run_at.astimezone().replace(tzinfo=None)
+        if run_at is not None and run_at > now:
+            schedule.next_run = run_at
+        else:
+            schedule.enabled = False
+            schedule.next_run = None
+
+
+def following_occurrence(schedule, moment):
+    """Scheduled time after ``moment`` ignoring state, or None."""
+    if schedule.schedule_type == "interval":
+        return moment + timedelta(minutes=int(schedule.schedule_value))
+    if schedule.schedule_type in ("cron", "daily"):
+        try:
+            cron = cron_expression(schedule)
+        except CronError:
+            return None
+        if cron is None:
+            return moment + timedelta(days=1)
+        next_fire = cron.next_after(moment)
+        return next_fire.astimezone().replace(tzinfo=None) if next_fire else None
+    return None
+
+
+class DueRun:
+    """Outcome of one schedule coming due.
+
+    ``runs`` is how many times to run the automation back to back (0 when
+    the firing was skipped, see ``reason``); ``missed`` counts occurrences
+    that were later than the grace window. ``planned_at`` is the start
+    the schedule asked for (next_run plus jitter).
+    """
+
+    __slots__ = ("schedule", "runs", "missed", "reason", "planned_at")
+
+    def __init__(self, schedule, runs, missed=0, reason=None, planned_at=None):
+        self.schedule = schedule
+        self.runs = runs
+        self.missed = missed
+        self.reason = reason
+        self.planned_at = planned_at
+
+    def __repr__(self):
+        return (
+            f"DueRun({self.schedule.name!r}, runs={self.runs}, "
+            f"missed={self.missed}, reason={self.reason!r})"
+        )
+
+
+def plan_runs(schedule, now):
+    """Apply the grace window and misfire policy to an overdue schedule.
+
+    Returns ``(runs, missed)``.
+    """
+    grace_cutoff = now - timedelta(
+        seconds=schedule.grace_seconds + schedule.jitter_seconds
+    )
+    on_time = missed = 0
+    moment = schedule.next_run
+    while moment is not None and moment <= now and on_time + missed < MAX_MISSED_SCAN:
+        if moment >= grace_cutoff:
+            on_time += 1
+        else:
+            missed += 1
+        moment = following_occurrence(schedule, moment)
+
+    if schedule.misfire_policy == MISFIRE_SKIP:
+        runs = 1 if on_time else 0
+    elif schedule.misfire_policy == MISFIRE_RUN_ALL:
+        runs = on_time + min(missed, schedule.misfire_limit)
+    else:
+        runs = 1 if on_time or missed else 0
+    return runs, missed
+
+
+def collect_due(queue, now=None, running=None):
+    """Pop due schedules from ``queue`` and decide what to run.
+
+    ``running(name)`` returns how many runs of a schedule are in flight;
+    schedules already at ``max_concurrency`` are skipped for this
+    occurrence rather than started on top of the previous run. Every due
+    schedule is advanced to its next occurrence and pushed back, and a
+    ``DueRun`` is returned for each, including skipped ones.
+    """
+    now = now or datetime.now()
+    results = []
+    for schedule in queue.pop_due(now):
+        planned_at = fire_time(schedule)
+        runs, missed = plan_runs(schedule, now)
+        reason = None
+        if runs == 0:
+            reason = "misfire"
+        elif running is not None and running(schedule.name) >= schedule.max_concurrency:
+            runs, reason = 0, "overlap"
+
+        if runs:
+            schedule.last_run = now
+            schedule.run_count += runs
+        update_next_run(schedule, now)
+        queue.push(schedule)
+        results.append(DueRun(schedule, runs, missed, reason, planned_at))
+    return results
+
+
+def migrate_legacy_schedules(path=SCHEDULES_FILE, legacy_path=LEGACY_SCHEDULES_FILE):
+    """Copy ``data/schedules.json`` to ``path`` if ``path`` does not exist yet.
+
+    Returns True if schedules were migrated. The old file is left in place.
+    """
+    path, legacy_path = Path(path), Path(legacy_path)
+    if path.exists() or not legacy_path.is_file():
+        return False
+    try:
+        atomic_write_bytes(path, legacy_path.read_bytes())
+    except OSError as e:
+        print(f"[Scheduler] Could not migrate {legacy_path}: {e}")
+        return False
+    print(f"[Scheduler] Moved schedules from {legacy_path.resolve()} to {path}")
+    return True
+
+
+def merge_schedule_edits(edited, on_disk, known_names=()):
+    """Combine a non-owner's edited schedules with the owner's file.
+
+    Schedules in both keep the run state from ``on_disk``; ``next_run`` is
+    only taken from ``edited`` when the edit changed when the schedule
+    fires. Schedules only on disk are kept unless their name is in
+    ``known_names`` (they were loaded before, so the user deleted them).
+    The schedules in ``edited`` are updated in place.
+    """
+    current = {schedule.name: schedule for schedule in on_disk}
+    merged = []
+    for schedule in edited:
+        owner = current.pop(schedule.name, None)
+        if owner is not None:
+            schedule.last_run = owner.last_run
+            schedule.run_count = owner.run_count
+            if all(
+                getattr(schedule, field) == getattr(owner, field)
+                for field in _TIMING_FIELDS
+            ):
+                schedule.next_run = owner.next_run
+        merged.append(schedule)
+    merged.extend(s for s in current.values() if s.name not in known_names)
+    return merged
+
+
+def load_schedules(path=SCHEDULES_FILE):
+    with open(path, "r") as f:
+        return [ScheduleItem.from_dict(data) for data in json.load(f)]
+
+
+def save_schedules(schedules, path=SCHEDULES_FILE):
+    atomic_write_json(path, [s.to_dict() for s in schedules], separators=(",", ":"))
+
+
+def schedules_lock(path=SCHEDULES_FILE):
+    """Lock held around every read-merge-write of the schedules file.
+
+    A process that does not own the schedules merges its edits into the
+    file; without the lock the owner could write run state in between and
+    have it overwritten.
+    """
+    return file_lock(Path(f"{path}.lock"))
+
+
+class ScheduleQueue:
+    """Min-heap of enabled schedules ordered by ``fire_time``.
+
+    Updating a schedule pushes a fresh heap entry and bumps its generation;
+    superseded entries are skipped when they reach the top and the heap is
+    compacted once they outnumber the live ones.
+    """
+
+    def __init__(self, schedules=()):
+        self._heap = []
+        self._generation = {}
+        self._counter = itertools.count()
+        self.rebuild(schedules)
+
+    def rebuild(self, schedules):
+        self._generation = {}
+        self._heap = []
+        for schedule in schedules:
+            if schedule.enabled and schedule.next_run is not None:
+                generation = next(self._counter)
+                self._generation[id(schedule)] = generation
+                self._heap.append((fire_time(schedule), generation, schedule))
+        heapq.heapify(self._heap)
+
+    def push(self, schedule):
+        """Insert or reposition ``schedule`` after its fields changed."""
+        if not schedule.enabled or schedule.next_run is None:
+            self.remove(schedule)
+            return
+        generation = next(self._counter)
+        self._generation[id(schedule)] = generation
+        heapq.heappush(self._heap, (fire_time(schedule), generation, schedule))
+        self._maybe_compact()
+
+    def remove(self, schedule):
+        self._generation.pop(id(schedule), None)
+        self._maybe_compact()
+
+    def _is_live(self, entry):
+        return self._generation.get(id(entry[2])) == entry[1]
+
+    def _maybe_compact(self):
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._generation):
+            self._heap = [entry for entry in self._heap if self._is_live(entry)]
+            heapq.heapify(self._heap)
+
+    def _discard_stale(self):
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+
+    def peek_time(self):
+        """``fire_time`` of the earliest schedule, or None when idle."""
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """Remove and return every schedule due at ``now``, earliest first."""
+        due = []
+        while True:
+            self._discard_stale()
+            if not self._heap or self._heap[0][0] > now:
+                return due
+            _, _, schedule = heapq.heappop(self._heap)
+            self._generation.pop(id(schedule), None)
+            due.append(schedule)
+
+    def __len__(self):
+        return len(self._generation)
 
 
-__all__ = ["ScheduleItem"]
+__all__ = [
+    "ScheduleItem",
+    "ScheduleQueue",
+    "DueRun",
+    "MISFIRE_POLICIES",
+    "collect_due",
+    "plan_runs",
+    "SCHEDULES_FILE",
+    "merge_schedule_edits",
+    "migrate_legacy_schedules",
+    "cron_expression",
+    "validate_schedule",
+    "fire_time",
+    "following_occurrence",
+    "update_next_run",
+    "load_schedules",
+    "save_schedules",
+    "schedules_lock",
+]
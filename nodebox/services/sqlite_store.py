@@ -0,0 +1,571 @@
+"""
+SQLite storage backend for automations.
+
+Each automation is split into ``nodes``, ``connections`` and ``outputs`` rows
+so that moving a node or editing its code is a single small transaction
+instead of a rewrite of the whole automation file. Everything that is not a
+node or a connection (requirements, last run, ...) lives in the automation's
+``meta`` JSON column.
+
+The backend is opt-in through the ``storage_backend`` setting. The JSON file
+in ``AUTOMATIONS_DIR`` is still created for every automation and remains the
+entry the home screen lists; when the SQLite backend is enabled the database
+is authoritative for its contents.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from nodebox.core.atomic import atomic_write_json
+from nodebox.core.paths import APP_DATA_DIR, AUTOMATIONS_DIR
+from nodebox.core.settings import get_setting
+
+DATABASE_FILE = APP_DATA_DIR / "automations.db"
+SCHEMA_VERSION = 1
+
+# Node widgets are anchored at their top-left corner; viewport queries are
+# widened by the node size so partially visible nodes are included.
+NODE_WIDTH = 210
+NODE_HEIGHT = 115
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS automations (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    meta TEXT NOT NULL DEFAULT '{}',
+    updated_at REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    automation_id INTEGER NOT NULL REFERENCES automations(id) ON DELETE CASCADE,
+    node_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    x INTEGER NOT NULL DEFAULT 0,
+    y INTEGER NOT NULL DEFAULT 0,
+    code TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (automation_id, node_id)
+);
+CREATE INDEX IF NOT EXISTS nodes_position ON nodes (automation_id, x, y);
+CREATE TABLE IF NOT EXISTS connections (
+    automation_id INTEGER NOT NULL REFERENCES automations(id) ON DELETE CASCADE,
+    from_node_id TEXT NOT NULL,
+    from_port_type TEXT NOT NULL,
+    to_node_id TEXT NOT NULL,
+    to_port_type TEXT NOT NULL,
+    PRIMARY KEY (automation_id, from_node_id, from_port_type, to_node_id, to_port_type)
+);
+CREATE INDEX IF NOT EXISTS connections_to ON connections (automation_id, to_node_id);
+CREATE TABLE IF NOT EXISTS outputs (
+    automation_id INTEGER NOT NULL REFERENCES automations(id) ON DELETE CASCADE,
+    node_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (automation_id, node_id, key)
+);
+"""
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+class SQLiteAutomationStore:
+    """Row-level automation storage.
+
+    A single connection is shared between threads and guarded by a lock;
+    every public write runs in its own ``BEGIN IMMEDIATE`` transaction.
+    """
+
+    def __init__(self, db_path=DATABASE_FILE):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._ids = {}
+        self._conn = sqlite3.connect(
+            str(self.db_path), isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        with self.transaction() as cur:
+            for statement in _SCHEMA.split(";"):
+                if statement.strip():
+                    cur.execute(statement)
+            cur.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                yield cur
+            except BaseException:
+                cur.execute("ROLLBACK")
+                # Ids created inside the rolled back transaction are gone.
+                self._ids.clear()
+                raise
+            else:
+                cur.execute("COMMIT")
+            finally:
+                cur.close()
+
+    # -- automations -------------------------------------------------------
+
+    def _automation_id(self, cur, name, create=True):
+        automation_id = self._ids.get(name)
+        if automation_id is not None:
+            return automation_id
+        row = cur.execute(
+            "SELECT id FROM automations WHERE name = ?", (name,)
+        ).fetchone()
+        if row is None:
+            if not create:
+                return None
+            cur.execute(
+                "INSERT INTO automations (name, updated_at) VALUES (?, ?)",
+                (name, time.time()),
+            )
+            automation_id = cur.lastrowid
+        else:
+            automation_id = row[0]
+        self._ids[name] = automation_id
+        return automation_id
+
+    def _touch(self, cur, automation_id):
+        cur.execute(
+            "UPDATE automations SET updated_at = ? WHERE id = ?",
+            (time.time(), automation_id),
+        )
+
+    def has_automation(self, name):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM automations WHERE name = ?", (name,)
+            ).fetchone()
+        return row is not None
+
+    def list_automations(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name FROM automations ORDER BY name COLLATE NOCASE"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def delete_automation(self, name):
+        with self.transaction() as cur:
+            cur.execute("DELETE FROM automations WHERE name = ?", (name,))
+            self._ids.pop(name, None)
+
+    def rename_automation(self, old_name, new_name):
+        """Give an automation a new name; its rows are kept as they are."""
+        with self.transaction() as cur:
+            automation_id = self._automation_id(cur, old_name, create=False)
+            if automation_id is None:
+                raise KeyError(old_name)
+            if self._automation_id(cur, new_name, create=False) is not None:
+                raise ValueError(f"Automation already exists: {new_name}")
+            (meta,) = cur.execute(
+                "SELECT meta FROM automations WHERE id = ?", (automation_id,)
+            ).fetchone()
+            meta = json.loads(meta)
+            if "name" in meta:
+                meta["name"] = new_name
+            cur.execute(
+                "UPDATE automations SET name = ?, meta = ?, updated_at = ? "
+                "WHERE id = ?",
+                (new_name, _dumps(meta), time.time(), automation_id),
+            )
+            self._ids.pop(old_name, None)
+            self._ids[new_name] = automation_id
+
+    def copy_automation(self, source_name, target_name):
+        """Store a copy of ``source_name`` under ``target_name``."""
+        data = self.load_automation(source_name)
+        if data is None:
+            raise KeyError(source_name)
+        if "name" in data:
+            data["name"] = target_name
+        self.save_automation(target_name, data)
+
+    def set_meta(self, name, meta):
+        meta = {k: v for k, v in meta.items() if k not in ("nodes", "connections")}
+        with self.transaction() as cur:
+            automation_id = self._automation_id(cur, name)
+            cur.execute(
+                "UPDATE automations SET meta = ?, updated_at = ? WHERE id = ?",
+                (_dumps(meta), time.time(), automation_id),
+            )
+
+    def save_automation(self, name, data):
+        """Replace an automation with the contents of a JSON-style dict."""
+        with self.transaction() as cur:
+            automation_id = self._automation_id(cur, name)
+            for table in ("nodes", "connections", "outputs"):
+                cur.execute(
+                    f"DELETE FROM {table} WHERE automation_id = ?", (automation_id,)
+                )
+            meta = {k: v for k, v in data.items() if k not in ("nodes", "connections")}
+            cur.execute(
+                "UPDATE automations SET meta = ?, updated_at = ? WHERE id = ?",
+                (_dumps(meta), time.time(), automation_id),
+            )
+            for node in data.get("nodes", []):
+                self._upsert_node(cur, automation_id, node)
+            cur.executemany(
+                "INSERT OR IGNORE INTO connections VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        automation_id,
+                        c["from_node_id"],
+                        c["from_port_type"],
+                        c["to_node_id"],
+                        c["to_port_type"],
+                    )
+                    for c in data.get("connections", [])
+                ],
+            )
+
+    def load_meta(self, name):
+        """Return an automation's metadata with empty node and connection lists."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT meta FROM automations WHERE name = ?", (name,)
+            ).fetchone()
+        if row is None:
+            return None
+        data = json.loads(row[0])
+        data["nodes"] = []
+        data["connections"] = []
+        return data
+
+    def load_automation(self, name, viewport=None, skip=()):
+        """Return an automation in the JSON file layout, or None.
+
+        ``viewport`` is an optional ``(left, top, right, bottom)`` rectangle
+        in canvas coordinates. When given, only nodes intersecting it are
+        returned, together with every connection touching those nodes, and
+        ``skip`` lists ids of nodes the caller already has; they are left
+        out along with their outputs.
+        """
+        with self._lock:
+            cur = self._conn.cursor()
+            try:
+                automation_id = self._automation_id(cur, name, create=False)
+                if automation_id is None:
+                    return None
+                meta_row = cur.execute(
+                    "SELECT meta FROM automations WHERE id = ?", (automation_id,)
+                ).fetchone()
+                data = json.loads(meta_row[0]) if meta_row else {}
+
+                if viewport is None:
+                    node_rows = cur.execute(
+                        "SELECT node_id, name, x, y, code FROM nodes "
+                        "WHERE automation_id = ? ORDER BY rowid",
+                        (automation_id,),
+                    ).fetchall()
+                else:
+                    left, top, right, bottom = viewport
+                    node_rows = cur.execute(
+                        "SELECT node_id, name, x, y, code FROM nodes "
+                        "WHERE automation_id = ? AND x BETWEEN ? AND ? "
+                        "AND y BETWEEN ? AND ? ORDER BY rowid",
+                        (
+                            automation_id,
+                            left - NODE_WIDTH,
+                            right,
+                            top - NODE_HEIGHT,
+                            bottom,
+                        ),
+                    ).fetchall()
+
+                if viewport is None:
+                    output_rows = cur.execute(
+                        "SELECT node_id, key, value FROM outputs "
+                        "WHERE automation_id = ?",
+                        (automation_id,),
+                    )
+                else:
+                    skip = set(skip)
+                    node_rows = [row for row in node_rows if row[0] not in skip]
+                    # The visible ids go into a temp table so the outputs
+                    # and connections queries stay on their indexes.
+                    cur.execute(
+                        "CREATE TEMP TABLE IF NOT EXISTS visible_nodes "
+                        "(node_id TEXT PRIMARY KEY)"
+                    )
+                    cur.execute("DELETE FROM temp.visible_nodes")
+                    cur.executemany(
+                        "INSERT OR IGNORE INTO temp.visible_nodes VALUES (?)",
+                        [(row[0],) for row in node_rows],
+                    )
+                    output_rows = cur.execute(
+                        "SELECT node_id, key, value FROM outputs "
+                        "WHERE automation_id = ? "
+                        "AND node_id IN (SELECT node_id FROM temp.visible_nodes)",
+                        (automation_id,),
+                    )
+
+                outputs = {}
+                for node_id, key, value in output_rows:
+                    outputs.setdefault(node_id, {})[key] = (
+                        None if value is None else json.loads(value)
+                    )
+
+                data["nodes"] = [
+                    {
+                        "id": node_id,
+                        "name": node_name,
+                        "position": [x, y],
+                        "code": code,
+                        "outputs": outputs.get(node_id, {}),
+                    }
+                    for node_id, node_name, x, y, code in node_rows
+                ]
+
+                query = (
+                    "SELECT from_node_id, from_port_type, to_node_id, to_port_type "
+                    "FROM connections WHERE automation_id = ?"
+                )
+                if viewport is not None:
+                    query += (
+                        " AND (from_node_id IN (SELECT node_id FROM temp.visible_nodes)"
+                        " OR to_node_id IN (SELECT node_id FROM temp.visible_nodes))"
+                    )
+                connection_rows = cur.execute(query, (automation_id,)).fetchall()
+                data["connections"] = [
+                    {
+                        "from_node_id": row[0],
+                        "from_port_type": row[1],
+                        "to_node_id": row[2],
+                        "to_port_type": row[3],
+                    }
+                    for row in connection_rows
+                ]
+                return data
+            finally:
+                cur.close()
+
+    def bounds(self, name):
+        """Return ``(min_x, min_y, max_x, max_y)`` of all nodes, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(x), MIN(y), MAX(x), MAX(y) FROM nodes "
+                "JOIN automations ON automations.id = nodes.automation_id "
+                "WHERE automations.name = ?",
+                (name,),
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return row
+
+    # -- nodes -------------------------------------------------------------
+
+    def _upsert_node(self, cur, automation_id, node):
+        x, y = node.get("position", (0, 0))
+        cur.execute(
+            "INSERT INTO nodes (automation_id, node_id, name, x, y, code) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (automation_id, node_id) DO UPDATE SET "
+            "name = excluded.name, x = excluded.x, y = excluded.y, "
+            "code = excluded.code",
+            (
+                automation_id,
+                node["id"],
+                node.get("name", ""),
+                int(x),
+                int(y),
+                node.get("code", ""),
+            ),
+        )
+        if "outputs" in node:
+            self._replace_outputs(cur, automation_id, node["id"], node["outputs"])
+
+    def _replace_outputs(self, cur, automation_id, node_id, outputs):
+        cur.execute(
+            "DELETE FROM outputs WHERE automation_id = ? AND node_id = ?",
+            (automation_id, node_id),
+        )
+        if isinstance(outputs, list):
+            outputs = dict.fromkeys(outputs)
+        cur.executemany(
+            "INSERT INTO outputs VALUES (?, ?, ?, ?)",
+            [
+                (
+                    automation_id,
+                    node_id,
+                    str(key),
+                    None if value is None else _dumps(value),
+                )
+                for key, value in (outputs or {}).items()
+            ],
+        )
+
+    def upsert_node(self, name, node):
+        with self.transaction() as cur:
+            automation_id = self._automation_id(cur, name)
+            self._upsert_node(cur, automation_id, node)
+            self._touch(cur, automation_id)
+
+    def move_node(self, name, node_id, x, y):
+        with self.transaction() as cur:
+            automation_id = self._automation_id(cur, name)
+            cur.execute(
+                "UPDATE nodes SET x = ?, y = ? WHERE automation_id = ? AND node_id = ?",
+                (int(x), int(y), automation_id, node_id),
+            )
+            self._touch(cur, automation_id)
+
+    def update_node_code(self, name, node_id, code):
+        with self.transaction() as cur:
+            automation_id = self._automation_id(cur, name)
+            cur.execute(
+                "UPDATE nodes SET code = ? WHERE automation_id = ? AND node_id = ?",
+                (code, automation_id, node_id),
+            )
+            self._touch(cur, automation_id)
+
+    def delete_node(self, name, node_id):
+        """Delete a node together with its outputs and connections."""
+        with self.transaction() as cur:
+            automation_id = self._automation_id(cur, name)
+            cur.execute(
+                "DELETE FROM nodes WHERE automation_id = ? AND node_id = ?",
+                (automation_id, node_id),
+            )
+            cur.execute(
+                "DELETE FROM outputs WHERE automation_id = ? AND node_id = ?",
+                (automation_id, node_id),
+            )
+            cur.execute(
+                "DELETE FROM connections WHERE automation_id = ? "
+                "AND (from_node_id = ? OR to_node_id = ?)",
+                (automation_id, node_id, node_id),
+            )
+            self._touch(cur, automation_id)
+
+    def set_outputs(self, name, outputs_by_node, meta=None):
+        """Replace the outputs of several nodes, optionally updating meta."""
+        with self.transaction() as cur:
+            automation_id = self._automation_id(cur, name)
+            for node_id, outputs in outputs_by_node.items():
+                self._replace_outputs(cur, automation_id, node_id, outputs)
+            if meta is not None:
+                meta = {
+                    k: v for k, v in meta.items() if k not in ("nodes", "connections")
+                }
+                cur.execute(
+                    "UPDATE automations SET meta = ? WHERE id = ?",
+                    (_dumps(meta), automation_id),
+                )
+            self._touch(cur, automation_id)
+
+    def query_output_values(self, pattern):
+        """Return ``(value,)`` rows of outputs whose JSON matches a LIKE pattern."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT value FROM outputs WHERE value LIKE ?", (pattern,)
+            ).fetchall()
+        return rows
+
+    # -- connections -------------------------------------------------------
+
+    def add_connection(self, name, connection):
+        with self.transaction() as cur:
+            automation_id = self._automation_id(cur, name)
+            cur.execute(
+                "INSERT OR IGNORE INTO connections VALUES (?, ?, ?, ?, ?)",
+                (
+                    automation_id,
+                    connection["from_node_id"],
+                    connection["from_port_type"],
+                    connection["to_node_id"],
+                    connection["to_port_type"],
+                ),
+            )
+            self._touch(cur, automation_id)
+
+    def remove_connection(self, name, connection):
+        with self.transaction() as cur:
+            automation_id = self._automation_id(cur, name)
+            cur.execute(
+                "DELETE FROM connections WHERE automation_id = ? AND from_node_id = ? "
+                "AND from_port_type = ? AND to_node_id = ? AND to_port_type = ?",
+                (
+                    automation_id,
+                    connection["from_node_id"],
+                    connection["from_port_type"],
+                    connection["to_node_id"],
+                    connection["to_port_type"],
+                ),
+            )
+            self._touch(cur, automation_id)
+
+    # -- import / export ---------------------------------------------------
+
+    def export_json(self, name, path=None):
+        """Write an automation back out in the JSON file layout."""
+        data = self.load_automation(name)
+        if data is None:
+            raise KeyError(name)
+        path = Path(path) if path else AUTOMATIONS_DIR / f"{name}.json"
+        atomic_write_json(path, data, indent=4)
+        return path
+
+    def migrate_from_json(self, directory=AUTOMATIONS_DIR, overwrite=False):
+        """Import every ``*.json`` automation in ``directory``.
+
+        Returns a list of ``(name, status)`` tuples where status is one of
+        ``"imported"``, ``"skipped"`` or an error message.
+        """
+        results = []
+        for path in sorted(Path(directory).glob("*.json")):
+            name = path.stem
+            if not overwrite and self.has_automation(name):
+                results.append((name, "skipped"))
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if not isinstance(data, dict):
+                    raise ValueError("not an automation object")
+                self.save_automation(name, data)
+                results.append((name, "imported"))
+            except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+                results.append((name, f"error: {e}"))
+        return results
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def sqlite_backend_enabled():
+    return get_setting("storage_backend", "json") == "sqlite"
+
+
+def get_automation_store():
+    """Return the shared store when the SQLite backend is enabled, else None."""
+    global _store
+    if not sqlite_backend_enabled():
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = SQLiteAutomationStore()
+        return _store
+
+
+__all__ = [
+    "SQLiteAutomationStore",
+    "DATABASE_FILE",
+    "get_automation_store",
+    "sqlite_backend_enabled",
+]
@@ -1,10 +1,232 @@
+import contextlib
+import hashlib
 import json
 import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
 import zipfile
+import zlib
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from pathlib import Path
+
 from PyQt6.QtCore import QThread, pyqtSignal
 
+from nodebox.core.atomic import atomic_write_json, copy_target_mode
+
+MANIFEST_VERSION = "3.1"
+MANIFEST_SUFFIX = ".manifest.json"
+
+# Entries are deflated on worker threads and written as regular deflate
+# members ("deflate"), or copied as they are ("store"). Bundles of version
+# 3.0 stored zlib streams uncompressed instead ("zlib"); they can still be
+# imported.
+CODEC_DEFLATE = "deflate"
+CODEC_ZLIB = "zlib"
+CODEC_STORE = "store"
+_KNOWN_CODECS = (CODEC_DEFLATE, CODEC_ZLIB, CODEC_STORE)
+# Returned by the worker jobs of a delta export for files matching the base.
+_UNCHANGED = "unchanged"
+
+# Formats that are already compressed, plus model weights, which barely
+# shrink and are usually too large to be worth the CPU time. These are copied
+# into the bundle as they are.
+INCOMPRESSIBLE_SUFFIXES = {
+    ".7z",
+    ".bz2",
+    ".gz",
+    ".xz",
+    ".zip",
+    ".zst",
+    ".nodebox",
+    ".jpg",
+    ".jpeg",
+    ".png",
+    ".gif",
+    ".webp",
+    ".mp3",
+    ".mp4",
+    ".mkv",
+    ".ogg",
+    ".gguf",
+    ".safetensors",
+    ".bin",
+    ".pt",
+    ".pth",
+    ".onnx",
+    ".npz",
+    ".parquet",
+}
+STREAM_THRESHOLD = 16 * 1024 * 1024
+MAX_IN_FLIGHT_BYTES = 128 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+COMPRESS_LEVEL = 6
+REPORT_INTERVAL_S = 0.2
+
+
+class _BundleEntry:
+    __slots__ = ["arcname", "path", "size"]
+
+    def __init__(self, arcname, path, size):
+        self.arcname = arcname
+        self.path = path
+        self.size = size
+
+    @property
+    def compressible(self):
+        return os.path.splitext(self.path)[1].lower() not in INCOMPRESSIBLE_SUFFIXES
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _deflater(level):
+    # Raw deflate (no zlib header), as stored in zip members.
+    return zlib.compressobj(level, zlib.DEFLATED, -15)
+
+
+def _compress_file(path, size, base_sha256=None, level=COMPRESS_LEVEL):
+    """Hash and compress a file on a worker thread.
+
+    Returns ``(sha256, codec, payload, crc)``. Small files are handled in
+    memory; large ones are compressed into a temporary file. If compression
+    does not pay off for a large file the payload is None and the caller
+    copies the original instead. Files whose hash equals ``base_sha256``
+    are not compressed at all and come back with the ``_UNCHANGED`` codec.
+    """
+    if size < STREAM_THRESHOLD:
+        with open(path, "rb") as f:
+            data = f.read()
+        sha256 = hashlib.sha256(data).hexdigest()
+        if sha256 == base_sha256:
+            return sha256, _UNCHANGED, None, None
+        compressor = _deflater(level)
+        compressed = compressor.compress(data) + compressor.flush()
+        if len(compressed) < len(data) * 0.95:
+            return sha256, CODEC_DEFLATE, compressed, zlib.crc32(data)
+        return sha256, CODEC_STORE, data, None
+
+    if base_sha256 is not None:
+        sha256 = _hash_file(path)
+        if sha256 == base_sha256:
+            return sha256, _UNCHANGED, None, None
+
+    digest = hashlib.sha256()
+    crc = 0
+    compressor = _deflater(level)
+    spool = tempfile.TemporaryFile()
+    try:
+        with open(path, "rb") as f:
+            while chunk := f.read(CHUNK_SIZE):
+                digest.update(chunk)
+                crc = zlib.crc32(chunk, crc)
+                spool.write(compressor.compress(chunk))
+        spool.write(compressor.flush())
+        if spool.tell() >= size * 0.95:
+            spool.close()
+            return digest.hexdigest(), CODEC_STORE, None, None
+        spool.seek(0)
+        return digest.hexdigest(), CODEC_DEFLATE, spool, crc
+    except BaseException:
+        spool.close()
+        raise
+
+
+# ZipFile internals used to append a member that was deflated elsewhere.
+_RAW_WRITE_ATTRS = ("fp", "start_dir", "filelist", "NameToInfo", "_writecheck")
+
+
+def _can_write_raw(zipf):
+    """True if ``zipf`` looks like the ZipFile ``_write_deflated`` expects."""
+    return (
+        all(hasattr(zipf, name) for name in _RAW_WRITE_ATTRS)
+        and hasattr(zipfile.ZipInfo, "FileHeader")
+        and getattr(zipf, "_seekable", False)
+        and not getattr(zipf, "_writing", True)
+    )
+
+
+def _write_deflated(zipf, zinfo, payload, crc):
+    """Append data deflated elsewhere to ``zipf`` as a ZIP_DEFLATED member.
+
+    ``ZipFile`` has no public way to add compressed data as it is, so the
+    member is framed with ``ZipInfo.FileHeader`` and registered the way
+    ``ZipFile.write`` does it. Should those internals be missing, e.g. on
+    a newer Python, the payload is inflated again and written through
+    ``ZipFile.open``, which compresses it once more on this thread.
+    """
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    if not _can_write_raw(zipf):
+        inflater = zlib.decompressobj(-15)
+        with contextlib.ExitStack() as stack:
+            if not isinstance(payload, bytes):
+                stack.enter_context(payload)
+            dst = stack.enter_context(zipf.open(zinfo, "w", force_zip64=True))
+            if isinstance(payload, bytes):
+                dst.write(inflater.decompress(payload))
+            else:
+                while chunk := payload.read(CHUNK_SIZE):
+                    dst.write(inflater.decompress(chunk))
+            dst.write(inflater.flush())
+        return
+
+    if isinstance(payload, bytes):
+        compress_size = len(payload)
+    else:
+        compress_size = os.fstat(payload.fileno()).st_size
+    zinfo.compress_size = compress_size
+    zinfo.CRC = crc
+    zinfo.flag_bits = 0
+    zinfo.external_attr = zinfo.external_attr or 0o600 << 16
+    zipf.fp.seek(zipf.start_dir)
+    zinfo.header_offset = zipf.fp.tell()
+    zipf._writecheck(zinfo)
+    zipf._didModify = True
+    zipf.fp.write(zinfo.FileHeader())
+    if isinstance(payload, bytes):
+        zipf.fp.write(payload)
+    else:
+        with payload:
+            shutil.copyfileobj(payload, zipf.fp, CHUNK_SIZE)
+    zipf.start_dir = zipf.fp.tell()
+    zipf.filelist.append(zinfo)
+    zipf.NameToInfo[zinfo.filename] = zinfo
+
+
+def manifest_sidecar_path(bundle_path):
+    """Path of the manifest copy written next to an exported bundle."""
+    return Path(f"{bundle_path}{MANIFEST_SUFFIX}")
+
+
+def load_manifest(path):
+    """Read a manifest from a bundle or from a ``.manifest.json`` sidecar."""
+    path = str(path)
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    with zipfile.ZipFile(path, "r") as zipf:
+        return json.loads(zipf.read("manifest.json"))
+
+
+def manifest_state(manifest):
+    """Map every file a bundle (and its bases) describes to its sha256."""
+    if "state" in manifest:
+        return dict(manifest["state"])
+    return {
+        name: info["sha256"]
+        for name, info in manifest.get("entries", {}).items()
+        if "sha256" in info
+    }
+
 
 class ExportWorker(QThread):
     progress = pyqtSignal(int)
@@ -12,8 +234,15 @@ class ExportWorker(QThread):
     error = pyqtSignal(str)
 
     def __init__(
-        self, workflows, export_path, include_models=False, include_data=False
+        self,
+        workflows,
+        export_path,
+        include_models=False,
+        include_data=False,
+        base_manifest=None,
     ):
+        """``base_manifest`` turns the export into a delta bundle that only
+        contains files whose content differs from that manifest's state."""
         super().__init__()
         self.workflows = workflows
         self.export_path = export_path
@@ -22,6 +251,10 @@ class ExportWorker(QThread):
         self._workflows_dir = Path("workflows")
         self._models_dir = Path("models")
         self._data_dir = Path("data")
+        self.base_manifest = base_manifest
+        self._total_bytes = 0
+        self._done_bytes = 0
+        self._state = {}
 
     def run(self):
         try:
@@ -30,54 +263,274 @@ class ExportWorker(QThread):
         except Exception as e:
             self.error.emit(str(e))
 
+    def _collect_entries(self):
+        """List every file to bundle in a single walk of each directory."""
+        entries = []
+        for workflow in self.workflows:
+            path = self._workflows_dir / f"{workflow}.json"
+            try:
+                size = path.stat().st_size
+            except OSError:
+                continue
+            entries.append(_BundleEntry(f"workflows/{workflow}.json", str(path), size))
+
+        roots = []
+        if self.include_models:
+            roots.append(self._models_dir)
+        if self.include_data:
+            roots.append(self._data_dir)
+        for root in roots:
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    path = os.path.join(dirpath, filename)
+                    try:
+                        size = os.stat(path).st_size
+                    except OSError:
+                        continue
+                    arcname = Path(path).as_posix()
+                    entries.append(_BundleEntry(arcname, path, size))
+        return entries
+
+    def _advance(self, nbytes):
+        self._done_bytes += nbytes
+        self.progress.emit(int(self._done_bytes * 99 / max(1, self._total_bytes)))
+
+    def _record(self, manifest_entries, seen, entry, sha256, codec):
+        """Return True if the entry's content must be written to the bundle."""
+        self._state[entry.arcname] = sha256
+        info = {"size": entry.size, "sha256": sha256}
+        original = seen.get(sha256)
+        if original is not None:
+            info["same_as"] = original
+            manifest_entries[entry.arcname] = info
+            return False
+        seen[sha256] = entry.arcname
+        info["codec"] = codec
+        manifest_entries[entry.arcname] = info
+        return True
+
+    def _write_payload(self, zipf, entry, codec, payload, crc):
+        zinfo = zipfile.ZipInfo.from_file(entry.path, entry.arcname)
+        if codec == CODEC_DEFLATE:
+            _write_deflated(zipf, zinfo, payload, crc)
+            return
+        zinfo.compress_type = zipfile.ZIP_STORED
+        if isinstance(payload, bytes):
+            zipf.writestr(zinfo, payload)
+            return
+        with payload, zipf.open(zinfo, "w", force_zip64=True) as dst:
+            shutil.copyfileobj(payload, dst, CHUNK_SIZE)
+
+    def _write_streamed(self, zipf, entry, manifest_entries, seen, known_hash=None):
+        if known_hash is not None and not self._record(
+            manifest_entries, seen, entry, known_hash, CODEC_STORE
+        ):
+            self._advance(entry.size)
+            return
+
+        zinfo = zipfile.ZipInfo.from_file(entry.path, entry.arcname)
+        zinfo.compress_type = zipfile.ZIP_STORED
+        digest = hashlib.sha256()
+        with (
+            open(entry.path, "rb") as src,
+            zipf.open(zinfo, "w", force_zip64=True) as dst,
+        ):
+            while chunk := src.read(CHUNK_SIZE):
+                digest.update(chunk)
+                dst.write(chunk)
+                self._advance(len(chunk))
+        if known_hash is None:
+            self._record(manifest_entries, seen, entry, digest.hexdigest(), CODEC_STORE)
+
+    def _in_scope(self, arcname):
+        top = arcname.split("/", 1)[0]
+        if top == "workflows":
+            return arcname[len("workflows/") : -len(".json")] in self.workflows
+        return (top == "models" and self.include_models) or (
+            top == "data" and self.include_data
+        )
+
+    def _deleted_since_base(self, base_state):
+        """Files of the base that were removed locally, with their old hash."""
+        return {
+            arcname: sha256
+            for arcname, sha256 in base_state.items()
+            if arcname not in self._state
+            and self._in_scope(arcname)
+            and not os.path.exists(arcname)
+        }
+
     def export_workflows(self):
         os.makedirs(self._workflows_dir, exist_ok=True)
-        with zipfile.ZipFile(
-            self.export_path, "w", zipfile.ZIP_DEFLATED, compresslevel=6
-        ) as zipf:
-            total_items = len(self.workflows)
-            if self.include_models and self._models_dir.exists():
-                total_items += len(list(self._models_dir.rglob("*")))
-            if self.include_data and self._data_dir.exists():
-                total_items += len(list(self._data_dir.rglob("*")))
-
-            for idx, workflow in enumerate(self.workflows):
-                workflow_file = self._workflows_dir / f"{workflow}.json"
-                if workflow_file.exists():
-                    zipf.write(workflow_file, f"workflows/{workflow}.json")
-                self.progress.emit(int((idx / max(1, total_items)) * 80))
-
-            if self.include_models and self._models_dir.exists():
-                for file_path in self._models_dir.rglob("*"):
-                    if file_path.is_file():
-                        zipf.write(file_path, file_path.relative_to(Path(".")))
-                self.progress.emit(85)
-
-            if self.include_data and self._data_dir.exists():
-                for file_path in self._data_dir.rglob("*"):
-                    if file_path.is_file():
-                        zipf.write(file_path, file_path.relative_to(Path(".")))
-                self.progress.emit(90)
+        base_state = manifest_state(self.base_manifest) if self.base_manifest else {}
+        self._state = {}
+        entries = self._collect_entries()
+        self._total_bytes = sum(entry.size for entry in entries)
+        self._done_bytes = 0
+        # Files with a unique size cannot have duplicates, so large ones are
+        # hashed while being copied instead of being read twice.
+        size_counts = Counter(entry.size for entry in entries)
+
+        manifest_entries = {}
+        seen = {}
+        workers = min(32, (os.cpu_count() or 1) + 1)
+
+        with (
+            zipfile.ZipFile(self.export_path, "w", zipfile.ZIP_STORED) as zipf,
+            ThreadPoolExecutor(max_workers=workers) as pool,
+        ):
+            pending = deque()
+            in_flight = 0
+
+            def drain_one():
+                nonlocal in_flight
+                entry, future, cost = pending.popleft()
+                sha256, codec, payload, crc = future.result()
+                in_flight -= cost
+                if codec == _UNCHANGED:
+                    self._state[entry.arcname] = sha256
+                    self._advance(entry.size)
+                    return
+                if payload is None:
+                    self._write_streamed(zipf, entry, manifest_entries, seen, sha256)
+                    return
+                if self._record(manifest_entries, seen, entry, sha256, codec):
+                    self._write_payload(zipf, entry, codec, payload, crc)
+                elif not isinstance(payload, bytes):
+                    payload.close()
+                self._advance(entry.size)
+
+            for entry in entries:
+                if entry.compressible:
+                    # Large files are spooled to disk, so they only count
+                    # one chunk against the memory budget.
+                    cost = entry.size if entry.size < STREAM_THRESHOLD else CHUNK_SIZE
+                    future = pool.submit(
+                        _compress_file,
+                        entry.path,
+                        entry.size,
+                        base_state.get(entry.arcname),
+                    )
+                    pending.append((entry, future, cost))
+                    in_flight += cost
+                    while pending and (
+                        in_flight > MAX_IN_FLIGHT_BYTES or len(pending) > workers * 4
+                    ):
+                        drain_one()
+                    continue
+
+                # Incompressible entries are copied on this thread while the
+                # pool keeps compressing the others.
+                known_hash = None
+                if size_counts[entry.size] > 1 or entry.arcname in base_state:
+                    known_hash = _hash_file(entry.path)
+                if known_hash is not None and known_hash == base_state.get(
+                    entry.arcname
+                ):
+                    self._state[entry.arcname] = known_hash
+                    self._advance(entry.size)
+                    continue
+                self._write_streamed(zipf, entry, manifest_entries, seen, known_hash)
+
+            while pending:
+                drain_one()
 
             manifest = {
-                "version": "2.0",
+                "version": MANIFEST_VERSION,
+                "bundle_id": uuid.uuid4().hex,
                 "exported_at": datetime.now().isoformat(),
                 "workflows": self.workflows,
                 "models_included": self.include_models,
                 "data_included": self.include_data,
+                "entries": manifest_entries,
             }
+            if self.base_manifest:
+                deleted = self._deleted_since_base(base_state)
+                # The state carries unselected files over from the base, so
+                # the next delta can be taken against this bundle alone.
+                state = {
+                    name: sha256
+                    for name, sha256 in base_state.items()
+                    if name not in deleted
+                }
+                state.update(self._state)
+                manifest["base_id"] = self.base_manifest.get("bundle_id")
+                manifest["deleted"] = deleted
+                manifest["state"] = state
             zipf.writestr("manifest.json", json.dumps(manifest, separators=(",", ":")))
-            self.progress.emit(100)
+
+        atomic_write_json(
+            manifest_sidecar_path(self.export_path),
+            manifest,
+            separators=(",", ":"),
+        )
+        self.progress.emit(100)
+
+
+def _safe_destination(arcname):
+    """Resolve an entry name below the working directory, rejecting escapes."""
+    path = Path(arcname)
+    if path.is_absolute() or ".." in path.parts:
+        raise ValueError(f"Refusing to extract unsafe path: {arcname}")
+    return path
+
+
+def _matches(path, size, sha256):
+    try:
+        if os.path.getsize(path) != size:
+            return False
+        return _hash_file(path) == sha256
+    except OSError:
+        return False
+
+
+def _version_tuple(version):
+    try:
+        return tuple(int(part) for part in str(version).split("."))
+    except ValueError:
+        return None
+
+
+def _check_manifest_version(manifest):
+    """Refuse bundles written by a newer format than this one reads."""
+    version = manifest.get("version", "1.0")
+    parsed = _version_tuple(version)
+    if parsed is None or parsed > _version_tuple(MANIFEST_VERSION):
+        raise ValueError(
+            f"Bundle format {version} is newer than this version of NodeBox "
+            f"supports ({MANIFEST_VERSION}); update NodeBox to import it."
+        )
+
+
+def _decoded_chunks(src, codec):
+    # Deflate members are inflated by zipfile itself.
+    if codec == CODEC_ZLIB:
+        decompressor = zlib.decompressobj()
+        while chunk := src.read(CHUNK_SIZE):
+            yield decompressor.decompress(chunk)
+        yield decompressor.flush()
+    else:
+        while chunk := src.read(CHUNK_SIZE):
+            yield chunk
 
 
 class ImportWorker(QThread):
     progress = pyqtSignal(int)
+    status = pyqtSignal(str)
     finished = pyqtSignal(list)
     error = pyqtSignal(str)
 
-    def __init__(self, import_path):
+    def __init__(self, import_path, max_workers=None):
         super().__init__()
         self.import_path = import_path
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 1) + 1)
+        self.summary = {"written": 0, "skipped": 0, "deleted": 0}
+        self._lock = threading.Lock()
+        self._done_bytes = 0
+        self._last_report = 0.0
+        self._local = threading.local()
+        self._handles = []
 
     def run(self):
         try:
@@ -86,44 +539,167 @@ class ImportWorker(QThread):
         except Exception as e:
             self.error.emit(str(e))
 
-    def import_workflows(self):
-        imported_workflows = []
+    def _zip_handle(self):
+        """Each worker thread reads through its own ZipFile to avoid seeking
+        a shared file handle back and forth."""
+        handle = getattr(self._local, "zipf", None)
+        if handle is None:
+            handle = zipfile.ZipFile(self.import_path, "r")
+            self._local.zipf = handle
+            with self._lock:
+                self._handles.append(handle)
+        return handle
 
-        with zipfile.ZipFile(self.import_path, "r") as zipf:
-            manifest_data = zipf.read("manifest.json")
-            manifest = json.loads(manifest_data)
+    def _count(self, key, nbytes):
+        with self._lock:
+            self.summary[key] += 1
+            self._done_bytes += nbytes
 
-            workflows = manifest.get("workflows", [])
-            total_items = len(workflows)
-            if manifest.get("models_included"):
-                total_items += 1
-            if manifest.get("data_included"):
-                total_items += 1
+    def _import_entry(self, arcname, info, source_info, codec):
+        """Extract one entry atomically, verifying its hash while streaming."""
+        destination = _safe_destination(arcname)
+        expected = info.get("sha256")
+        size = info.get("size", source_info.file_size)
+        if expected and _matches(destination, size, expected):
+            self._count("skipped", size)
+            return
+
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(
+            dir=destination.parent, prefix=f".{destination.name}.", suffix=".tmp"
+        )
+        try:
+            copy_target_mode(fd, destination)
+            digest = hashlib.sha256()
+            with (
+                self._zip_handle().open(source_info) as src,
+                os.fdopen(fd, "wb") as dst,
+            ):
+                for chunk in _decoded_chunks(src, codec):
+                    digest.update(chunk)
+                    dst.write(chunk)
+            if expected and digest.hexdigest() != expected:
+                raise ValueError(f"Checksum mismatch for {arcname}")
+            os.replace(tmp_name, destination)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_name)
+            raise
+        self._count("written", size)
 
-            os.makedirs("workflows", exist_ok=True)
+    def _apply_deletions(self, deleted):
+        """Remove files a delta bundle deleted, unless they changed locally."""
+        for arcname, sha256 in deleted.items():
+            path = _safe_destination(arcname)
+            if path.is_file() and _hash_file(path) == sha256:
+                path.unlink()
+                self.summary["deleted"] += 1
 
-            for idx, workflow in enumerate(workflows):
-                workflow_file = f"workflows/{workflow}.json"
-                if workflow_file in zipf.namelist():
-                    zipf.extract(workflow_file, ".")
-                    imported_workflows.append(workflow)
-                self.progress.emit(int((idx / max(1, total_items)) * 80))
+    def _report(self, total_bytes, started, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_report < REPORT_INTERVAL_S:
+            return
+        self._last_report = now
+        elapsed = max(now - started, 1e-6)
+        with self._lock:
+            done = self._done_bytes
+        self.progress.emit(int(done * 99 / max(1, total_bytes)))
+        self.status.emit(
+            f"{done / 1e6:.1f} / {total_bytes / 1e6:.1f} MB at "
+            f"{done / 1e6 / elapsed:.1f} MB/s"
+        )
 
-            if manifest.get("models_included"):
-                for file_info in zipf.infolist():
-                    if file_info.filename.startswith("models/"):
-                        zipf.extract(file_info.filename, ".")
-                self.progress.emit(90)
+    def _wait_some(self, pending, total_bytes, started):
+        done, pending = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+        for future in done:
+            future.result()
+        self._report(total_bytes, started)
+        return pending
 
-            if manifest.get("data_included"):
-                for file_info in zipf.infolist():
-                    if file_info.filename.startswith("data/"):
-                        zipf.extract(file_info.filename, ".")
-                self.progress.emit(95)
+    def _plan(self, manifest, infos):
+        """Return ``(arcname, info, source ZipInfo, codec)`` for every file."""
+        entries = manifest.get("entries", {})
+        names = set(infos) | set(entries)
+
+        selected = [
+            f"workflows/{workflow}.json"
+            for workflow in manifest.get("workflows", [])
+            if f"workflows/{workflow}.json" in names
+        ]
+        for prefix, included in (
+            ("models/", manifest.get("models_included")),
+            ("data/", manifest.get("data_included")),
+        ):
+            if included:
+                selected.extend(
+                    name
+                    for name in sorted(names)
+                    if name.startswith(prefix) and not name.endswith("/")
+                )
+
+        plan = []
+        for arcname in selected:
+            info = entries.get(arcname, {})
+            source = info.get("same_as", arcname)
+            source_info = infos.get(source)
+            if source_info is None:
+                raise ValueError(f"Bundle is missing the data for {arcname}")
+            codec = entries.get(source, {}).get("codec", CODEC_STORE)
+            if codec not in _KNOWN_CODECS:
+                raise ValueError(f"Unsupported encoding {codec!r} for {arcname}")
+            plan.append((arcname, info, source_info, codec))
+        return plan
+
+    def import_workflows(self):
+        with zipfile.ZipFile(self.import_path, "r") as zipf:
+            manifest = json.loads(zipf.read("manifest.json"))
+            infos = {info.filename: info for info in zipf.infolist()}
+        _check_manifest_version(manifest)
+
+        plan = self._plan(manifest, infos)
+        total_bytes = sum(
+            info.get("size", source_info.file_size) for _, info, source_info, _ in plan
+        )
+        os.makedirs("workflows", exist_ok=True)
+
+        started = time.monotonic()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                pending = set()
+                try:
+                    # Only a couple of entries per worker are queued at a
+                    # time and each streams in CHUNK_SIZE pieces, which keeps
+                    # memory bounded.
+                    for item in plan:
+                        while len(pending) >= self.max_workers * 2:
+                            pending = self._wait_some(pending, total_bytes, started)
+                        pending.add(pool.submit(self._import_entry, *item))
+                    while pending:
+                        pending = self._wait_some(pending, total_bytes, started)
+                except BaseException:
+                    for future in pending:
+                        future.cancel()
+                    raise
+        finally:
+            for handle in self._handles:
+                handle.close()
+            self._handles = []
 
-            self.progress.emit(100)
+        self._apply_deletions(manifest.get("deleted", {}))
+        self._report(total_bytes, started, force=True)
+        self.progress.emit(100)
 
-        return imported_workflows
+        return [
+            workflow
+            for workflow in manifest.get("workflows", [])
+            if os.path.exists(f"workflows/{workflow}.json")
+        ]
 
 
-__all__ = ["ExportWorker", "ImportWorker"]
+__all__ = [
+    "ExportWorker",
+    "ImportWorker",
+    "load_manifest",
+    "manifest_state",
+    "manifest_sidecar_path",
+]
@@ -0,0 +1,349 @@
+"""
+File-system triggers for "watch" schedules.
+
+A watch schedule runs its automation when files matching ``watch_pattern``
+are created, modified or moved into the directory in ``schedule_value``.
+Events are batched per schedule: a batch is dispatched once no new event
+arrived for ``debounce_seconds`` (or after ``MAX_BATCH_WAIT_S`` of
+continuous activity), and the root nodes of the automation receive::
+
+    trigger_paths      sorted list of changed files
+    trigger_directory  the watched directory
+
+For every schedule a cursor (the newest change time dispatched so far) is
+kept in ``TRIGGER_CURSORS_FILE``. On start the directory is scanned for
+files changed after the cursor, so files that arrived while nothing was
+running are picked up exactly once. On POSIX the change time includes the
+inode change time, which a rename updates, so files moved in with an old
+modification time are not missed.
+
+The service is plain threads so both the GUI and the background scheduler
+can host it; ``dispatch(schedule, paths)`` is called on the service
+thread and returns False to have the batch retried later.
+"""
+
+import fnmatch
+import json
+import os
+import threading
+import time
+
+from nodebox.core.atomic import atomic_write_json
+from nodebox.core.paths import APP_DATA_DIR
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+
+    _WATCHDOG_AVAILABLE = True
+except Exception:
+    _WATCHDOG_AVAILABLE = False
+
+    class FileSystemEventHandler:  # type: ignore
+        pass
+
+
+TRIGGER_CURSORS_FILE = APP_DATA_DIR / "trigger_cursors.json"
+MAX_BATCH_WAIT_S = 30.0
+# A batch the host could not start (e.g. the previous run is still going)
+# is offered again after this long.
+RETRY_DELAY_S = 5.0
+
+# Partial downloads and editor scratch files never fire a trigger.
+_IGNORED_SUFFIXES = (".tmp", ".part", ".crdownload", ".swp")
+
+
+def _accepts(name, pattern):
+    if name.startswith((".", "~")) or name.endswith(_IGNORED_SUFFIXES):
+        return False
+    return fnmatch.fnmatch(name, pattern or "*")
+
+
+def _change_ns(st):
+    """When a file last changed or, on POSIX, was moved into place."""
+    if os.name == "nt":
+        # st_ctime is the creation time on Windows.
+        return st.st_mtime_ns
+    return max(st.st_mtime_ns, st.st_ctime_ns)
+
+
+def _cursor_ns(cursor):
+    # Cursors written before change times were used are named mtime_ns.
+    return cursor.get("change_ns", cursor.get("mtime_ns", 0))
+
+
+def watch_directory(schedule):
+    return os.path.abspath(os.path.expanduser(schedule.schedule_value))
+
+
+def trigger_inputs(schedule, paths):
+    """Inputs handed to the root nodes of a triggered run."""
+    return {
+        "trigger_paths": list(paths),
+        "trigger_directory": watch_directory(schedule),
+    }
+
+
+class _Batch:
+    __slots__ = ("paths", "first", "last", "not_before")
+
+    def __init__(self, now):
+        self.paths = set()
+        self.first = now
+        self.last = now
+        self.not_before = now
+
+    def due_at(self, debounce):
+        return max(
+            self.not_before, min(self.last + debounce, self.first + MAX_BATCH_WAIT_S)
+        )
+
+
+class _TriggerHandler(FileSystemEventHandler):
+    def __init__(self, service, name, pattern):
+        super().__init__()
+        self._service = service
+        self._name = name
+        self._pattern = pattern
+
+    def _offer(self, path):
+        if _accepts(os.path.basename(path), self._pattern):
+            self._service._add_paths(self._name, [path])
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self._offer(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self._offer(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self._offer(event.dest_path)
+
+
+class WatchTriggerService:
+    def __init__(self, dispatch, cursors_path=TRIGGER_CURSORS_FILE):
+        self._dispatch = dispatch
+        self.cursors_path = cursors_path
+        self._cond = threading.Condition()
+        self._schedules = {}
+        # name -> (directory, pattern) currently observed
+        self._config = {}
+        self._watches = {}
+        self._pending = {}
+        self._cursors = self._load_cursors()
+        self._observer = None
+        self._thread = None
+        self._closed = False
+
+    @staticmethod
+    def is_available():
+        return _WATCHDOG_AVAILABLE
+
+    # -- cursors -------------------------------------------------------------
+
+    def _load_cursors(self):
+        try:
+            with open(self.cursors_path, "r", encoding="utf-8") as f:
+                cursors = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return cursors if isinstance(cursors, dict) else {}
+
+    def _save_cursors(self):
+        try:
+            atomic_write_json(self.cursors_path, self._cursors, separators=(",", ":"))
+        except OSError as e:
+            print(f"[Triggers] Could not save cursors: {e}")
+
+    def _advance_cursor(self, name, paths):
+        newest = None
+        names = set()
+        for path in paths:
+            try:
+                change_ns = _change_ns(os.stat(path))
+            except OSError:
+                continue
+            if newest is None or change_ns > newest:
+                newest, names = change_ns, {os.path.basename(path)}
+            elif change_ns == newest:
+                names.add(os.path.basename(path))
+        if newest is None:
+            return
+        with self._cond:
+            cursor = self._cursors.get(name) or {"change_ns": 0, "names": []}
+            if newest < _cursor_ns(cursor):
+                return
+            if newest == _cursor_ns(cursor):
+                names.update(cursor["names"])
+            self._cursors[name] = {"change_ns": newest, "names": sorted(names)}
+            self._save_cursors()
+
+    def _catch_up(self, name, schedule):
+        """Queue files that changed since the cursor while nobody watched."""
+        with self._cond:
+            cursor = self._cursors.get(name)
+            if cursor is None:
+                # New trigger: only files arriving from now on count.
+                self._cursors[name] = {"change_ns": time.time_ns(), "names": []}
+                self._save_cursors()
+                return
+        missed = []
+        cursor_ns = _cursor_ns(cursor)
+        seen = set(cursor.get("names", ()))
+        try:
+            entries = list(os.scandir(watch_directory(schedule)))
+        except OSError:
+            return
+        for entry in entries:
+            if not entry.is_file() or not _accepts(entry.name, schedule.watch_pattern):
+                continue
+            try:
+                change_ns = _change_ns(entry.stat())
+            except OSError:
+                continue
+            if change_ns > cursor_ns or (
+                change_ns == cursor_ns and entry.name not in seen
+            ):
+                missed.append(entry.path)
+        if missed:
+            self._add_paths(name, missed)
+
+    # -- lifecycle -------------------------------------------------------------
+
+    def start(self):
+        if not _WATCHDOG_AVAILABLE or self._observer is not None:
+            return self._observer is not None
+        self._closed = False
+        self._observer = Observer()
+        self._observer.daemon = True
+        self._observer.start()
+        self._thread = threading.Thread(
+            target=self._dispatch_loop, name="nodebox-triggers", daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def stop(self):
+        if self._observer is None:
+            return
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._observer.stop()
+        self._observer.join(timeout=2.0)
+        self._thread.join(timeout=2.0)
+        self._observer = None
+        self._thread = None
+        self._watches.clear()
+        self._config.clear()
+        self._pending.clear()
+
+    def set_schedules(self, schedules):
+        """Watch the enabled watch schedules among ``schedules``.
+
+        Cheap when nothing changed, so it can be called after every edit.
+        """
+        if not self.start():
+            return
+        wanted = {
+            s.name: s for s in schedules if s.schedule_type == "watch" and s.enabled
+        }
+        with self._cond:
+            self._schedules = wanted
+
+        for name in list(self._config):
+            schedule = wanted.get(name)
+            if schedule is None or self._config[name] != (
+                watch_directory(schedule),
+                schedule.watch_pattern,
+            ):
+                watch = self._watches.pop(name, None)
+                if watch is not None:
+                    self._observer.unschedule(watch)
+                del self._config[name]
+
+        for name, schedule in wanted.items():
+            if name in self._config:
+                continue
+            directory = watch_directory(schedule)
+            handler = _TriggerHandler(self, name, schedule.watch_pattern)
+            try:
+                self._watches[name] = self._observer.schedule(
+                    handler, directory, recursive=False
+                )
+            except OSError as e:
+                print(f"[Triggers] Cannot watch {directory}: {e}")
+                continue
+            self._config[name] = (directory, schedule.watch_pattern)
+            self._catch_up(name, schedule)
+
+        with self._cond:
+            stale = set(self._cursors) - set(wanted)
+            if stale:
+                for name in stale:
+                    del self._cursors[name]
+                self._save_cursors()
+
+    # -- batching --------------------------------------------------------------
+
+    def _add_paths(self, name, paths, retry=False):
+        now = time.monotonic()
+        with self._cond:
+            batch = self._pending.get(name)
+            if batch is None:
+                batch = self._pending[name] = _Batch(now)
+            batch.paths.update(paths)
+            batch.last = now
+            if retry:
+                batch.not_before = now + RETRY_DELAY_S
+            self._cond.notify_all()
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    now = time.monotonic()
+                    ready = []
+                    wait = None
+                    for name, batch in self._pending.items():
+                        schedule = self._schedules.get(name)
+                        due = batch.due_at(
+                            schedule.debounce_seconds if schedule else 0.0
+                        )
+                        if due <= now:
+                            ready.append(name)
+                        elif wait is None or due - now < wait:
+                            wait = due - now
+                    if ready:
+                        break
+                    self._cond.wait(wait)
+                batches = [(name, self._pending.pop(name)) for name in ready]
+                schedules = dict(self._schedules)
+
+            for name, batch in batches:
+                schedule = schedules.get(name)
+                paths = sorted(p for p in batch.paths if os.path.isfile(p))
+                if schedule is None or not paths:
+                    continue
+                try:
+                    accepted = self._dispatch(schedule, paths)
+                except Exception as e:
+                    print(f"[Triggers] Dispatch failed for {name}: {e}")
+                    accepted = False
+                if accepted:
+                    self._advance_cursor(name, paths)
+                else:
+                    self._add_paths(name, paths, retry=True)
+
+
+__all__ = [
+    "TRIGGER_CURSORS_FILE",
+    "WatchTriggerService",
+    "trigger_inputs",
+    "watch_directory",
+]
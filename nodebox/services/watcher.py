@@ -0,0 +1,166 @@
+"""
+Filesystem watcher for automations and schedules.
+
+Raw watchdog events arrive on the observer thread. They are forwarded to the
+GUI thread through a queued signal, coalesced per path, and published as one
+batch once the directory has been quiet for ``debounce_ms``.
+"""
+
+import os
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from nodebox.core.paths import AUTOMATIONS_DIR
+from nodebox.services.scheduler import SCHEDULES_FILE
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+
+    _WATCHDOG_AVAILABLE = True
+except Exception:
+    _WATCHDOG_AVAILABLE = False
+
+    class FileSystemEventHandler:  # type: ignore
+        pass
+
+
+WATCH_DEBOUNCE_MS = 300
+
+CREATED = "created"
+MODIFIED = "modified"
+DELETED = "deleted"
+
+
+def _merge_kinds(previous, current):
+    """Collapse two events on the same path into the net effect, or None."""
+    if previous is None:
+        return current
+    if previous == CREATED:
+        return None if current == DELETED else CREATED
+    if previous == DELETED:
+        return MODIFIED if current == CREATED else DELETED
+    return DELETED if current == DELETED else MODIFIED
+
+
+def _is_automation_file(path):
+    name = os.path.basename(path)
+    return name.endswith(".json") and not name.startswith(".")
+
+
+class _ForwardingHandler(FileSystemEventHandler):
+    def __init__(self, emit):
+        super().__init__()
+        self._emit = emit
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self._emit(CREATED, event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self._emit(MODIFIED, event.src_path)
+
+    def on_deleted(self, event):
+        if not event.is_directory:
+            self._emit(DELETED, event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self._emit(DELETED, event.src_path)
+            self._emit(CREATED, event.dest_path)
+
+
+class FileWatcherService(QObject):
+    """Pushes debounced automation and schedule changes to the UI."""
+
+    automation_events = pyqtSignal(list)
+    schedules_changed = pyqtSignal()
+
+    _raw_event = pyqtSignal(str, str)
+
+    def __init__(
+        self,
+        automations_dir=AUTOMATIONS_DIR,
+        schedules_file=SCHEDULES_FILE,
+        debounce_ms=WATCH_DEBOUNCE_MS,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.automations_dir = Path(automations_dir).resolve()
+        self.schedules_file = Path(schedules_file).resolve()
+        self._observer = None
+        self._pending = {}
+        self._schedules_dirty = False
+
+        self._raw_event.connect(self._on_raw_event)
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(debounce_ms)
+        self._debounce.timeout.connect(self._publish)
+
+    @staticmethod
+    def is_available():
+        return _WATCHDOG_AVAILABLE
+
+    def start(self):
+        if not _WATCHDOG_AVAILABLE or self._observer is not None:
+            return self._observer is not None
+
+        handler = _ForwardingHandler(self._raw_event.emit)
+        observer = Observer()
+        self.automations_dir.mkdir(parents=True, exist_ok=True)
+        observer.schedule(handler, str(self.automations_dir), recursive=False)
+
+        schedules_dir = self.schedules_file.parent
+        if schedules_dir != self.automations_dir:
+            schedules_dir.mkdir(parents=True, exist_ok=True)
+            observer.schedule(handler, str(schedules_dir), recursive=False)
+
+        observer.daemon = True
+        observer.start()
+        self._observer = observer
+        return True
+
+    def stop(self):
+        if self._observer is None:
+            return
+        self._observer.stop()
+        self._observer.join(timeout=2.0)
+        self._observer = None
+        self._debounce.stop()
+        self._pending.clear()
+
+    def _on_raw_event(self, kind, path):
+        resolved = Path(path).resolve()
+        if resolved == self.schedules_file:
+            self._schedules_dirty = True
+        elif resolved.parent == self.automations_dir and _is_automation_file(path):
+            key = str(resolved)
+            merged = _merge_kinds(self._pending.get(key), kind)
+            if merged is None:
+                self._pending.pop(key, None)
+            else:
+                self._pending[key] = merged
+        else:
+            return
+        self._debounce.start()
+
+    def _publish(self):
+        if self._pending:
+            events = [(kind, path) for path, kind in self._pending.items()]
+            self._pending = {}
+            self.automation_events.emit(events)
+        if self._schedules_dirty:
+            self._schedules_dirty = False
+            self.schedules_changed.emit()
+
+
+__all__ = [
+    "FileWatcherService",
+    "CREATED",
+    "MODIFIED",
+    "DELETED",
+    "WATCH_DEBOUNCE_MS",
+]
@@ -1,7 +1,8 @@
 import contextlib
-import json
-import os
+import copy
+import sqlite3
 import uuid
+from datetime import datetime
 
 from PyQt6.QtCore import QPointF, Qt, QTimer
 from PyQt6.QtGui import (
@@ -18,7 +19,18 @@ from PyQt6.QtWidgets import QDialog, QInputDialog, QVBoxLayout, QWidget
 
 from nodebox.core.bus import get_performance_bus
 from nodebox.core.engine import ExecutionSignals, execute_all_nodes
+from nodebox.core.events import NodeRegression, RunFinished, RunStarted, get_event_bus
+from nodebox.core.paths import AUTOMATIONS_DIR
 from nodebox.nodes.registry import PredefinedNodeRegistry
+from nodebox.services.autosave import AutosaveService
+from nodebox.services.blobs import externalize_outputs
+from nodebox.services.environments import (
+    EnvironmentBuildWorker,
+    find_environment,
+    normalize_requirements,
+)
+from nodebox.services.history import get_history
+from nodebox.services.sqlite_store import get_automation_store
 from nodebox.ui.canvas.connection import BezierConnection
 from nodebox.ui.canvas.dialogs import NodeEditorDialog
 from nodebox.ui.canvas.node_widget import NodeWidget
@@ -101,7 +113,44 @@ class CanvasWidget(QWidget):
         self.setLayout(self.main_layout)
 
         self.current_execution_signals = None
-        self.load_canvas_state()
+        bus = get_event_bus()
+        token = bus.subscribe(
+            self._on_regressions, types=(NodeRegression,), on_gui_thread=True
+        )
+        self.destroyed.connect(lambda: bus.unsubscribe(token))
+        # node id -> {output key: (value, stored form)}, see externalize_outputs
+        self._output_refs = {}
+        self.history = get_history(self.automation_name)
+        self.store = get_automation_store()
+        if self.store is None:
+            self.autosave = AutosaveService(
+                AUTOMATIONS_DIR / f"{self.automation_name}.json",
+                self.snapshot_canvas_state,
+                on_written=lambda _path, data: self.history.record(data),
+                prepare=self._externalize_snapshot,
+                parent=self,
+            )
+        else:
+            # Rows are written as they change; the debounced "save" only
+            # records a history version, read back from the database since
+            # the canvas may hold just the visible part of the graph.
+            self.autosave = AutosaveService(
+                AUTOMATIONS_DIR / f"{self.automation_name}.json",
+                lambda: None,
+                write=self._record_store_version,
+                parent=self,
+            )
+        self.autosave.error.connect(self.output_console.appendError)
+
+        # With the SQLite backend nodes are loaded lazily for the visible
+        # area once the view has been centered; see center_initial_view.
+        self.fully_loaded = self.store is None
+        self._viewport_timer = QTimer(self)
+        self._viewport_timer.setSingleShot(True)
+        self._viewport_timer.setInterval(120)
+        self._viewport_timer.timeout.connect(self.load_visible_nodes)
+        if self.store is None:
+            self.load_canvas_state()
 
     def open_node(self, node):
         from nodebox.ui.canvas.dialogs import parse_code_outputs
@@ -141,7 +190,7 @@ class CanvasWidget(QWidget):
             with contextlib.suppress(Exception):
                 node.update_position()
             with contextlib.suppress(Exception):
-                self.save_canvas_state()
+                self.persist_node_code(node)
 
     def delete_node(self, node):
         if self.pending_connection:
@@ -169,6 +218,7 @@ class CanvasWidget(QWidget):
 
         if node.id in self.nodes:
             del self.nodes[node.id]
+        self._output_refs.pop(node.id, None)
 
         if self.selected_node is node:
             self.selected_node = None
@@ -176,7 +226,7 @@ class CanvasWidget(QWidget):
         node.deleteLater()
 
         with contextlib.suppress(Exception):
-            self.save_canvas_state()
+            self.persist_node_removed(node.id)
         self.update()
 
     def show_console(self):
@@ -263,6 +313,14 @@ class CanvasWidget(QWidget):
             f"X: {int(logical_pos.x())}  Y: {int(logical_pos.y())}",
         )
 
+    def _on_regressions(self, events):
+        for event in events:
+            if event.automation != self.automation_name:
+                continue
+            node = self.nodes.get(event.node_id)
+            if node is not None and hasattr(node, "set_execution_regression"):
+                node.set_execution_regression(event)
+
     def reset_all_node_statuses(self):
         for node in self.nodes.values():
             if hasattr(node, "reset_execution_status"):
@@ -276,7 +334,36 @@ class CanvasWidget(QWidget):
             self.output_console.clear()
 
         self.output_console.appendPlainText("Starting automation run...")
+        if not self.fully_loaded:
+            self.load_canvas_state()
 
+        requirements = normalize_requirements(
+            self.automation_data.get("requirements", [])
+        )
+        if not requirements:
+            self._execute_graph()
+            return
+
+        python_executable = find_environment(requirements)
+        if python_executable:
+            self._execute_graph(python_executable)
+            return
+
+        self.output_console.appendPlainText(
+            f"Preparing environment for: {', '.join(requirements)}"
+        )
+        worker = EnvironmentBuildWorker(requirements)
+        worker.status.connect(self.output_console.appendPlainText)
+        worker.built.connect(self._execute_graph)
+        worker.error.connect(
+            lambda msg: self.output_console.appendError(
+                f"[Error] Failed to prepare environment: {msg}"
+            )
+        )
+        self._env_worker = worker
+        worker.start()
+
+    def _execute_graph(self, python_executable=None):
         bus = get_performance_bus()
         node_exec_times = {}
 
@@ -284,7 +371,7 @@ class CanvasWidget(QWidget):
             msg = f"[Error] Error in node {getattr(node, 'title', '?')}: see console for details"
             self.output_console.appendError(msg)
 
-        def _on_node_executed(node, duration_s):
+        def _on_node_executed(node, duration_s, resources=None):
             node_exec_times[getattr(node, "title", str(id(node)))] = duration_s
             msg = f"[OK] Executed node: {node.title} ({duration_s:.2f}s)"
             self.output_console.appendPlainText(msg)
@@ -300,7 +387,10 @@ class CanvasWidget(QWidget):
 
         def on_execution_completed(result):
             try:
-                self.save_canvas_state()
+                self.automation_data["last_run"] = datetime.now().isoformat(
+                    timespec="seconds"
+                )
+                self.persist_run_results()
                 self.current_execution_signals = None
                 metrics = {
                     "active_nodes": len(self.nodes),
@@ -311,6 +401,15 @@ class CanvasWidget(QWidget):
                     "node_exec_times": node_exec_times,
                 }
                 bus.metrics_signal.emit(metrics)
+                get_event_bus().publish(
+                    RunFinished(
+                        self.automation_name,
+                        "editor",
+                        "failed" if result.get("error_count") else "ok",
+                        result.get("total_duration_s", 0.0),
+                        error_count=result.get("error_count", 0),
+                    )
+                )
                 self.output_console.appendPlainText("Automation completed.")
                 self.output_console.appendPlainText(f"Summary: {result}")
                 self.position_console_widgets()
@@ -318,6 +417,7 @@ class CanvasWidget(QWidget):
                 print(f"Error in execution completion handler: {e}")
 
         execution_signals.execution_completed.connect(on_execution_completed)
+        get_event_bus().publish(RunStarted(self.automation_name, "editor"))
 
         result = execute_all_nodes(
             self.nodes.values(),
@@ -326,6 +426,8 @@ class CanvasWidget(QWidget):
             on_node_executed=_on_node_executed,
             on_log=_on_log,
             signals=execution_signals,
+            python_executable=python_executable,
+            automation_name=self.automation_name,
         )
         if result is not None:
             self.output_console.appendPlainText("Automation completed.")
@@ -340,6 +442,7 @@ class CanvasWidget(QWidget):
         after_scale = (mouse_pos - self.offset) / self.scale
         self.offset = QPointF(self.offset) + (after_scale - before_scale) * self.scale
         self.update()
+        self.schedule_viewport_load()
         for node in self.nodes.values():
             node.update_position()
 
@@ -356,6 +459,7 @@ class CanvasWidget(QWidget):
                 for node in self.nodes.values():
                     node.update_position()
                 self.update()
+                self.schedule_viewport_load()
                 return True
         return super().event(event)
 
@@ -393,7 +497,7 @@ class CanvasWidget(QWidget):
                 node.update_position()
                 self.nodes[node.id] = node
                 node.show()
-                self.save_canvas_state()
+                self.persist_node(node)
 
         clicked_port = self.get_port_at(event.pos())
         if clicked_port:
@@ -413,6 +517,7 @@ class CanvasWidget(QWidget):
             for node in self.nodes.values():
                 node.update_position()
             self.update()
+            self.schedule_viewport_load()
             return
 
         if self.pending_connection:
@@ -478,6 +583,7 @@ class CanvasWidget(QWidget):
             for node in self.nodes.values():
                 node.update_position()
             self.update()
+            self.schedule_viewport_load()
         else:
             # Traditional physical mouse wheel notch scroll
             dy = angle_delta.y()
@@ -490,6 +596,7 @@ class CanvasWidget(QWidget):
                     for node in self.nodes.values():
                         node.update_position()
                     self.update()
+                    self.schedule_viewport_load()
 
     def dragEnterEvent(self, event):
         if event.mimeData().hasText():
@@ -518,7 +625,7 @@ class CanvasWidget(QWidget):
         node.logical_pos = QPointF(pos)
         node.update_position()
         node.show()
-        self.save_canvas_state()
+        self.persist_node(node)
         event.acceptProposedAction()
 
     def start_connection(self, port_widget):
@@ -541,10 +648,11 @@ class CanvasWidget(QWidget):
 
         self.pending_connection.end_port = target_port
         self.pending_connection.finalize()
-        self.connections.append(self.pending_connection)
+        connection = self.pending_connection
+        self.connections.append(connection)
         self.pending_connection = None
         self.connection_start_port = None
-        self.save_canvas_state()
+        self.persist_connection(connection)
         self.update()
 
     def cancel_connection(self):
@@ -580,48 +688,235 @@ class CanvasWidget(QWidget):
         if hasattr(node, "update_position"):
             node.update_position()
 
+    def set_requirements(self, requirements):
+        self.automation_data["requirements"] = normalize_requirements(requirements)
+        self.save_canvas_state()
+
     def save_canvas_state(self):
-        os.makedirs(os.path.expanduser("~/.nodebox/automations"), exist_ok=True)
-        nodes_data = []
-        for node in self.nodes.values():
-            outputs_data = getattr(node, "outputs", {})
-            if isinstance(outputs_data, list):
-                outputs_data = dict.fromkeys(outputs_data)
-
-            nodes_data.append(
-                {
-                    "id": node.id,
-                    "name": node.title,
-                    "position": [int(node.logical_pos.x()), int(node.logical_pos.y())],
-                    "code": getattr(node, "code", ""),
-                    "outputs": outputs_data,
-                }
+        """Schedule a debounced background save of the canvas.
+
+        With the SQLite backend structural edits are written row by row
+        through the ``persist_*`` methods, so only the metadata is saved here.
+        """
+        if self.store is not None:
+            self._store_write(
+                self.store.set_meta, self.automation_name, self.automation_data
             )
+            return
+        self.autosave.request_save()
 
-        connections_data = []
-        for connection in self.connections:
-            from_port = connection.start_port
-            to_port = connection.end_port
-            if not from_port or not to_port:
-                continue
+    def flush_canvas_state(self):
+        """Write pending changes immediately and wait for them to hit disk."""
+        return self.autosave.flush()
 
-            connections_data.append(
-                {
-                    "from_node_id": from_port.node.id,
-                    "from_port_type": from_port.type,
-                    "to_node_id": to_port.node.id,
-                    "to_port_type": to_port.type,
-                }
+    def _store_write(self, method, *args):
+        try:
+            method(*args)
+        except sqlite3.Error as e:
+            print(f"[CanvasWidget] Failed to save {self.automation_name}: {e}")
+        else:
+            self.autosave.request_save()
+
+    def _record_store_version(self, _path, _data):
+        data = self.store.load_automation(self.automation_name)
+        if data is not None:
+            self.history.record(data)
+
+    def persist_node(self, node):
+        if self.store is None:
+            self.save_canvas_state()
+            return
+        self._store_write(
+            self.store.upsert_node, self.automation_name, self._node_record(node)
+        )
+
+    def persist_node_position(self, node):
+        if self.store is None:
+            self.save_canvas_state()
+            return
+        self._store_write(
+            self.store.move_node,
+            self.automation_name,
+            node.id,
+            node.logical_pos.x(),
+            node.logical_pos.y(),
+        )
+
+    def persist_node_code(self, node):
+        if self.store is None:
+            self.save_canvas_state()
+            return
+        self._store_write(
+            self.store.update_node_code,
+            self.automation_name,
+            node.id,
+            getattr(node, "code", ""),
+        )
+
+    def persist_node_removed(self, node_id):
+        if self.store is None:
+            self.save_canvas_state()
+            return
+        self._store_write(self.store.delete_node, self.automation_name, node_id)
+
+    def persist_connection(self, connection):
+        record = self._connection_record(connection)
+        if self.store is None or record is None:
+            self.save_canvas_state()
+            return
+        self._store_write(self.store.add_connection, self.automation_name, record)
+
+    def persist_run_results(self):
+        if self.store is None:
+            self.save_canvas_state()
+            return
+        outputs = {
+            node.id: self._node_record(node)["outputs"] for node in self.nodes.values()
+        }
+        self._store_write(
+            self.store.set_outputs, self.automation_name, outputs, self.automation_data
+        )
+
+    def _node_record(self, node, externalize=True):
+        """Storable dict for ``node``.
+
+        With ``externalize=False`` output values are copied as they are, to
+        be passed through ``_externalize_snapshot`` off the GUI thread.
+        """
+        outputs_data = getattr(node, "outputs", {})
+        if isinstance(outputs_data, list):
+            outputs_data = dict.fromkeys(outputs_data)
+        elif isinstance(outputs_data, dict):
+            if externalize:
+                outputs_data = externalize_outputs(
+                    outputs_data, self._output_refs.setdefault(node.id, {})
+                )
+            else:
+                outputs_data = dict(outputs_data)
+
+        return {
+            "id": node.id,
+            "name": node.title,
+            "position": [int(node.logical_pos.x()), int(node.logical_pos.y())],
+            "code": getattr(node, "code", ""),
+            "outputs": outputs_data,
+        }
+
+    @staticmethod
+    def _connection_record(connection):
+        from_port = connection.start_port
+        to_port = connection.end_port
+        if not from_port or not to_port:
+            return None
+        return {
+            "from_node_id": from_port.node.id,
+            "from_port_type": from_port.type,
+            "to_node_id": to_port.node.id,
+            "to_port_type": to_port.type,
+        }
+
+    def _externalize_snapshot(self, data):
+        """Move large outputs of a raw snapshot into the blob store."""
+        for node_data in data.get("nodes", []):
+            node_data["outputs"] = externalize_outputs(
+                node_data["outputs"], self._output_refs.setdefault(node_data["id"], {})
             )
+        return data
+
+    def snapshot_canvas_state(self):
+        """Capture the canvas as plain data, with output values left raw.
+
+        The autosave writer externalizes large outputs on its own thread.
+        """
+        nodes_data = [
+            self._node_record(node, externalize=False) for node in self.nodes.values()
+        ]
+        connections_data = [
+            record
+            for record in map(self._connection_record, self.connections)
+            if record is not None
+        ]
+
+        automation_data = copy.deepcopy(
+            {
+                key: value
+                for key, value in self.automation_data.items()
+                if key not in ("nodes", "connections")
+            }
+        )
+        automation_data["nodes"] = nodes_data
+        automation_data["connections"] = connections_data
+        return automation_data
+
+    def restore_version(self, version):
+        """Replace the canvas with a version from the automation's history."""
+        data = self.history.checkout(version)
+        self.cancel_connection()
+        for node in list(self.nodes.values()):
+            for port in (node.input_port, node.output_port):
+                with contextlib.suppress(Exception):
+                    port.deleteLater()
+            node.deleteLater()
+        self.nodes = {}
+        self.connections = []
+        self.selected_node = None
+        self._output_refs = {}
+
+        self.automation_data = data
+        if self.store is not None:
+            self._store_write(self.store.save_automation, self.automation_name, data)
+        self.load_canvas_state()
+        for node in self.nodes.values():
+            node.update_position()
+        if self.store is None:
+            self.save_canvas_state()
 
-        automation_data = {"nodes": nodes_data, "connections": connections_data}
-        path = os.path.expanduser(f"~/.nodebox/automations/{self.automation_name}.json")
-        with open(path, "w") as f:
-            json.dump(automation_data, f, indent=4)
+    def visible_canvas_rect(self, margin=0.5):
+        """Visible area in canvas coordinates, grown by ``margin`` screens."""
+        width = self.width() / self.scale
+        height = self.height() / self.scale
+        left = -self.offset.x() / self.scale - width * margin
+        top = -self.offset.y() / self.scale - height * margin
+        return (
+            left,
+            top,
+            left + width * (1 + 2 * margin),
+            top + height * (1 + 2 * margin),
+        )
+
+    def schedule_viewport_load(self):
+        if not self.fully_loaded:
+            self._viewport_timer.start()
+
+    def load_visible_nodes(self):
+        if not self.fully_loaded:
+            self.load_canvas_state(viewport=self.visible_canvas_rect())
+
+    def load_canvas_state(self, viewport=None):
+        """Create widgets for stored nodes and connections not yet on the canvas.
+
+        ``viewport`` is an optional ``(left, top, right, bottom)`` rectangle in
+        canvas coordinates; with the SQLite backend only nodes inside it are
+        queried. Calling without a viewport loads the whole graph.
+        """
+        if self.store is not None:
+            data = (
+                self.store.load_automation(
+                    self.automation_name,
+                    viewport,
+                    skip=self.nodes.keys() if viewport is not None else (),
+                )
+                or {}
+            )
+        else:
+            data = self.automation_data
+        if viewport is None:
+            self.fully_loaded = True
 
-    def load_canvas_state(self):
-        for node_data in self.automation_data.get("nodes", []):
+        for node_data in data.get("nodes", []):
             node_id = node_data["id"]
+            if node_id in self.nodes:
+                continue
             title = node_data["name"]
             pos = QPointF(*node_data["position"])
             code = node_data.get("code", "")
@@ -638,7 +933,21 @@ class CanvasWidget(QWidget):
             node.update_position()
             node.show()
 
-        for conn_data in self.automation_data.get("connections", []):
+        existing = {
+            tuple(record.values())
+            for record in map(self._connection_record, self.connections)
+            if record is not None
+        }
+        for conn_data in data.get("connections", []):
+            key = (
+                conn_data["from_node_id"],
+                conn_data["from_port_type"],
+                conn_data["to_node_id"],
+                conn_data["to_port_type"],
+            )
+            if key in existing:
+                continue
+
             from_node = self.nodes.get(conn_data["from_node_id"])
             to_node = self.nodes.get(conn_data["to_node_id"])
 
@@ -653,18 +962,24 @@ class CanvasWidget(QWidget):
                 connection.end_port = to_port
                 connection.finalize()
                 self.connections.append(connection)
-                self.update()
+                existing.add(key)
+        self.update()
 
     def center_initial_view(self):
         if getattr(self, "initial_centering_done", False):
             return
 
         try:
-            if self.nodes:
+            bounds = None
+            if self.store is not None:
+                bounds = self.store.bounds(self.automation_name)
+            elif self.nodes:
                 xs = [n.logical_pos.x() for n in self.nodes.values()]
                 ys = [n.logical_pos.y() for n in self.nodes.values()]
-                minx, maxx = min(xs), max(xs)
-                miny, maxy = min(ys), max(ys)
+                bounds = (min(xs), min(ys), max(xs), max(ys))
+
+            if bounds:
+                minx, miny, maxx, maxy = bounds
                 logical_center = QPointF((minx + maxx) / 2.0, (miny + maxy) / 2.0)
                 screen_cx = self.width() / 2.0
                 screen_cy = self.height() / 2.0
@@ -674,6 +989,9 @@ class CanvasWidget(QWidget):
             else:
                 self.offset = QPointF(self.width() / 2.0, self.height() / 2.0)
 
+            if not self.fully_loaded:
+                self.load_visible_nodes()
+
             for node in self.nodes.values():
                 node.update_position()
 
@@ -709,6 +1027,7 @@ class CanvasWidget(QWidget):
         super().resizeEvent(event)
         if self.console_visible:
             self.position_console_widgets()
+        self.schedule_viewport_load()
 
 
 __all__ = ["CanvasWidget", "ResizeHandle"]
@@ -1,6 +1,8 @@
 import ast
 import json
 import os
+import sqlite3
+from datetime import datetime
 
 from PyQt6.QtCore import QRect, QRegularExpression, QSize, Qt, pyqtSignal
 from PyQt6.QtGui import (
@@ -14,15 +16,18 @@ from PyQt6.QtGui import (
 )
 from PyQt6.QtWidgets import (
     QApplication,
+    QCheckBox,
     QDialog,
     QFrame,
     QGroupBox,
     QHBoxLayout,
+    QInputDialog,
     QLabel,
     QLineEdit,
     QListWidget,
     QListWidgetItem,
     QMainWindow,
+    QMessageBox,
     QPlainTextEdit,
     QPushButton,
     QScrollArea,
@@ -34,8 +39,11 @@ from PyQt6.QtWidgets import (
 
 from nodebox.core.engine import run_node_code
 from nodebox.core.paths import resource_path
+from nodebox.core.profiling import format_profile
 from nodebox.core.screen import ScreenManager
 from nodebox.nodes.registry import PredefinedNodeRegistry
+from nodebox.services.blobs import describe_value, resolve_value
+from nodebox.services.sqlite_store import get_automation_store
 from nodebox.ui.canvas.palette import NodePaletteItem
 
 # ---------------------------------------------------------------------------
@@ -465,6 +473,26 @@ class NodeEditorDialog(QDialog):
         btn_run.clicked.connect(self._on_run_code)
         bottom_layout.addWidget(btn_run)
 
+        btn_profile = QPushButton("Profile")
+        btn_profile.setFont(QFont("Poppins", 11, QFont.Weight.DemiBold))
+        btn_profile.setFixedHeight(42)
+        btn_profile.setCursor(Qt.CursorShape.PointingHandCursor)
+        btn_profile.setToolTip(
+            "Run under cProfile and show the slowest functions; "
+            "reports are saved in the logs folder"
+        )
+        btn_profile.setStyleSheet(btn_run.styleSheet())
+        btn_profile.clicked.connect(self._on_profile_code)
+        bottom_layout.addWidget(btn_profile)
+
+        self.trace_memory_check = QCheckBox("Track allocations")
+        self.trace_memory_check.setFont(QFont("Poppins", 10))
+        self.trace_memory_check.setStyleSheet(f"color: {_TEXT_SEC};")
+        self.trace_memory_check.setToolTip(
+            "Also record allocation sites with tracemalloc (slower)"
+        )
+        bottom_layout.addWidget(self.trace_memory_check)
+
         bottom_layout.addStretch()
 
         btn_cancel = QPushButton("Cancel")
@@ -595,9 +623,11 @@ class NodeEditorDialog(QDialog):
                 if isinstance(info, dict):
                     source = info.get("source", "Upstream Node")
                     val = info.get("value")
-                    val_preview = f" = {repr(val)[:24]}" if val is not None else ""
+                    val_preview = f" = {describe_value(val)}" if val is not None else ""
                 else:
-                    val_preview = f" = {repr(info)[:24]}" if info is not None else ""
+                    val_preview = (
+                        f" = {describe_value(info)}" if info is not None else ""
+                    )
 
                 item_text = f"{key}{val_preview}"
                 item = QListWidgetItem(item_text)
@@ -645,7 +675,7 @@ class NodeEditorDialog(QDialog):
             for key in merged_keys:
                 val_str = ""
                 if isinstance(runtime_outputs, dict) and key in runtime_outputs:
-                    val_str = f" = {repr(runtime_outputs[key])[:24]}"
+                    val_str = f" = {describe_value(runtime_outputs[key])}"
                 item = QListWidgetItem(f"outputs['{key}']{val_str}")
                 item.setForeground(QColor("#34D399"))
                 self.outputs_list.addItem(item)
@@ -661,21 +691,39 @@ class NodeEditorDialog(QDialog):
         self.result_data = {"code": code, "outputs": outputs_keys}
         self.accept()
 
-    def _on_run_code(self):
+    def _on_profile_code(self):
+        self._on_run_code(profile=True)
+
+    def _on_run_code(self, profile=False):
         self.terminal_output.clear()
-        self._set_terminal_status("Executing...", _WARNING)
+        self._set_terminal_status(
+            "Profiling..." if profile else "Executing...", _WARNING
+        )
         QApplication.processEvents()
 
         code = self.code_edit.toPlainText()
         inputs_dict = {}
         if isinstance(self.raw_inputs, dict):
             for k, v in self.raw_inputs.items():
-                inputs_dict[k] = v["value"] if isinstance(v, dict) and "value" in v else v
+                value = v["value"] if isinstance(v, dict) and "value" in v else v
+                try:
+                    inputs_dict[k] = resolve_value(value)
+                except (OSError, ValueError) as e:
+                    self.terminal_output.appendPlainText(
+                        f"[Error] Could not load stored output '{k}': {e}"
+                    )
+                    inputs_dict[k] = None
         elif isinstance(self.raw_inputs, list):
             inputs_dict = {k: None for k in self.raw_inputs}
 
         try:
-            result = run_node_code(code=code, inputs=inputs_dict)
+            result = run_node_code(
+                node_code=code,
+                inputs=inputs_dict,
+                profile=profile,
+                trace_memory=profile and self.trace_memory_check.isChecked(),
+                node_name=getattr(self.node, "title", None),
+            )
             stdout_text = result.get("stdout", "")
             stderr_text = result.get("stderr", "")
 
@@ -683,6 +731,12 @@ class NodeEditorDialog(QDialog):
                 self.terminal_output.appendPlainText(stdout_text)
             if stderr_text:
                 self.terminal_output.appendPlainText(f"[Error] {stderr_text}")
+            if result.get("profile"):
+                self.terminal_output.appendPlainText(format_profile(result["profile"]))
+            elif profile:
+                self.terminal_output.appendPlainText(
+                    "[Profile] No profile was recorded; the script did not finish."
+                )
 
             outputs = result.get("outputs", {}) or {}
             self.node.outputs = outputs
@@ -939,6 +993,30 @@ class NodeEditorWindow(QMainWindow):
             }}
         """)
 
+        # Requirements button
+        requirements_button = QPushButton("Requirements")
+        requirements_button.setFont(QFont("Poppins", 10, QFont.Weight.DemiBold))
+        requirements_button.setFixedHeight(34)
+        requirements_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        requirements_button.setToolTip(
+            "Python packages installed into a cached environment for this automation"
+        )
+        requirements_button.setStyleSheet(save_button.styleSheet())
+        requirements_button.clicked.connect(self.edit_requirements)
+
+        # History button
+        history_button = QPushButton("History")
+        history_button.setFont(QFont("Poppins", 10, QFont.Weight.DemiBold))
+        history_button.setFixedHeight(34)
+        history_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        history_button.setToolTip("Restore an earlier saved version of this automation")
+        history_button.setStyleSheet(save_button.styleSheet())
+        history_button.clicked.connect(self.restore_from_history)
+
+        save_button.clicked.connect(self.save_automation)
+
+        title_row.addWidget(requirements_button)
+        title_row.addWidget(history_button)
         title_row.addWidget(save_button)
         title_row.addWidget(play_button)
         right_layout.addWidget(title_bar)
@@ -953,6 +1031,43 @@ class NodeEditorWindow(QMainWindow):
         self.play_button = play_button
         self.play_button.clicked.connect(self.run_automation_with_cursor)
 
+    def edit_requirements(self):
+        current = "\n".join(self.canvas_widget.automation_data.get("requirements", []))
+        text, ok = QInputDialog.getMultiLineText(
+            self,
+            "Automation Requirements",
+            "One package per line (pip specifiers, e.g. pandas>=2.0):",
+            current,
+        )
+        if ok:
+            self.canvas_widget.set_requirements(text)
+
+    def restore_from_history(self):
+        self.canvas_widget.flush_canvas_state()
+        versions = list(reversed(self.canvas_widget.history.versions()))
+        if not versions:
+            QMessageBox.information(
+                self, "History", "No saved versions of this automation yet."
+            )
+            return
+
+        labels = [
+            f"v{entry.version} — "
+            f"{datetime.fromtimestamp(entry.timestamp).strftime('%Y-%m-%d %H:%M:%S')}"
+            f"{f'  ({entry.summary})' if entry.summary else ''}"
+            for entry in versions
+        ]
+        label, ok = QInputDialog.getItem(
+            self, "Restore Version", "Saved versions:", labels, 0, False
+        )
+        if not ok:
+            return
+        version = versions[labels.index(label)].version
+        try:
+            self.canvas_widget.restore_version(version)
+        except (OSError, KeyError, ValueError) as e:
+            QMessageBox.warning(self, "History", f"Could not restore v{version}: {e}")
+
     def run_automation_with_cursor(self):
         QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
         try:
@@ -961,6 +1076,22 @@ class NodeEditorWindow(QMainWindow):
             QApplication.restoreOverrideCursor()
 
     def load_automation(self):
+        data = self._load_automation_file()
+        store = get_automation_store()
+        if store is None:
+            return data
+
+        # The SQLite store owns the contents; the JSON file stays as the entry
+        # listed on the home screen and seeds the store on first open.
+        try:
+            if not store.has_automation(self.automation_name):
+                store.save_automation(self.automation_name, data)
+            data = store.load_meta(self.automation_name)
+        except sqlite3.Error as e:
+            print("Failed to open automation in the SQLite store:", e)
+        return data
+
+    def _load_automation_file(self):
         path = os.path.expanduser(f"~/.nodebox/automations/{self.automation_name}.json")
         if not os.path.exists(path):
             os.makedirs(os.path.dirname(path), exist_ok=True)
@@ -993,7 +1124,11 @@ class NodeEditorWindow(QMainWindow):
             print("Failed to read or initialize automation JSON:", e)
             return {"nodes": [], "connections": []}
 
+    def save_automation(self):
+        self.canvas_widget.flush_canvas_state()
+
     def closeEvent(self, event):
+        self.canvas_widget.autosave.close()
         self.closed.emit()
         event.accept()
 
@@ -14,6 +14,7 @@ from PyQt6.QtGui import (
 )
 from PyQt6.QtWidgets import QMenu, QMessageBox, QPushButton, QWidget
 
+from nodebox.core.process_sampler import format_bytes
 from nodebox.ui.canvas.ports import PortWidget
 
 
@@ -47,6 +48,7 @@ class NodeWidget(QWidget):
 
         self.selected = False
         self.is_dragging = False
+        self.moved_during_drag = False
         self.drag_offset = QPointF()
 
         self.is_editing = False
@@ -56,6 +58,9 @@ class NodeWidget(QWidget):
         self.execution_start_time = None
         self.execution_duration = None
         self.execution_error = None
+        self.execution_resources = None
+        # NodeRegression from the last run, if it was unusually slow
+        self.execution_regression = None
 
         self.animation_timer = None
         self.animation_counter = 0
@@ -184,6 +189,16 @@ class NodeWidget(QWidget):
                 "status_color": QColor("#FBB040"),
             }
         elif self.execution_status == ExecutionStatus.COMPLETED:
+            if self.execution_regression is not None:
+                return {
+                    "border": QColor("#10B981"),
+                    "background": QColor("#13151E"),
+                    "pulse": False,
+                    "status_text": (
+                        f"Done · {self.execution_regression.ratio:.1f}x slower"
+                    ),
+                    "status_color": QColor("#FBBF24"),
+                }
             return {
                 "border": QColor("#10B981"),
                 "background": QColor("#13151E"),
@@ -221,20 +236,54 @@ class NodeWidget(QWidget):
             duration_text = ""
             if self.execution_duration:
                 duration_text = f" in {self.execution_duration:.2f}s"
-            return f"{self.title}\nStatus: Completed{duration_text}"
+            return (
+                f"{self.title}\nStatus: Completed{duration_text}"
+                f"{self.get_regression_text()}"
+                f"{self.get_resources_text()}"
+            )
         elif self.execution_status == ExecutionStatus.FAILED:
             error_text = ""
             if self.execution_error:
                 error_text = f"\nError: {self.execution_error[:50]}..."
-            return f"{self.title}\nStatus: Failed{error_text}"
+            return (
+                f"{self.title}\nStatus: Failed{error_text}"
+                f"{self.get_resources_text()}"
+            )
         return f"{self.title}\nStatus: {self.execution_status.value}"
 
+    def get_resources_text(self):
+        res = self.execution_resources
+        if not res or not res.get("samples"):
+            return ""
+        return (
+            f"\nPeak memory: {format_bytes(res.get('peak_rss_bytes'))}"
+            f"  |  CPU: {res.get('cpu_seconds', 0.0):.2f}s"
+            f"\nI/O: {format_bytes(res.get('read_bytes'))} read, "
+            f"{format_bytes(res.get('write_bytes'))} written"
+            f"  |  Threads: {res.get('threads', 0)}"
+        )
+
+    def get_regression_text(self):
+        regression = self.execution_regression
+        if regression is None:
+            return ""
+        return (
+            f"\nSlower than usual: median {regression.baseline_s:.2f}s, "
+            f"p95 {regression.p95_s:.2f}s over {regression.samples} runs"
+        )
+
+    def set_execution_regression(self, regression):
+        self.execution_regression = regression
+        self.update()
+
     def set_execution_status(self, status, error=None):
         self.execution_status = status
         if status == ExecutionStatus.RUNNING:
             self.execution_start_time = time.time()
             self.execution_duration = None
             self.execution_error = None
+            self.execution_resources = None
+            self.execution_regression = None
             self.animation_counter = 0
             if self.animation_timer is None:
                 self.animation_timer = QTimer(self)
@@ -251,6 +300,8 @@ class NodeWidget(QWidget):
             self.execution_start_time = None
             self.execution_duration = None
             self.execution_error = None
+            self.execution_resources = None
+            self.execution_regression = None
             if self.animation_timer:
                 self.animation_timer.stop()
                 self.animation_timer = None
@@ -465,6 +516,7 @@ class NodeWidget(QWidget):
             self.logical_pos = logical_pos
             self.canvas.update_node_position(self.id, self.logical_pos)
             self.update_position()
+            self.moved_during_drag = True
 
     def mouseDoubleClickEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
@@ -493,12 +545,15 @@ class NodeWidget(QWidget):
 
             self.canvas.select_node(self)
             self.is_dragging = True
+            self.moved_during_drag = False
             self.drag_offset = event.pos()
 
     def mouseReleaseEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
             self.is_dragging = False
-            self.canvas.save_canvas_state()
+            if self.moved_during_drag:
+                self.moved_during_drag = False
+                self.canvas.persist_node_position(self)
 
 
 __all__ = ["ExecutionStatus", "NodeWidget"]
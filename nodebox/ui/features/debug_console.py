@@ -19,6 +19,9 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
+from nodebox.core.events import NodeRegression, get_event_bus
+from nodebox.services.node_stats import get_node_stats
+
 
 class LogExport(QThread):
     finished = pyqtSignal()
@@ -67,6 +70,14 @@ class DebugConsole(QWidget):
         self.init_ui()
         self.apply_styles()
 
+        for regression in list(get_node_stats().regressions):
+            self.log_regression(regression)
+        bus = get_event_bus()
+        token = bus.subscribe(
+            self._on_regressions, types=(NodeRegression,), on_gui_thread=True
+        )
+        self.destroyed.connect(lambda: bus.unsubscribe(token))
+
     def init_ui(self):
         self.layout = QVBoxLayout(self)
         self.layout.setContentsMargins(28, 28, 28, 28)
@@ -350,6 +361,18 @@ class DebugConsole(QWidget):
                 "ERROR", f"Node '{node_name}' failed: {error}", node_name=node_name
             )
 
+    def _on_regressions(self, events):
+        for event in events:
+            self.log_regression(event)
+
+    def log_regression(self, regression):
+        self.add_log(
+            "WARNING",
+            f"{regression.automation}: {regression.message}",
+            node_id=regression.node_id,
+            node_name=regression.node,
+        )
+
     def log_workflow_start(self, workflow_name):
         self.add_log("INFO", f"Starting workflow: {workflow_name}")
 
@@ -1,4 +1,5 @@
 import os
+import zipfile
 from datetime import datetime
 from pathlib import Path
 
@@ -20,7 +21,7 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
-from nodebox.services.storage import ExportWorker, ImportWorker
+from nodebox.services.storage import ExportWorker, ImportWorker, load_manifest
 
 
 class ExportImportManager(QWidget):
@@ -66,6 +67,14 @@ class ExportImportManager(QWidget):
         options_layout.addWidget(self.include_data_check)
         export_layout.addLayout(options_layout)
 
+        self.delta_check = QCheckBox("Only Export Changes Since a Previous Bundle")
+        self.delta_check.setFont(QFont("Poppins", 10))
+        self.delta_check.setToolTip(
+            "Pick an earlier .nodebox bundle or its .manifest.json; only files "
+            "whose content changed since then are packaged"
+        )
+        export_layout.addWidget(self.delta_check)
+
         export_button = QPushButton("Export Selected Workflows")
         export_button.setFont(QFont("Poppins", 10, QFont.Weight.DemiBold))
         export_button.setMinimumHeight(40)
@@ -164,10 +173,29 @@ class ExportImportManager(QWidget):
 
         workflows = [item.text() for item in selected_items]
 
+        base_manifest = None
+        if self.delta_check.isChecked():
+            base_path, _ = QFileDialog.getOpenFileName(
+                self,
+                "Select Base Bundle",
+                "exports",
+                "NodeBox Bundles (*.nodebox *.manifest.json)",
+            )
+            if not base_path:
+                return
+            try:
+                base_manifest = load_manifest(base_path)
+            except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+                QMessageBox.warning(
+                    self, "Invalid Base", f"Could not read the base manifest:\n{e}"
+                )
+                return
+
+        kind = "delta" if base_manifest else "export"
         file_path, _ = QFileDialog.getSaveFileName(
             self,
             "Export Workflows",
-            f"exports/nodebox_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.nodebox",
+            f"exports/nodebox_{kind}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.nodebox",
             "NodeBox Files (*.nodebox)",
         )
         if not file_path:
@@ -181,6 +209,7 @@ class ExportImportManager(QWidget):
             file_path,
             self.include_models_check.isChecked(),
             self.include_data_check.isChecked(),
+            base_manifest=base_manifest,
         )
         self.export_worker.progress.connect(self.progress_bar.setValue)
         self.export_worker.finished.connect(self.export_finished)
@@ -219,22 +248,29 @@ class ExportImportManager(QWidget):
 
         self.import_worker = ImportWorker(file_path)
         self.import_worker.progress.connect(self.progress_bar.setValue)
+        self.import_worker.status.connect(
+            lambda text: self.progress_bar.setFormat(f"%p%  ·  {text}")
+        )
         self.import_worker.finished.connect(self.import_finished)
         self.import_worker.error.connect(self.import_error)
         self.import_worker.start()
 
     def import_finished(self, imported_workflows):
         self.progress_bar.setVisible(False)
+        self.progress_bar.setFormat("%p%")
         self.load_workflows()
         QMessageBox.information(
             self,
             "Import Complete",
             f"Successfully imported {len(imported_workflows)} workflows:\n"
-            + "\n".join(imported_workflows),
+            + "\n".join(imported_workflows)
+            + "\n\n{written} files written, {skipped} already up to date, "
+            "{deleted} removed.".format(**self.import_worker.summary),
         )
 
     def import_error(self, error_message):
         self.progress_bar.setVisible(False)
+        self.progress_bar.setFormat("%p%")
         QMessageBox.critical(
             self, "Import Error", f"Failed to import workflows:\n{error_message}"
         )
@@ -1,24 +1,44 @@
 import json
-from collections import deque
+import math
+from bisect import bisect_left
 from datetime import datetime
 
-import psutil
-from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
 from PyQt6.QtGui import QFont
 from PyQt6.QtWidgets import (
+    QComboBox,
     QGridLayout,
     QGroupBox,
     QHBoxLayout,
     QLabel,
     QProgressBar,
     QPushButton,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
+    QTreeWidget,
+    QTreeWidgetItem,
     QVBoxLayout,
     QWidget,
 )
 
 from nodebox.core.bus import get_performance_bus
+from nodebox.core.events import NodeFinished, get_event_bus
+from nodebox.core.paths import CACHE_DIR
+from nodebox.core.process_sampler import ProcessTreeSampler, format_bytes
+from nodebox.core.timeseries import TimeSeriesStore
+
+METRICS_HISTORY_FILE = CACHE_DIR / "performance_history.tsdb"
+HISTORY_METRICS = ("cpu", "memory", "disk", "active_nodes", "errors")
+# Range shown in the history table -> seconds; the store picks the tier.
+HISTORY_RANGES = {
+    "Last 2 minutes": 120,
+    "Last hour": 3600,
+    "Last day": 86400,
+    "Last 30 days": 30 * 86400,
+}
+# Longer ranges are averaged down to this many rows; every tier fits.
+HISTORY_TABLE_ROWS = 5000
+
+PROCESS_COLUMNS = ["Process", "PID", "CPU %", "Memory", "Read/s", "Write/s"]
 
 
 class PerformanceMetrics:
@@ -51,17 +71,140 @@ class PerformanceMetrics:
         self.error_count = 0
 
 
+def _same_values(a, b):
+    return all(x == y or (math.isnan(x) and math.isnan(y)) for x, y in zip(a, b))
+
+
+class HistoryTableModel(QAbstractTableModel):
+    """``TimeSeriesStore`` points for the history table.
+
+    ``set_points`` lines the new points up with the current ones by
+    timestamp and reports only the difference (rows dropped at the top,
+    slots whose mean changed, rows appended), so a refresh costs a few
+    rows however long the range is.
+    """
+
+    COLUMNS = ["Time", "CPU %", "Memory %", "Disk %", "Active Nodes", "Errors"]
+    FORMATS = (None, "{:.1f}%", "{:.1f}%", "{:.1f}%", "{:.0f}", "{:.0f}")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.points = []
+        self.time_format = "%H:%M:%S"
+
+    def set_points(self, points, time_format):
+        old = self.points
+        start = None
+        if time_format == self.time_format and old and points:
+            timestamps = [timestamp for timestamp, _ in old]
+            start = bisect_left(timestamps, points[0][0])
+            overlap = min(len(old) - start, len(points))
+            if start == len(old) or any(
+                timestamps[start + k] != points[k][0] for k in range(overlap)
+            ):
+                start = None
+        if start is None:
+            self.beginResetModel()
+            self.points = list(points)
+            self.time_format = time_format
+            self.endResetModel()
+            return
+
+        if start:
+            self.beginRemoveRows(QModelIndex(), 0, start - 1)
+            del old[:start]
+            self.endRemoveRows()
+        if len(old) > overlap:
+            self.beginRemoveRows(QModelIndex(), overlap, len(old) - 1)
+            del old[overlap:]
+            self.endRemoveRows()
+
+        changed = [
+            k for k in range(overlap) if not _same_values(old[k][1], points[k][1])
+        ]
+        for k in changed:
+            old[k] = points[k]
+        if changed:
+            self.dataChanged.emit(
+                self.index(changed[0], 0),
+                self.index(changed[-1], len(self.COLUMNS) - 1),
+            )
+
+        if len(points) > overlap:
+            self.beginInsertRows(QModelIndex(), overlap, len(points) - 1)
+            old.extend(points[overlap:])
+            self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.points = []
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.points)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (
+            role == Qt.ItemDataRole.DisplayRole
+            and orientation == Qt.Orientation.Horizontal
+        ):
+            return self.COLUMNS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        column = index.column()
+        if role == Qt.ItemDataRole.TextAlignmentRole and column:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        timestamp, values = self.points[index.row()]
+        if column == 0:
+            return datetime.fromtimestamp(timestamp).strftime(self.time_format)
+        value = values[column - 1]
+        return "-" if math.isnan(value) else self.FORMATS[column].format(value)
+
+
+def _format_rate(bytes_per_second):
+    if bytes_per_second is None:
+        return "-"
+    return f"{format_bytes(bytes_per_second)}/s"
+
+
+def _process_label(entry):
+    kind = entry["kind"]
+    if kind == "gui":
+        return "NodeBox"
+    if kind == "ollama":
+        return "Ollama server"
+    if kind == "worker":
+        parts = [p for p in (entry.get("automation"), entry.get("node")) if p]
+        return " / ".join(parts) if parts else "Node worker"
+    return entry.get("name") or "?"
+
+
 class PerformanceMonitor(QWidget):
     metrics_updated = pyqtSignal(PerformanceMetrics)
+    # Hands snapshots from the sampler thread to the GUI thread.
+    _sampled = pyqtSignal(dict)
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.metrics = PerformanceMetrics()
-        self.history = deque(maxlen=50)
+        self.history = TimeSeriesStore(METRICS_HISTORY_FILE, HISTORY_METRICS)
+        self._peak_node_rss = 0
         self.monitoring = True
         self._update_interval = 2000
 
-        self.network_baseline = psutil.net_io_counters()
+        # psutil is only ever called on the sampler thread.
+        self.sampler = ProcessTreeSampler(
+            self._sampled.emit, interval=self._update_interval / 1000
+        )
+        self._sampled.connect(self.update_metrics)
 
         self.init_ui()
         self._subscribe_bus()
@@ -203,21 +346,59 @@ class PerformanceMonitor(QWidget):
         self.error_count_label.setFont(QFont("Poppins", 11))
         nodebox_layout.addWidget(self.error_count_label, 2, 0)
 
+        self.peak_node_label = QLabel("Peak Node Memory: -")
+        self.peak_node_label.setFont(QFont("Poppins", 11))
+        nodebox_layout.addWidget(self.peak_node_label, 2, 1)
+
         nodebox_group.setLayout(nodebox_layout)
         layout.addWidget(nodebox_group)
 
+        processes_group = QGroupBox("NodeBox Processes")
+        processes_group.setFont(QFont("Poppins", 13, QFont.Weight.Bold))
+        processes_layout = QVBoxLayout()
+
+        self.processes_total_label = QLabel("NodeBox total: -")
+        self.processes_total_label.setFont(QFont("Poppins", 11))
+        processes_layout.addWidget(self.processes_total_label)
+
+        self.process_tree = QTreeWidget()
+        self.process_tree.setColumnCount(len(PROCESS_COLUMNS))
+        self.process_tree.setHeaderLabels(PROCESS_COLUMNS)
+        self.process_tree.setFont(QFont("Poppins", 10))
+        self.process_tree.setMinimumHeight(180)
+        self.process_tree.setAlternatingRowColors(True)
+        self.process_tree.setColumnWidth(0, 320)
+        processes_layout.addWidget(self.process_tree)
+
+        if not ProcessTreeSampler.is_available():
+            self.processes_total_label.setText(
+                "Install psutil to see per-process resource usage."
+            )
+
+        processes_group.setLayout(processes_layout)
+        layout.addWidget(processes_group)
+
         history_group = QGroupBox("Performance History")
         history_group.setFont(QFont("Poppins", 13, QFont.Weight.Bold))
         history_layout = QVBoxLayout()
 
-        self.history_table = QTableWidget()
-        self.history_table.setColumnCount(6)
-        self.history_table.setHorizontalHeaderLabels(
-            ["Time", "CPU %", "Memory %", "Disk %", "Active Nodes", "Errors"]
+        self.history_range_combo = QComboBox()
+        self.history_range_combo.addItems(list(HISTORY_RANGES))
+        self.history_range_combo.setFont(QFont("Poppins", 10))
+        self.history_range_combo.currentIndexChanged.connect(
+            lambda _index: self.update_history_table()
         )
+        history_layout.addWidget(self.history_range_combo)
+
+        self.history_model = HistoryTableModel(self)
+        self.history_table = QTableView()
+        self.history_table.setModel(self.history_model)
         self.history_table.setFont(QFont("Poppins", 10))
         self.history_table.setMinimumHeight(260)
         self.history_table.setAlternatingRowColors(True)
+        self.history_table.verticalHeader().setVisible(False)
+        self.history_table.verticalHeader().setDefaultSectionSize(26)
+        self.history_table.horizontalHeader().setDefaultSectionSize(110)
         self.history_table.horizontalHeader().setStretchLastSection(True)
 
         history_layout.addWidget(self.history_table)
@@ -228,9 +409,7 @@ class PerformanceMonitor(QWidget):
 
     def start_monitoring(self):
         self.monitoring = True
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_metrics)
-        self.timer.start(self._update_interval)
+        self.sampler.start()
         self.start_button.setEnabled(False)
         self.stop_button.setEnabled(True)
 
@@ -238,9 +417,25 @@ class PerformanceMonitor(QWidget):
         try:
             bus = get_performance_bus()
             bus.metrics_signal.connect(self._on_app_metrics)
+            self._node_subscription = get_event_bus().subscribe(
+                self._on_node_events, types=(NodeFinished,), on_gui_thread=True
+            )
         except Exception:
             pass
 
+    def _on_node_events(self, events):
+        peak_event = None
+        for event in events:
+            rss = int((event.resources or {}).get("peak_rss_bytes", 0))
+            if rss > self._peak_node_rss:
+                self._peak_node_rss, peak_event = rss, event
+        if peak_event is None:
+            return
+        self.peak_node_label.setText(
+            f"Peak Node Memory: {peak_event.node or '?'} "
+            f"({format_bytes(self._peak_node_rss)})"
+        )
+
     def _on_app_metrics(self, data: dict):
         try:
             self.update_nodebox_metrics(
@@ -257,46 +452,94 @@ class PerformanceMonitor(QWidget):
 
     def stop_monitoring(self):
         self.monitoring = False
-        if hasattr(self, "timer"):
-            self.timer.stop()
+        self.sampler.stop()
         self.start_button.setEnabled(True)
         self.stop_button.setEnabled(False)
 
-    def update_metrics(self):
+    def update_metrics(self, snapshot):
+        """Apply a ``ProcessTreeSampler`` snapshot; runs on the GUI thread."""
         if not self.monitoring:
             return
 
         try:
-            self.metrics.cpu_usage = psutil.cpu_percent(interval=None)
-            memory = psutil.virtual_memory()
-            self.metrics.memory_usage = memory.percent
-
-            if (
-                not hasattr(self, "_disk_update_counter")
-                or self._disk_update_counter % 5 == 0
-            ):
-                disk = psutil.disk_usage("/")
-                self.metrics.disk_usage = (disk.used / disk.total) * 100
-                self._disk_update_counter = 0
-            self._disk_update_counter = getattr(self, "_disk_update_counter", 0) + 1
-
-            current_network = psutil.net_io_counters()
-            self.metrics.network_sent = (
-                current_network.bytes_sent - self.network_baseline.bytes_sent
-            )
-            self.metrics.network_recv = (
-                current_network.bytes_recv - self.network_baseline.bytes_recv
-            )
-            self.network_baseline = current_network
-
-            self.metrics.timestamp = datetime.now()
+            system = snapshot["system"]
+            self.metrics.cpu_usage = system["cpu_percent"]
+            self.metrics.memory_usage = system["memory_percent"]
+            self.metrics.disk_usage = system["disk_percent"]
+            self.metrics.network_sent = system["network_sent"]
+            self.metrics.network_recv = system["network_recv"]
+            self.metrics.timestamp = datetime.fromtimestamp(snapshot["timestamp"])
 
             self.update_ui()
+            self.update_process_tree(snapshot["processes"])
             self.add_to_history()
             self.metrics_updated.emit(self.metrics)
         except Exception:
             pass
 
+    def update_process_tree(self, processes):
+        """Show the sampled processes nested under their parents."""
+        by_pid = {entry["pid"]: entry for entry in processes}
+        expanded = {
+            item.data(0, Qt.ItemDataRole.UserRole)
+            for item in self._tree_items()
+            if item.isExpanded()
+        }
+        self.process_tree.setUpdatesEnabled(False)
+        try:
+            self.process_tree.clear()
+            items = {}
+
+            def add(entry):
+                pid = entry["pid"]
+                if pid in items:
+                    return items[pid]
+                parent = by_pid.get(entry["ppid"])
+                parent_item = add(parent) if parent and parent is not entry else None
+                item = QTreeWidgetItem(
+                    [
+                        _process_label(entry),
+                        str(pid),
+                        f"{entry['cpu_percent']:.1f}",
+                        format_bytes(entry["rss_bytes"]),
+                        _format_rate(entry["read_bps"]),
+                        _format_rate(entry["write_bps"]),
+                    ]
+                )
+                item.setData(0, Qt.ItemDataRole.UserRole, pid)
+                item.setToolTip(0, entry.get("name") or "")
+                if parent_item is None:
+                    self.process_tree.addTopLevelItem(item)
+                else:
+                    parent_item.addChild(item)
+                items[pid] = item
+                return item
+
+            for entry in processes:
+                add(entry)
+            for pid, item in items.items():
+                item.setExpanded(pid in expanded or item.parent() is None)
+        finally:
+            self.process_tree.setUpdatesEnabled(True)
+
+        cpu = sum(entry["cpu_percent"] for entry in processes)
+        rss = sum(entry["rss_bytes"] for entry in processes)
+        workers = sum(1 for entry in processes if entry["kind"] == "worker")
+        self.processes_total_label.setText(
+            f"NodeBox total: CPU {cpu:.1f}%, memory {format_bytes(rss)}, "
+            f"{workers} node workers"
+        )
+
+    def _tree_items(self):
+        stack = [
+            self.process_tree.topLevelItem(i)
+            for i in range(self.process_tree.topLevelItemCount())
+        ]
+        while stack:
+            item = stack.pop()
+            yield item
+            stack.extend(item.child(i) for i in range(item.childCount()))
+
     def update_ui(self):
         self.cpu_progress.setValue(int(self.metrics.cpu_usage))
         self.cpu_label.setText(f"CPU Usage: {self.metrics.cpu_usage:.1f}%")
@@ -350,44 +593,28 @@ class PerformanceMonitor(QWidget):
     def add_to_history(self):
         self.history.append(
             {
-                "timestamp": self.metrics.timestamp,
                 "cpu": self.metrics.cpu_usage,
                 "memory": self.metrics.memory_usage,
                 "disk": self.metrics.disk_usage,
                 "active_nodes": self.metrics.active_nodes,
                 "errors": self.metrics.error_count,
-            }
+            },
+            self.metrics.timestamp.timestamp(),
         )
+        self.update_history_table()
 
-        if (
-            not hasattr(self, "_history_update_counter")
-            or self._history_update_counter % 5 == 0
-        ):
-            self.update_history_table()
-            self._history_update_counter = 0
-        self._history_update_counter = getattr(self, "_history_update_counter", 0) + 1
+    def _history_points(self):
+        seconds = HISTORY_RANGES[self.history_range_combo.currentText()]
+        return self.history.latest(seconds, max_points=HISTORY_TABLE_ROWS), seconds
 
     def update_history_table(self):
-        self.history_table.setRowCount(len(self.history))
-        for i, entry in enumerate(self.history):
-            self.history_table.setItem(
-                i, 0, QTableWidgetItem(entry["timestamp"].strftime("%H:%M:%S"))
-            )
-            self.history_table.setItem(i, 1, QTableWidgetItem(f"{entry['cpu']:.1f}%"))
-            self.history_table.setItem(
-                i, 2, QTableWidgetItem(f"{entry['memory']:.1f}%")
-            )
-            self.history_table.setItem(i, 3, QTableWidgetItem(f"{entry['disk']:.1f}%"))
-            self.history_table.setItem(
-                i, 4, QTableWidgetItem(str(entry["active_nodes"]))
-            )
-            self.history_table.setItem(i, 5, QTableWidgetItem(str(entry["errors"])))
-
-        self.history_table.resizeColumnsToContents()
-        for col in range(self.history_table.columnCount()):
-            if self.history_table.columnWidth(col) < 80:
-                self.history_table.setColumnWidth(col, 80)
-        self.history_table.scrollToBottom()
+        points, seconds = self._history_points()
+        time_format = "%H:%M:%S" if seconds <= 3600 else "%m-%d %H:%M"
+        scrollbar = self.history_table.verticalScrollBar()
+        follow = scrollbar.value() >= scrollbar.maximum()
+        self.history_model.set_points(points, time_format)
+        if follow:
+            self.history_table.scrollToBottom()
 
     def update_nodebox_metrics(
         self, active_nodes, total_nodes, workflows_running, execution_time, error_count
@@ -401,11 +628,11 @@ class PerformanceMonitor(QWidget):
     def reset_metrics(self):
         self.history.clear()
         self.metrics = PerformanceMetrics()
-        self.network_baseline = psutil.net_io_counters()
         self.update_ui()
-        self.history_table.setRowCount(0)
-        self._disk_update_counter = 0
-        self._history_update_counter = 0
+        self.history_model.clear()
+        self.process_tree.clear()
+        self._peak_node_rss = 0
+        self.peak_node_label.setText("Peak Node Memory: -")
 
     def export_metrics(self, filename=None):
         if filename is None:
@@ -426,14 +653,13 @@ class PerformanceMonitor(QWidget):
             },
             "history": [
                 {
-                    "timestamp": entry["timestamp"].isoformat(),
-                    "cpu": entry["cpu"],
-                    "memory": entry["memory"],
-                    "disk": entry["disk"],
-                    "active_nodes": entry["active_nodes"],
-                    "errors": entry["errors"],
+                    "timestamp": datetime.fromtimestamp(timestamp).isoformat(),
+                    **{
+                        name: None if math.isnan(value) else value
+                        for name, value in zip(HISTORY_METRICS, values)
+                    },
                 }
-                for entry in self.history
+                for timestamp, values in self._history_points()[0]
             ],
         }
 
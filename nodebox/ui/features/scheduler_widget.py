@@ -1,27 +1,230 @@
 import json
 import os
-from datetime import datetime, timedelta
+import threading
+import time
+from collections import Counter
+from datetime import datetime
 
-from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont, QIcon
 from PyQt6.QtWidgets import (
     QCheckBox,
     QComboBox,
     QDialog,
+    QDoubleSpinBox,
     QFormLayout,
     QHBoxLayout,
     QLabel,
     QLineEdit,
+    QMessageBox,
     QPushButton,
     QScrollArea,
-    QTableWidget,
-    QTableWidgetItem,
+    QSpinBox,
+    QTableView,
     QVBoxLayout,
     QWidget,
 )
 
+from nodebox.core.bus import get_performance_bus
 from nodebox.core.paths import resource_path
-from nodebox.services.scheduler import ScheduleItem
+from nodebox.core.settings import get_setting
+from nodebox.services.cron import available_timezones
+from nodebox.services.daemon import SchedulerLock
+from nodebox.services.headless import record_skipped
+from nodebox.services.placement import (
+    estimate_durations,
+    expected_peak,
+    spread_schedules,
+)
+from nodebox.services.run_history import RUN_HISTORY_FILE, schedule_stats
+from nodebox.services.scheduler import (
+    DEFAULT_DEBOUNCE_SECONDS,
+    DEFAULT_GRACE_SECONDS,
+    DEFAULT_MISFIRE_LIMIT,
+    MISFIRE_POLICIES,
+    SCHEDULES_FILE,
+    ScheduleItem,
+    ScheduleQueue,
+    collect_due,
+    load_schedules,
+    merge_schedule_edits,
+    migrate_legacy_schedules,
+    save_schedules,
+    schedules_lock,
+    update_next_run,
+    validate_schedule,
+)
+from nodebox.services.triggers import WatchTriggerService, trigger_inputs
+
+# Upper bound for a single timer wait, so wall clock jumps (sleep, DST,
+# manual changes) are noticed within this interval.
+MAX_TIMER_WAIT_MS = 15 * 60 * 1000
+# While the background scheduler owns the schedules, check this often
+# whether it has exited.
+LOCK_RETRY_MS = 30 * 1000
+# Run durations are re-read from the run history at most this often.
+DURATIONS_MAX_AGE_S = 300
+# Finished runs are folded into the lateness statistics after this delay,
+# so a burst of completions reads the run history once.
+STATS_REFRESH_DELAY_MS = 1000
+
+VALUE_HINTS = {
+    "once": "Date and time, e.g. 2025-06-01 09:30",
+    "interval": "Minutes between runs, e.g. 30",
+    "daily": "Time of day, e.g. 09:00",
+    "cron": "Cron expression, e.g. */15 9-17 * * mon-fri",
+    "watch": "Folder to watch, e.g. ~/Inbox",
+}
+
+
+def _format_seconds(value):
+    if value is None:
+        return "-"
+    if abs(value) < 60:
+        return f"{value:.1f}s"
+    return f"{value / 60:.1f}m"
+
+
+class ScheduleTableModel(QAbstractTableModel):
+    """Rows of ``WorkflowScheduler.schedules``, formatted on demand.
+
+    The list is shared with the widget, which changes it only through
+    ``append``/``remove``/``set_schedules`` and reports edited rows with
+    ``row_changed``, so the view repaints just those rows.
+    """
+
+    COLUMNS = [
+        "Name",
+        "Automation",
+        "Type",
+        "Status",
+        "Next Run",
+        "Runs",
+        "Lateness p50/p95/p99",
+    ]
+    STATS_COLUMN = 6
+
+    def __init__(self, schedules=None, parent=None):
+        super().__init__(parent)
+        self.schedules = schedules if schedules is not None else []
+        self.stats = {}
+        self._rows = None
+        self._bold = QFont("Poppins", 10, QFont.Weight.Bold)
+
+    # -- changes -----------------------------------------------------------
+
+    def set_schedules(self, schedules):
+        self.beginResetModel()
+        self.schedules = schedules
+        self._rows = None
+        self.endResetModel()
+
+    def append(self, schedule):
+        row = len(self.schedules)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.schedules.append(schedule)
+        self._rows = None
+        self.endInsertRows()
+        return row
+
+    def remove(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        schedule = self.schedules.pop(row)
+        self._rows = None
+        self.endRemoveRows()
+        return schedule
+
+    def row_of(self, schedule):
+        if self._rows is None:
+            self._rows = {id(s): row for row, s in enumerate(self.schedules)}
+        return self._rows.get(id(schedule), -1)
+
+    def row_changed(self, row):
+        if 0 <= row < len(self.schedules):
+            self.dataChanged.emit(
+                self.index(row, 0), self.index(row, len(self.COLUMNS) - 1)
+            )
+
+    def set_stats(self, stats):
+        self.stats = stats
+        if self.schedules:
+            self.dataChanged.emit(
+                self.index(0, self.STATS_COLUMN),
+                self.index(len(self.schedules) - 1, self.STATS_COLUMN),
+            )
+
+    # -- QAbstractTableModel ---------------------------------------------------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.schedules)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (
+            role == Qt.ItemDataRole.DisplayRole
+            and orientation == Qt.Orientation.Horizontal
+        ):
+            return self.COLUMNS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        schedule = self.schedules[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._display(schedule, column)
+        if role == Qt.ItemDataRole.FontRole and column == 0:
+            return self._bold
+        if role == Qt.ItemDataRole.ToolTipRole and column == self.STATS_COLUMN:
+            return self._stats_tooltip(self.stats.get(schedule.name))
+        return None
+
+    def _display(self, schedule, column):
+        if column == 0:
+            return schedule.name
+        if column == 1:
+            return schedule.automation_name
+        if column == 2:
+            return schedule.schedule_type.capitalize()
+        if column == 3:
+            return "Enabled" if schedule.enabled else "Disabled"
+        if column == 4:
+            if schedule.schedule_type == "watch":
+                return f"On change: {schedule.watch_pattern}"
+            if schedule.next_run:
+                return schedule.next_run.strftime("%Y-%m-%d %H:%M")
+            return "Not scheduled"
+        if column == 5:
+            return str(schedule.run_count)
+        stats = self.stats.get(schedule.name)
+        if stats is None:
+            return "-"
+        lateness = stats["lateness_s"]
+        return " / ".join(
+            _format_seconds(lateness[key]) for key in ("p50", "p95", "p99")
+        )
+
+    @staticmethod
+    def _stats_tooltip(stats):
+        if stats is None:
+            return None
+        return (
+            "\n".join(
+                f"{label}: "
+                + " / ".join(
+                    _format_seconds(stats[field][key]) for key in ("p50", "p95", "p99")
+                )
+                for label, field in (
+                    ("Lateness", "lateness_s"),
+                    ("Queue wait", "queue_wait_s"),
+                    ("Duration", "duration_s"),
+                )
+            )
+            + f"\nLast {stats['runs']} runs"
+        )
 
 
 class ScheduleDialog(QDialog):
@@ -58,15 +261,88 @@ class ScheduleDialog(QDialog):
         form_layout.addRow("Automation Name:", self.automation_edit)
 
         self.type_combo = QComboBox()
-        self.type_combo.addItems(["once", "interval", "daily"])
+        self.type_combo.addItems(list(VALUE_HINTS))
         self.type_combo.setMinimumHeight(38)
         form_layout.addRow("Schedule Type:", self.type_combo)
 
         self.value_edit = QLineEdit()
         self.value_edit.setMinimumHeight(38)
-        self.value_edit.setPlaceholderText("For interval: minutes (e.g., 30)")
         form_layout.addRow("Interval / Time:", self.value_edit)
 
+        self.timezone_combo = QComboBox()
+        self.timezone_combo.setEditable(True)
+        self.timezone_combo.addItem("Local")
+        self.timezone_combo.addItems(sorted(available_timezones()))
+        self.timezone_combo.setMinimumHeight(38)
+        form_layout.addRow("Time Zone:", self.timezone_combo)
+
+        self.misfire_combo = QComboBox()
+        self.misfire_combo.addItems(MISFIRE_POLICIES)
+        self.misfire_combo.setMinimumHeight(38)
+        self.misfire_combo.setToolTip(
+            "run_once: one catch-up run for all missed times\n"
+            "skip: ignore missed times\n"
+            "run_all: replay missed times, up to the limit"
+        )
+        form_layout.addRow("When Missed:", self.misfire_combo)
+
+        self.misfire_limit_spin = QSpinBox()
+        self.misfire_limit_spin.setRange(0, 1000)
+        self.misfire_limit_spin.setValue(DEFAULT_MISFIRE_LIMIT)
+        self.misfire_limit_spin.setMinimumHeight(38)
+        form_layout.addRow("Replay Limit:", self.misfire_limit_spin)
+
+        self.grace_spin = QSpinBox()
+        self.grace_spin.setRange(0, 24 * 3600)
+        self.grace_spin.setValue(DEFAULT_GRACE_SECONDS)
+        self.grace_spin.setSuffix(" s")
+        self.grace_spin.setMinimumHeight(38)
+        form_layout.addRow("Grace Window:", self.grace_spin)
+
+        self.concurrency_spin = QSpinBox()
+        self.concurrency_spin.setRange(1, 16)
+        self.concurrency_spin.setValue(1)
+        self.concurrency_spin.setMinimumHeight(38)
+        self.concurrency_spin.setToolTip(
+            "Runs of this schedule allowed at the same time; 1 never overlaps"
+        )
+        form_layout.addRow("Max Concurrent:", self.concurrency_spin)
+
+        self.jitter_spin = QSpinBox()
+        self.jitter_spin.setRange(0, 24 * 3600)
+        self.jitter_spin.setSuffix(" s")
+        self.jitter_spin.setMinimumHeight(38)
+        self.jitter_spin.setToolTip(
+            "Start each run up to this much later, so schedules sharing a "
+            "time do not all fire in the same second"
+        )
+        form_layout.addRow("Random Delay:", self.jitter_spin)
+
+        self.misfire_combo.currentTextChanged.connect(
+            lambda policy: self.misfire_limit_spin.setEnabled(policy == "run_all")
+        )
+        self.misfire_limit_spin.setEnabled(False)
+
+        self.pattern_edit = QLineEdit()
+        self.pattern_edit.setMinimumHeight(38)
+        self.pattern_edit.setPlaceholderText("*  (e.g. *.csv)")
+        self.pattern_edit.setToolTip(
+            "Root nodes receive trigger_paths and trigger_directory as inputs"
+        )
+        form_layout.addRow("File Pattern:", self.pattern_edit)
+
+        self.debounce_spin = QDoubleSpinBox()
+        self.debounce_spin.setRange(0, 3600)
+        self.debounce_spin.setDecimals(1)
+        self.debounce_spin.setValue(DEFAULT_DEBOUNCE_SECONDS)
+        self.debounce_spin.setSuffix(" s")
+        self.debounce_spin.setMinimumHeight(38)
+        self.debounce_spin.setToolTip("Wait this long after the last change")
+        form_layout.addRow("Quiet Period:", self.debounce_spin)
+
+        self.type_combo.currentTextChanged.connect(self._on_type_changed)
+        self._on_type_changed(self.type_combo.currentText())
+
         self.enabled_check = QCheckBox("Enable Schedule Immediately")
         self.enabled_check.setChecked(True)
         self.enabled_check.setFont(QFont("Poppins", 10))
@@ -121,26 +397,77 @@ class ScheduleDialog(QDialog):
         layout.addLayout(button_layout)
         self.setLayout(layout)
 
+    def _on_type_changed(self, schedule_type):
+        self.value_edit.setPlaceholderText(VALUE_HINTS.get(schedule_type, ""))
+        self.timezone_combo.setEnabled(schedule_type in ("daily", "cron"))
+        self.pattern_edit.setEnabled(schedule_type == "watch")
+        self.debounce_spin.setEnabled(schedule_type == "watch")
+
+    def accept(self):
+        try:
+            validate_schedule(self.get_schedule())
+        except ValueError as e:
+            QMessageBox.warning(self, "Invalid Schedule", str(e))
+            return
+        super().accept()
+
     def get_schedule(self):
+        timezone = self.timezone_combo.currentText().strip()
         return ScheduleItem(
             self.name_edit.text(),
             self.automation_edit.text(),
             self.type_combo.currentText(),
-            self.value_edit.text(),
+            self.value_edit.text().strip(),
             self.enabled_check.isChecked(),
+            timezone if timezone and timezone != "Local" else None,
+            misfire_policy=self.misfire_combo.currentText(),
+            misfire_limit=self.misfire_limit_spin.value(),
+            max_concurrency=self.concurrency_spin.value(),
+            grace_seconds=self.grace_spin.value(),
+            watch_pattern=self.pattern_edit.text().strip() or "*",
+            debounce_seconds=self.debounce_spin.value(),
+            jitter_seconds=self.jitter_spin.value(),
         )
 
 
 class WorkflowScheduler(QWidget):
-    schedule_triggered = pyqtSignal(str)
+    # automation name, schedule name, back-to-back runs, planned start
+    schedule_triggered = pyqtSignal(str, str, int, object)
+    # automation name, schedule name, root node inputs, planned start
+    watch_triggered = pyqtSignal(str, str, dict, object)
+
+    _trigger_fired = pyqtSignal(str, list, object)
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.schedules = []
-        self.timer = QTimer()
+        self.queue = ScheduleQueue()
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
         self.timer.timeout.connect(self.check_schedules)
-        self.timer.start(30000)
-        self._schedules_file = "data/schedules.json"
+        self._schedules_file = SCHEDULES_FILE
+        migrate_legacy_schedules()
+        self._known_mtime_ns = None
+        # Names in the file as last read or written, to tell deletions made
+        # here from schedules another process added.
+        self._known_names = set()
+        self.lock = SchedulerLock("gui")
+        # schedule name -> runs started here and not yet finished; the
+        # trigger thread reserves runs too, so changes take _running_lock.
+        self.running = Counter()
+        self._running_lock = threading.Lock()
+        self.triggers = WatchTriggerService(self._dispatch_trigger)
+        self._trigger_fired.connect(self._on_trigger_fired)
+        # automation name -> typical run seconds, refreshed on load
+        self._durations = {}
+        self._durations_at = None
+        # schedule name -> timing percentiles from the run history
+        self._stats = {}
+        self._stats_mtime_ns = None
+        self._stats_timer = QTimer(self)
+        self._stats_timer.setSingleShot(True)
+        self._stats_timer.setInterval(STATS_REFRESH_DELAY_MS)
+        self._stats_timer.timeout.connect(self.refresh_stats)
         self.init_ui()
         self.load_schedules()
 
@@ -165,6 +492,12 @@ class WorkflowScheduler(QWidget):
         subtitle.setStyleSheet("color: #4A5578; margin-bottom: 4px;")
         main_layout.addWidget(subtitle)
 
+        self.owner_label = QLabel()
+        self.owner_label.setFont(QFont("Poppins", 10))
+        self.owner_label.setStyleSheet("color: #F59E0B;")
+        self.owner_label.setVisible(False)
+        main_layout.addWidget(self.owner_label)
+
         scroll = QScrollArea()
         scroll.setWidgetResizable(True)
         scroll.setStyleSheet("QScrollArea { border: none; background: transparent; }")
@@ -264,24 +597,56 @@ class WorkflowScheduler(QWidget):
         self.delete_button.clicked.connect(self.delete_selected)
         actions_layout.addWidget(self.delete_button)
 
+        self.spread_button = QPushButton("  Spread Load")
+        self.spread_button.setIcon(self.get_icon("activity"))
+        self.spread_button.setFont(QFont("Poppins", 11, QFont.Weight.Bold))
+        self.spread_button.setMinimumHeight(42)
+        self.spread_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.spread_button.setToolTip(
+            "Shift interval schedules within their interval so runs overlap less"
+        )
+        self.spread_button.setStyleSheet(
+            """
+            QPushButton {
+                padding: 10px 22px;
+                background-color: #161922;
+                color: #C8D0E8;
+                border: 1px solid #1E2538;
+                border-radius: 8px;
+                text-align: left;
+            }
+            QPushButton:hover {
+                border-color: #6366F1;
+                color: #F0F2F8;
+            }
+        """
+        )
+        self.spread_button.clicked.connect(self.spread_load)
+        actions_layout.addWidget(self.spread_button)
+
         actions_layout.addStretch()
         content_layout.addLayout(actions_layout)
 
+        self.load_label = QLabel()
+        self.load_label.setFont(QFont("Poppins", 10))
+        self.load_label.setStyleSheet("color: #8892B0;")
+        content_layout.addWidget(self.load_label)
+
         tasks_label = QLabel("Scheduled Tasks")
         tasks_label.setFont(QFont("Poppins", 14, QFont.Weight.Bold))
         tasks_label.setStyleSheet("color: #F9FAFB;")
         content_layout.addWidget(tasks_label)
 
-        self.schedules_table = QTableWidget()
-        self.schedules_table.setColumnCount(6)
-        self.schedules_table.setHorizontalHeaderLabels(
-            ["Name", "Automation", "Type", "Status", "Next Run", "Runs"]
-        )
+        self.schedules_model = ScheduleTableModel(self.schedules, self)
+        self.schedules_table = QTableView()
+        self.schedules_table.setModel(self.schedules_model)
         self.schedules_table.setFont(QFont("Poppins", 10))
         self.schedules_table.setAlternatingRowColors(True)
         self.schedules_table.setSelectionBehavior(
-            QTableWidget.SelectionBehavior.SelectRows
+            QTableView.SelectionBehavior.SelectRows
         )
+        self.schedules_table.setSelectionMode(QTableView.SelectionMode.SingleSelection)
+        self.schedules_table.verticalHeader().setDefaultSectionSize(30)
         self.schedules_table.setMinimumHeight(300)
         self.schedules_table.horizontalHeader().setStretchLastSection(True)
         content_layout.addWidget(self.schedules_table)
@@ -300,145 +665,271 @@ class WorkflowScheduler(QWidget):
             self.add_schedule(schedule)
 
     def add_schedule(self, schedule):
-        self.schedules.append(schedule)
         self.update_next_run(schedule)
-        self.update_table()
+        self.schedules_model.append(schedule)
+        self.queue.push(schedule)
         self.save_schedules()
+        self._arm_timer()
+        self.update_load_summary()
 
     def update_table(self):
-        self.schedules_table.setRowCount(len(self.schedules))
-
-        for i, schedule in enumerate(self.schedules):
-            name_item = QTableWidgetItem(schedule.name)
-            name_item.setFont(QFont("Poppins", 10, QFont.Weight.Bold))
-            self.schedules_table.setItem(i, 0, name_item)
-
-            self.schedules_table.setItem(
-                i, 1, QTableWidgetItem(schedule.automation_name)
+        self.schedules_model.set_schedules(self.schedules)
+        self.update_load_summary()
+
+    def _worker_budget(self):
+        return get_setting("scheduler_max_workers", 2)
+
+    def update_load_summary(self):
+        """Show how many runs are expected to overlap at the busiest moment."""
+        peak = expected_peak(self.schedules, self._durations)
+        budget = self._worker_budget()
+        text = f"Expected peak concurrency: {peak} runs (worker budget {budget})"
+        color = "#8892B0"
+        if peak > budget:
+            text += " - runs will queue; try Spread Load or a random delay"
+            color = "#F59E0B"
+        overall = self._stats.get("*")
+        if overall and overall["queue_wait_s"]["p95"] is not None:
+            text += (
+                f"\nObserved over {overall['runs']} runs: p95 lateness "
+                f"{_format_seconds(overall['lateness_s']['p95'])}, p95 queue wait "
+                f"{_format_seconds(overall['queue_wait_s']['p95'])}"
             )
+        self.load_label.setText(text)
+        self.load_label.setStyleSheet(f"color: {color};")
+
+    def _refresh_durations(self, force=False):
+        now = time.monotonic()
+        if (
+            force
+            or self._durations_at is None
+            or now - self._durations_at > DURATIONS_MAX_AGE_S
+        ):
+            self._durations = estimate_durations()
+            self._durations_at = now
+
+    def _history_mtime_ns(self):
+        try:
+            return os.stat(RUN_HISTORY_FILE).st_mtime_ns
+        except OSError:
+            return None
+
+    def refresh_stats(self, force=False):
+        """Re-read timing percentiles if the run history changed."""
+        mtime_ns = self._history_mtime_ns()
+        if not force and mtime_ns == self._stats_mtime_ns:
+            return
+        self._stats_mtime_ns = mtime_ns
+        self._stats = schedule_stats()
+        self.schedules_model.set_stats(self._stats)
+        self.update_load_summary()
+        get_performance_bus().scheduler_metrics_signal.emit(self._stats)
+
+    def spread_load(self):
+        if not self._owns_schedules():
+            return
+        self._refresh_durations(force=True)
+        plan = spread_schedules(self.schedules, self._worker_budget(), self._durations)
+        if plan.moved:
+            self.queue.rebuild(self.schedules)
+            self.save_schedules()
+            self._arm_timer()
+        self.update_table()
+        QMessageBox.information(
+            self,
+            "Spread Load",
+            f"Moved {len(plan.moved)} interval schedules.\n"
+            f"Expected peak concurrency: {plan.peak_before} -> {plan.peak_after} "
+            f"(worker budget {plan.budget}).",
+        )
 
-            type_item = QTableWidgetItem(schedule.schedule_type.capitalize())
-            self.schedules_table.setItem(i, 2, type_item)
-
-            status_text = "Enabled" if schedule.enabled else "Disabled"
-            status_item = QTableWidgetItem(status_text)
-            self.schedules_table.setItem(i, 3, status_item)
-
-            next_run_text = (
-                schedule.next_run.strftime("%Y-%m-%d %H:%M")
-                if schedule.next_run
-                else "Not scheduled"
+    def update_row(self, row):
+        self.schedules_model.row_changed(row)
+
+    def _current_row(self):
+        index = self.schedules_table.currentIndex()
+        return index.row() if index.isValid() else -1
+
+    def _owns_schedules(self):
+        """Take the scheduler lock if free; otherwise show who holds it."""
+        owned = self.lock.acquire()
+        if not owned:
+            holder = self.lock.holder() or {}
+            self.owner_label.setText(
+                "Schedules are being run by the background scheduler "
+                f"(pid {holder.get('pid', '?')})."
             )
-            self.schedules_table.setItem(i, 4, QTableWidgetItem(next_run_text))
+        self.owner_label.setVisible(not owned)
+        # Both write run state, which belongs to the owner.
+        self.run_now_button.setEnabled(owned)
+        self.spread_button.setEnabled(owned)
+        if owned:
+            self.triggers.set_schedules(self.schedules)
+        return owned
+
+    def _running_count(self, schedule_name):
+        with self._running_lock:
+            return self.running[schedule_name]
+
+    def _add_running(self, schedule_name):
+        with self._running_lock:
+            self.running[schedule_name] += 1
+
+    def _dispatch_trigger(self, schedule, paths):
+        # Runs on the trigger thread; the signal hands over to the GUI thread.
+        # The run is counted here so a second batch cannot slip past the
+        # limit before the GUI thread has seen the first.
+        with self._running_lock:
+            if self.running[schedule.name] >= schedule.max_concurrency:
+                return False
+            self.running[schedule.name] += 1
+        self._trigger_fired.emit(schedule.name, paths, datetime.now())
+        return True
+
+    def _on_trigger_fired(self, schedule_name, paths, planned_at):
+        for row, schedule in enumerate(self.schedules):
+            if schedule.name == schedule_name:
+                break
+        else:
+            self.run_finished(schedule_name)
+            return
+        schedule.last_run = datetime.now()
+        schedule.run_count += 1
+        self.update_row(row)
+        self.save_schedules()
+        self.watch_triggered.emit(
+            schedule.automation_name,
+            schedule.name,
+            trigger_inputs(schedule, paths),
+            planned_at,
+        )
 
-            self.schedules_table.setItem(
-                i, 5, QTableWidgetItem(str(schedule.run_count))
-            )
+    def _arm_timer(self):
+        """Sleep until the earliest enabled schedule is due."""
+        if not self._owns_schedules():
+            # Changes made by the owner arrive through reload_schedules.
+            self.timer.start(LOCK_RETRY_MS)
+            return
+        next_run = self.queue.peek_time()
+        if next_run is None:
+            self.timer.stop()
+            return
+        wait_ms = (next_run - datetime.now()).total_seconds() * 1000
+        self.timer.start(int(min(max(wait_ms, 0), MAX_TIMER_WAIT_MS)))
 
     def check_schedules(self):
-        now = datetime.now()
-
-        for schedule in self.schedules:
-            if not schedule.enabled:
-                continue
-
-            if schedule.next_run and now >= schedule.next_run:
-                self.schedule_triggered.emit(schedule.automation_name)
-                schedule.last_run = now
-                schedule.run_count += 1
-                self.update_next_run(schedule)
+        if not self._owns_schedules():
+            # Runs by the background scheduler only show up in the history.
+            self.refresh_stats()
+            self._arm_timer()
+            return
+        due_runs = collect_due(self.queue, running=self._running_count)
+
+        for due in due_runs:
+            schedule = due.schedule
+            if due.runs:
+                self._add_running(schedule.name)
+                self.schedule_triggered.emit(
+                    schedule.automation_name, schedule.name, due.runs, due.planned_at
+                )
+            else:
+                record_skipped(due, "gui")
+            self.update_row(self.schedules_model.row_of(schedule))
+
+        if due_runs:
+            self.save_schedules()
+        self._arm_timer()
 
-        self.update_table()
-        self.save_schedules()
+    def run_finished(self, schedule_name):
+        """Called when a run started by ``schedule_triggered`` has ended."""
+        with self._running_lock:
+            if self.running[schedule_name] > 1:
+                self.running[schedule_name] -= 1
+            else:
+                self.running.pop(schedule_name, None)
+        self._stats_timer.start()
 
     def update_next_run(self, schedule):
-        now = datetime.now()
-
-        if schedule.schedule_type == "interval":
-            interval_minutes = int(schedule.schedule_value)
-            schedule.next_run = now + timedelta(minutes=interval_minutes)
-        elif schedule.schedule_type == "daily":
-            schedule.next_run = now + timedelta(days=1)
-        elif schedule.schedule_type == "once":
-            schedule.enabled = False
-            schedule.next_run = None
+        update_next_run(schedule)
 
     def toggle_selected(self):
-        current_row = self.schedules_table.currentRow()
+        current_row = self._current_row()
         if current_row >= 0:
-            self.schedules[current_row].enabled = not self.schedules[
-                current_row
-            ].enabled
-            if self.schedules[current_row].enabled:
-                self.update_next_run(self.schedules[current_row])
-            self.update_table()
+            schedule = self.schedules[current_row]
+            schedule.enabled = not schedule.enabled
+            if schedule.enabled:
+                self.update_next_run(schedule)
+            self.queue.push(schedule)
+            self.update_row(current_row)
             self.save_schedules()
+            self._arm_timer()
+            self.update_load_summary()
 
     def delete_selected(self):
-        current_row = self.schedules_table.currentRow()
+        current_row = self._current_row()
         if current_row >= 0:
-            del self.schedules[current_row]
-            self.update_table()
+            self.queue.remove(self.schedules_model.remove(current_row))
             self.save_schedules()
+            self._arm_timer()
+            self.update_load_summary()
 
     def run_selected_now(self):
-        current_row = self.schedules_table.currentRow()
-        if current_row >= 0:
-            automation_name = self.schedules[current_row].automation_name
-            self.schedule_triggered.emit(automation_name)
+        current_row = self._current_row()
+        if current_row >= 0 and self._owns_schedules():
+            schedule = self.schedules[current_row]
+            self._add_running(schedule.name)
+            # Manual runs have no planned start and so no lateness.
+            self.schedule_triggered.emit(
+                schedule.automation_name, schedule.name, 1, None
+            )
             self.schedules[current_row].last_run = datetime.now()
             self.schedules[current_row].run_count += 1
-            self.update_table()
+            self.update_row(current_row)
             self.save_schedules()
 
     def save_schedules(self):
-        os.makedirs("data", exist_ok=True)
-
-        schedules_data = [
-            {
-                "name": s.name,
-                "automation_name": s.automation_name,
-                "schedule_type": s.schedule_type,
-                "schedule_value": s.schedule_value,
-                "enabled": s.enabled,
-                "last_run": s.last_run.isoformat() if s.last_run else None,
-                "next_run": s.next_run.isoformat() if s.next_run else None,
-                "run_count": s.run_count,
-            }
-            for s in self.schedules
-        ]
+        with schedules_lock(self._schedules_file):
+            if not self.lock.held:
+                # The owner keeps run state in the file; write only the edits.
+                try:
+                    on_disk = load_schedules(self._schedules_file)
+                except (FileNotFoundError, json.JSONDecodeError, KeyError, ValueError):
+                    on_disk = []
+                self.schedules = merge_schedule_edits(
+                    self.schedules, on_disk, self._known_names
+                )
+            save_schedules(self.schedules, self._schedules_file)
+            self._known_mtime_ns = self._schedules_mtime_ns()
+        if not self.lock.held:
+            self.queue.rebuild(self.schedules)
+            self.update_table()
+        self._known_names = {schedule.name for schedule in self.schedules}
 
-        with open(self._schedules_file, "w") as f:
-            json.dump(schedules_data, f, separators=(",", ":"))
+    def _schedules_mtime_ns(self):
+        try:
+            return os.stat(self._schedules_file).st_mtime_ns
+        except OSError:
+            return None
 
     def load_schedules(self):
         try:
-            with open(self._schedules_file, "r") as f:
-                schedules_data = json.load(f)
+            self.schedules = load_schedules(self._schedules_file)
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, ValueError):
+            return
+        self._known_mtime_ns = self._schedules_mtime_ns()
+        self._known_names = {schedule.name for schedule in self.schedules}
+        self.queue.rebuild(self.schedules)
+        self._refresh_durations()
+        self._stats_mtime_ns = None
+        self.refresh_stats()
+        self.update_table()
+        self._arm_timer()
 
-            self.schedules = [
-                self._create_schedule_from_data(data) for data in schedules_data
-            ]
-            self.update_table()
-        except (FileNotFoundError, json.JSONDecodeError):
-            pass
-
-    def _create_schedule_from_data(self, data):
-        schedule = ScheduleItem(
-            data["name"],
-            data["automation_name"],
-            data["schedule_type"],
-            data["schedule_value"],
-            data["enabled"],
-        )
-        schedule.last_run = (
-            datetime.fromisoformat(data["last_run"]) if data["last_run"] else None
-        )
-        schedule.next_run = (
-            datetime.fromisoformat(data["next_run"]) if data["next_run"] else None
-        )
-        schedule.run_count = data.get("run_count", 0)
-        return schedule
+    def reload_schedules(self):
+        """Pick up edits made to the schedules file by another process."""
+        if self._schedules_mtime_ns() == self._known_mtime_ns:
+            return
+        self.load_schedules()
 
 
 __all__ = ["ScheduleDialog", "WorkflowScheduler"]
@@ -1,5 +1,6 @@
 import json
 import os
+import threading
 import time
 
 from PyQt6.QtCore import Qt, QTimer
@@ -25,7 +26,16 @@ from PyQt6.QtWidgets import (
 
 from nodebox.core.paths import AUTOMATIONS_DIR, resource_path
 from nodebox.core.screen import ScreenManager
+from nodebox.core.settings import get_setting
+from nodebox.services.blobs import collect_blob_garbage
+from nodebox.services.catalog import AutomationCatalog
+from nodebox.services.environments import collect_environment_garbage
+from nodebox.services.headless import AutomationRunWorker
+from nodebox.services.history import prune_histories, rename_history
+from nodebox.services.node_stats import get_node_stats
 from nodebox.services.ollama import OllamaInstaller
+from nodebox.services.sqlite_store import get_automation_store
+from nodebox.services.watcher import FileWatcherService
 from nodebox.ui.canvas.dialogs import NodeEditorWindow
 from nodebox.ui.features.automation_dialog import NewAutomationWindow
 from nodebox.ui.features.placeholder import PlaceholderWidget
@@ -58,6 +68,14 @@ class EnhancedMainWindow(QWidget):
 
         self._feature_widgets = {}
         self._loaded_tabs = set()
+        self._run_workers = set()
+
+        self.automation_catalog = AutomationCatalog()
+        self._automation_items = {}
+        self._empty_automations_item = None
+
+        self.file_watcher = FileWatcherService(parent=self)
+        self.file_watcher.automation_events.connect(self.on_automation_files_changed)
 
         self.ollama_installer = OllamaInstaller()
         self.ollama_installer.progress_updated.connect(self.update_ollama_indicator)
@@ -69,6 +87,31 @@ class EnhancedMainWindow(QWidget):
         self.init_ui()
         self.setup_connections()
         self.setup_lazy_loading()
+        self.file_watcher.start()
+        self.metrics_server = None
+        self.start_metrics_server()
+        get_node_stats().subscribe()
+
+    def start_metrics_server(self):
+        """Serve bus metrics for Prometheus if the user opted in."""
+        if not get_setting("metrics_server_enabled", False):
+            return
+        from nodebox.services.metrics_server import (
+            DEFAULT_METRICS_PORT,
+            MetricsServer,
+            connect_events,
+            create_registry,
+        )
+
+        registry = create_registry(
+            worker_budget=lambda: get_setting("scheduler_max_workers", 2)
+        )
+        connect_events(registry)
+        server = MetricsServer(
+            registry, get_setting("metrics_server_port", DEFAULT_METRICS_PORT)
+        )
+        if server.start():
+            self.metrics_server = server
 
     def apply_theme(self):
         self.setStyleSheet(f"QWidget {{ background-color: {_BG_DEEP}; color: {_TEXT}; }}")
@@ -110,6 +153,20 @@ class EnhancedMainWindow(QWidget):
         main_layout.addWidget(self.status_bar)
 
         QTimer.singleShot(1500, self.show_ollama_checking)
+        QTimer.singleShot(5000, self.collect_unused_environments)
+
+    def collect_unused_environments(self):
+        threading.Thread(
+            target=self._collect_garbage,
+            name="nodebox-gc",
+            daemon=True,
+        ).start()
+
+    @staticmethod
+    def _collect_garbage():
+        collect_environment_garbage()
+        prune_histories()
+        collect_blob_garbage()
 
     def _build_top_bar(self):
         """Gradient top navigation bar with logo and Ollama indicator."""
@@ -587,6 +644,14 @@ class EnhancedMainWindow(QWidget):
         self.tab_widget.currentChanged.disconnect()
         widget = WorkflowScheduler()
         widget.schedule_triggered.connect(self.run_scheduled_automation)
+        widget.watch_triggered.connect(
+            lambda automation, schedule, inputs, planned_at: (
+                self.run_scheduled_automation(
+                    automation, schedule, 1, planned_at, root_inputs=inputs
+                )
+            )
+        )
+        self.file_watcher.schedules_changed.connect(widget.reload_schedules)
         self._feature_widgets["scheduler"] = widget
         self.tab_widget.removeTab(index)
         self.tab_widget.insertTab(index, widget, self.get_icon("clock"), " Scheduler")
@@ -641,41 +706,69 @@ class EnhancedMainWindow(QWidget):
     # Automations CRUD
     # ------------------------------------------------------------------
     def load_automations(self):
-        self.automation_list.clear()
         self.status_bar.showMessage("Loading automations...")
+        changes = self.automation_catalog.refresh()
+        self.apply_catalog_changes(changes)
+        self.status_bar.showMessage(
+            f"Loaded {len(self.automation_catalog)} automation(s)"
+        )
 
-        automations = self.fetch_automations()
+    def apply_catalog_changes(self, changes):
+        for key in changes.removed:
+            item = self._automation_items.pop(key, None)
+            if item is not None:
+                self.automation_list.takeItem(self.automation_list.row(item))
 
-        if not automations:
+        for key in changes.added + changes.modified:
+            entry = self.automation_catalog.get(key)
+            if entry is None:
+                continue
+            item = self._automation_items.get(key)
+            if item is None:
+                item = QListWidgetItem(self.get_icon("file"), "")
+                item.setFont(QFont("Poppins", 12, QFont.Weight.Medium))
+                item.setData(Qt.ItemDataRole.UserRole, key)
+                self._automation_items[key] = item
+                self.automation_list.addItem(item)
+            item.setText(f"  {entry.name}")
+            item.setToolTip(self._automation_tooltip(entry))
+
+        if self._automation_items:
+            if self._empty_automations_item is not None:
+                self.automation_list.takeItem(
+                    self.automation_list.row(self._empty_automations_item)
+                )
+                self._empty_automations_item = None
+        elif self._empty_automations_item is None:
             item = QListWidgetItem("No automations yet — create your first one above")
             item.setFlags(Qt.ItemFlag.NoItemFlags)
             item.setFont(QFont("Poppins", 12))
             item.setForeground(QColor("#4A5578"))
+            self._empty_automations_item = item
             self.automation_list.addItem(item)
-            self.status_bar.showMessage("Ready")
-            return
 
-        for name in automations:
-            item = QListWidgetItem(self.get_icon("file"), f"  {name}")
-            item.setFont(QFont("Poppins", 12, QFont.Weight.Medium))
-            self.automation_list.addItem(item)
+        self.automation_list.sortItems()
 
-        self.status_bar.showMessage(f"Loaded {len(automations)} automation(s)")
+    @staticmethod
+    def _automation_tooltip(entry):
+        size_kb = entry.size / 1024
+        last_run = entry.last_run or "never"
+        return (
+            f"{entry.node_count} node(s)  |  {size_kb:.1f} KB  |  Last run: {last_run}"
+        )
 
-    def fetch_automations(self):
-        if not AUTOMATIONS_DIR.exists():
-            return []
-
-        automations = []
-        for file_path in AUTOMATIONS_DIR.glob("*.json"):
-            try:
-                with open(file_path, "r") as f:
-                    data = json.load(f)
-                    automations.append(data.get("name", file_path.stem))
-            except (json.JSONDecodeError, IOError):
-                continue
+    def on_automation_files_changed(self, events):
+        changes = self.automation_catalog.refresh_paths(path for _, path in events)
+        if changes:
+            self.apply_catalog_changes(changes)
 
-        return sorted(automations)
+    def _automation_key(self, item):
+        key = item.data(Qt.ItemDataRole.UserRole)
+        return key if key else item.text().strip()
+
+    def fetch_automations(self):
+        self.automation_catalog.refresh()
+        return self.automation_catalog.names()
 
     def create_new_automation(self):
         self.status_bar.showMessage("Creating new automation...")
@@ -687,9 +780,9 @@ class EnhancedMainWindow(QWidget):
         self.load_automations()
 
     def edit_automation(self, item):
-        automation_name = item.text().strip()
-        if "No automations" in automation_name:
+        if item is self._empty_automations_item:
             return
+        automation_name = self._automation_key(item)
 
         self.status_bar.showMessage(f"Opening: {automation_name}")
         editor = NodeEditorWindow(automation_name)
@@ -704,9 +797,38 @@ class EnhancedMainWindow(QWidget):
         self.browse_window = BrowseModelsWindow()
         self.browse_window.show()
 
-    def run_scheduled_automation(self, automation_name):
+    def run_scheduled_automation(
+        self,
+        automation_name,
+        schedule_name=None,
+        runs=1,
+        planned_at=None,
+        root_inputs=None,
+    ):
         self.status_bar.showMessage(f"Running: {automation_name}")
-        print(f"Running scheduled automation: {automation_name}")
+        worker = AutomationRunWorker(
+            automation_name,
+            schedule_name,
+            source="gui",
+            runs=runs,
+            root_inputs=root_inputs,
+            planned_at=planned_at,
+        )
+        worker.completed.connect(self._on_scheduled_run_finished)
+        worker.finished.connect(lambda: self._run_workers.discard(worker))
+        self._run_workers.add(worker)
+        worker.start()
+
+    def _on_scheduled_run_finished(self, record):
+        message = (
+            f"{record['automation']}: {record['status']} ({record['duration_s']:.1f}s)"
+        )
+        if record.get("error"):
+            message += f" - {record['error'].splitlines()[0]}"
+        self.status_bar.showMessage(message, 10000)
+        scheduler = self._feature_widgets.get("scheduler")
+        if scheduler is not None and record.get("schedule"):
+            scheduler.run_finished(record["schedule"])
 
     def show_import_dialog(self):
         self.tab_widget.setCurrentIndex(5)
@@ -718,12 +840,10 @@ class EnhancedMainWindow(QWidget):
 
     def show_automation_context_menu(self, position):
         item = self.automation_list.itemAt(position)
-        if not item:
+        if not item or item is self._empty_automations_item:
             return
 
-        automation_name = item.text().strip()
-        if "No automations" in automation_name:
-            return
+        automation_name = self._automation_key(item)
 
         menu = QMenu(self)
         menu.setStyleSheet(f"""
@@ -808,6 +928,15 @@ class EnhancedMainWindow(QWidget):
     def _rename_automation_file(self, old_name, new_name):
         old_file = AUTOMATIONS_DIR / f"{old_name}.json"
         new_file = AUTOMATIONS_DIR / f"{new_name}.json"
+        store = get_automation_store()
+        if store is not None and store.has_automation(old_name):
+            # The store holds the real data; the JSON file is only the seed
+            # the home list is built from, so it is rewritten from the rows.
+            store.rename_automation(old_name, new_name)
+            store.export_json(new_name)
+            old_file.unlink(missing_ok=True)
+            rename_history(old_name, new_name)
+            return
         if not old_file.exists():
             raise FileNotFoundError(f"Automation file not found: {old_file}")
         with open(old_file, "r") as f:
@@ -816,9 +945,15 @@ class EnhancedMainWindow(QWidget):
         with open(new_file, "w") as f:
             json.dump(data, f, indent=4)
         old_file.unlink()
+        rename_history(old_name, new_name)
 
     def _delete_automation_file(self, automation_name):
         file_path = AUTOMATIONS_DIR / f"{automation_name}.json"
+        store = get_automation_store()
+        if store is not None and store.has_automation(automation_name):
+            store.delete_automation(automation_name)
+            file_path.unlink(missing_ok=True)
+            return
         if not file_path.exists():
             raise FileNotFoundError(f"Automation file not found: {file_path}")
         file_path.unlink()
@@ -853,6 +988,11 @@ class EnhancedMainWindow(QWidget):
     def _duplicate_automation_file(self, source_name, target_name):
         source_file = AUTOMATIONS_DIR / f"{source_name}.json"
         target_file = AUTOMATIONS_DIR / f"{target_name}.json"
+        store = get_automation_store()
+        if store is not None and store.has_automation(source_name):
+            store.copy_automation(source_name, target_name)
+            store.export_json(target_name)
+            return
         if not source_file.exists():
             raise FileNotFoundError(f"Source automation file not found: {source_file}")
         with open(source_file, "r") as f:
@@ -931,6 +1071,11 @@ class EnhancedMainWindow(QWidget):
             self.ollama_installer.cancel_installation()
             time.sleep(0.5)
 
+        self.file_watcher.stop()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        get_node_stats().save()
+
         if "performance" in self._feature_widgets:
             self._feature_widgets["performance"].stop_monitoring()
 